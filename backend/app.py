@@ -1,12 +1,47 @@
 from flask import Flask
-from flask_migrate import Migrate
-import os
+from werkzeug.middleware.proxy_fix import ProxyFix
+from werkzeug.utils import import_string
 from models import db
 from utils.error_handlers import register_error_handlers
+from utils.db_pool import engine_options
+from utils.db_routing import init_replica
+from utils.user_cache import user_cache
+from utils.passwords import password_hasher
+from utils.token_versions import token_versions
+from utils.auth import init_auth
+from utils.rate_limit import rate_limiter
+from utils.response_cache import response_cache
+from utils.live_hub import live_hub
+from utils.async_db import async_db
+from utils.json_provider import init_json
+from cli import register_cli
 from config import Config, TestConfig
 
-def create_app(testing=False):
-    """Factory method to create and configure the Flask application."""
+# Blueprints och deras prefix. Modulerna importeras först i create_app, så att
+# `import app` inte drar in routes, och utan app-kontext.
+BLUEPRINTS = [
+    ('routes.auth_routes:auth_routes', '/auth'),
+    ('routes.user_routes:user_routes', '/users'),
+    ('routes.lag_routes:lag_routes', '/lag'),
+    ('routes.match_routes:match_routes', '/matcher'),
+    ('routes.training_routes:training_routes', '/traningar'),
+    ('routes.system_routes:system_routes', '/system'),
+    ('routes.statistik_routes:statistik_routes', '/statistik'),
+    ('routes.kalender_routes:kalender_routes', '/kalender'),
+]
+
+
+def register_blueprints(app):
+    """Importera och registrera alla blueprints"""
+    for name, url_prefix in BLUEPRINTS:
+        app.register_blueprint(import_string(name), url_prefix=url_prefix)
+
+
+def create_app(testing=False, config=None):
+    """Factory method to create and configure the Flask application.
+
+    `config` är en valfri dict som skriver över inställningar, t.ex. i tester.
+    """
     app = Flask(__name__)
 
     # Välj konfiguration baserat på miljö
@@ -14,41 +49,57 @@ def create_app(testing=False):
         app.config.from_object(TestConfig)
     else:
         app.config.from_object(Config)
+    if config:
+        app.config.update(config)
+
+    # Klientens IP och schema från proxyns headers, t.ex. för rate limiting
+    if app.config.get('TRUSTED_PROXIES'):
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXIES'],
+                                x_proto=app.config['TRUSTED_PROXIES'])
+
+    # Snabbare JSON (orjson om det finns) utan \u-escapes för å, ä och ö
+    init_json(app)
 
     # Fixa PostgreSQL URL för Heroku-kompatibilitet
     database_url = app.config['SQLALCHEMY_DATABASE_URI']
     if database_url and database_url.startswith('postgres://'):
         app.config['SQLALCHEMY_DATABASE_URI'] = database_url.replace('postgres://', 'postgresql://', 1)
 
-    # Initialize the database and Flask-Migrate
+    # Poolinställningar från DB_POOL_* om de inte angetts explicit
+    if 'SQLALCHEMY_ENGINE_OPTIONS' not in app.config:
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+
+    # Initialize the database (Flask-Migrate laddas av `flask db`, se cli.py)
     db.init_app(app)
-    migrate = Migrate(app, db)
+    password_hasher.init_app(app)
+    user_cache.init_app(app)
+    token_versions.init_app(app)
+    response_cache.init_app(app)
+    live_hub.init_app(app)
+    init_replica(app)
+    # Asynkrona motorer för ASGI-läget skapas först när de används
+    async_db.init_app(app)
 
     # Register error handlers
     register_error_handlers(app)
 
+    # Rate limiting registreras före autentiseringen så att den körs först
+    rate_limiter.init_app(app)
+
     # Register Blueprints for different routes
-    # VIKTIGT: Importera Blueprints efter att app är skapad för att undvika cirkulära importer
-    with app.app_context():
-        from routes.auth_routes import auth_routes
-        from routes.user_routes import user_routes
-        from routes.lag_routes import lag_routes
-        from routes.match_routes import match_routes
-        from routes.training_routes import training_routes
-
-        app.register_blueprint(auth_routes, url_prefix='/auth')
-        app.register_blueprint(user_routes, url_prefix='/users')
-        app.register_blueprint(lag_routes, url_prefix='/lag')
-        app.register_blueprint(match_routes, url_prefix='/matcher')
-        app.register_blueprint(training_routes, url_prefix='/traningar')
+    register_blueprints(app)
 
-    return app
+    register_cli(app)
+
+    # Autentisering körs som en enda before_request-hook för alla skyddade routes
+    init_auth(app)
 
-# Create a global app instance for Flask CLI
-app = create_app()
+    return app
 
-# Application entry point
+# Ingen global app: `flask --app app` hittar create_app själv, och servrarna
+# (run_dev_server.py, serve.py, asgi.py) bygger appen när de startar.
 if __name__ == "__main__":
+    app = create_app()
     print(f"Database URL: {app.config['SQLALCHEMY_DATABASE_URI']}")
     print(app.url_map)  # Display all registered routes for debugging
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,158 @@
+"""
+ASGI-läge för API:et. Starta t.ex. med
+
+    uvicorn --factory asgi:create_asgi_app
+
+eller med SERVER_MODE=asgi python run_dev_server.py.
+
+GET-requests till vyer som har en asynkron variant (routes/async_routes.py)
+körs direkt på event-loopen med den asynkrona databasmotorn, så att långa
+anslutningar som SSE inte binder en tråd var. Allt annat går till den vanliga
+Flask-appen via asgiref:s WSGI-adapter.
+"""
+import asyncio
+import io
+import sys
+from werkzeug.middleware.proxy_fix import ProxyFix
+from utils.db_routing import READ_METHODS
+
+
+def _environ(scope):
+    """WSGI-environ för en ASGI-request utan kropp (GET/HEAD)"""
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'SERVER_NAME': scope['server'][0] if scope.get('server') else 'localhost',
+        'SERVER_PORT': str(scope['server'][1]) if scope.get('server') else '80',
+        'REMOTE_ADDR': scope['client'][0] if scope.get('client') else None,
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        if name not in ('CONTENT_LENGTH', 'CONTENT_TYPE'):
+            name = f'HTTP_{name}'
+        value = value.decode('latin-1')
+        environ[name] = f'{environ[name]},{value}' if name in environ else value
+    return environ
+
+
+class AsgiApp:
+    """Skickar requests till en asynkron vy om det finns en, annars till Flask-appen"""
+
+    def __init__(self, flask_app, views):
+        from asgiref.wsgi import WsgiToAsgi
+        self.flask_app = flask_app
+        self.views = views
+        self.wsgi = WsgiToAsgi(flask_app)
+        # Asynkrona vyer går förbi app.wsgi_app, så ProxyFix tillämpas på environ här
+        proxies = flask_app.config.get('TRUSTED_PROXIES')
+        self.proxy_fix = ProxyFix(lambda environ, _: environ, x_for=proxies, x_proto=proxies) if proxies else None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+
+        if scope['type'] == 'http' and scope['method'] in READ_METHODS:
+            response = await self._dispatch(scope)
+            if response is not None:
+                return await self._send(scope, response, receive, send)
+
+        await self.wsgi(scope, receive, send)
+
+    async def _dispatch(self, scope):
+        """
+        Kör den asynkrona vyn i en vanlig request-kontext, med samma
+        before_request-hooks (rate limiting, autentisering), felhanterare och
+        after_request-hooks som i WSGI-läget. None om vyn saknas.
+
+        Hookarna läser ur databasen med den synkrona sessionen och körs därför
+        i en tråd, så att event-loopen inte blockeras under tiden.
+        """
+        app = self.flask_app
+        environ = _environ(scope)
+        if self.proxy_fix is not None:
+            environ = self.proxy_fix(environ, None)
+        ctx = app.request_context(environ)
+        ctx.push()
+        try:
+            request = ctx.request
+            view = self.views.get(request.endpoint)
+            if view is None or request.routing_exception is not None:
+                return None
+
+            try:
+                rv = await asyncio.to_thread(app.preprocess_request)
+                if rv is None:
+                    rv = await view(**request.view_args)
+                response = app.make_response(rv)
+            except Exception as e:
+                try:
+                    response = app.make_response(app.handle_user_exception(e))
+                except Exception as unhandled:
+                    response = app.make_response(app.handle_exception(unhandled))
+            return app.process_response(response)
+        finally:
+            # Kontexten (och databassessionen) släpps innan svaret skickas
+            ctx.pop()
+
+    async def _send(self, scope, response, receive, send):
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': [(key.lower().encode('latin-1'), value.encode('latin-1'))
+                        for key, value in response.headers.items()],
+        })
+        body = response.response
+        if scope['method'] == 'HEAD' or not hasattr(body, '__aiter__'):
+            data = b'' if scope['method'] == 'HEAD' else response.get_data()
+            await send({'type': 'http.response.body', 'body': data})
+            return
+
+        # Strömmande svar (SSE) avbryts när klienten kopplar ner
+        async def pump():
+            async for chunk in body:
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+
+        async def disconnected():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+
+        tasks = [asyncio.ensure_future(pump()), asyncio.ensure_future(disconnected())]
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await body.aclose()
+
+    async def _lifespan(self, receive, send):
+        from utils.async_db import async_db
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await async_db.dispose(self.flask_app)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+def create_asgi_app(testing=False, config=None):
+    """Bygg Flask-appen och ASGI-lagret runt den"""
+    try:
+        import asgiref  # noqa: F401
+    except ImportError as e:  # pragma: no cover - beror på installationen
+        raise RuntimeError('ASGI-läget kräver paketet asgiref') from e
+
+    from app import create_app
+    from routes.async_routes import async_views
+    return AsgiApp(create_app(testing=testing, config=config), async_views.views)
@@ -0,0 +1,115 @@
+"""
+Mäter statistikmodulen mot en naiv implementation med Python-loopar över
+ORM-objekt, på 100 000 matcher och 100 000 närvarorader.
+Kör från backend-katalogen:
+
+    python benchmarks/bench_analytics.py [antal]
+"""
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('TEST_DATABASE_URL', 'sqlite://')
+
+from app import create_app
+from models import db, Lag, Match, Träning, User, training_attendance
+from utils.analytics import load_matches, rolling_goals, home_away_split, load_attendance, attendance_rates
+
+
+def seed(antal):
+    random.seed(1)
+    lag_ids = [row[0] for row in db.session.execute(
+        db.insert(Lag).returning(Lag.id, sort_by_parameter_order=True),
+        [{'namn': f'Lag {i}'} for i in range(40)]
+    )]
+    start = datetime(2015, 1, 1, 15, 0)
+    matcher = []
+    for i in range(antal):
+        hemma, borta = random.sample(lag_ids, 2)
+        matcher.append({
+            'hemmalag_id': hemma, 'bortalag_id': borta, 'plats': 'Solvädersvallen',
+            'datum': start + timedelta(hours=2 * i),
+            'resultat_hemma': random.randint(0, 5), 'resultat_borta': random.randint(0, 5)
+        })
+    db.session.execute(db.insert(Match), matcher)
+
+    # 50 spelare i ett lag och antal / 50 träningar ger antal närvarorader
+    spelare = [row[0] for row in db.session.execute(
+        db.insert(User.__table__).returning(User.__table__.c.id, sort_by_parameter_order=True),
+        [{'förnamn': 'Spelare', 'efternamn': str(i), 'email': f'spelare{i}@example.com',
+          'lösenord_hash': '-', 'roll': 'spelare', 'token_version': 0} for i in range(50)]
+    )]
+    träningar = [row[0] for row in db.session.execute(
+        db.insert(Träning).returning(Träning.id, sort_by_parameter_order=True),
+        [{'lag_id': lag_ids[0], 'plats': 'Konstgräset', 'datum': start + timedelta(days=2 * i)}
+         for i in range(antal // len(spelare))]
+    )]
+    db.session.execute(training_attendance.insert(), [
+        {'training_id': t, 'user_id': u, 'status': random.choice(['närvarande', 'närvarande', 'frånvarande']),
+         'updated_at': start}
+        for t in träningar for u in spelare
+    ])
+    db.session.commit()
+    return lag_ids[0]
+
+
+def naive(lag_id):
+    """Samma siffror med ORM-objekt och dict-räknare"""
+    goals = []
+    split = defaultdict(lambda: defaultdict(int))
+    for match in Match.query.filter(Match.resultat_hemma.isnot(None)).order_by(Match.datum, Match.id):
+        goals.append(match.resultat_hemma + match.resultat_borta)
+        split[match.hemmalag_id]['hemma_gjorda'] += match.resultat_hemma
+        split[match.bortalag_id]['borta_gjorda'] += match.resultat_borta
+    rolling = [sum(goals[max(0, i - 4):i + 1]) / len(goals[max(0, i - 4):i + 1]) for i in range(len(goals))]
+
+    # Närvaron läses med en JOIN, som i load_attendance, så att skillnaden
+    # är loopen och inte antalet frågor
+    per_month = defaultdict(set)
+    present = defaultdict(int)
+    rows = db.session.execute(
+        db.select(Träning.id, Träning.datum, training_attendance.c.user_id, training_attendance.c.status)
+        .outerjoin(training_attendance, training_attendance.c.training_id == Träning.id)
+        .where(Träning.lag_id == lag_id)
+    )
+    for training_id, datum, user_id, status in rows:
+        month = datum.strftime('%Y-%m')
+        per_month[month].add(training_id)
+        if user_id is not None:
+            present[(user_id, month)] += status == 'närvarande'
+    rates = {key: count / len(per_month[key[1]]) for key, count in present.items()}
+    return rolling, split, rates
+
+
+def vectorized(lag_id):
+    matches = load_matches()
+    return (rolling_goals(matches), home_away_split(matches),
+            attendance_rates(load_attendance(lag_id)))
+
+
+def timed(label, fn, *args):
+    db.session.expunge_all()
+    start = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - start
+    print(f'{label:12s} {elapsed * 1000:9.1f} ms')
+    return elapsed
+
+
+def main(antal=100000):
+    app = create_app(testing=True)
+    with app.app_context():
+        db.create_all()
+        lag_id = seed(antal)
+        print(f'{antal} matcher, {antal} närvarorader')
+        naive_time = timed('naiv', naive, lag_id)
+        numpy_time = timed('numpy', vectorized, lag_id)
+        print(f'{naive_time / numpy_time:.1f}x snabbare')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
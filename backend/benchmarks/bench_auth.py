@@ -0,0 +1,97 @@
+"""
+Mäter kostnaden per request för autentiseringslagret.
+
+Jämför den gamla lösningen (token_required + roles_required som separata
+wrappers som båda parsar och kontrollerar) med den nya before_request-hooken.
+Kör från backend-katalogen:
+
+    python benchmarks/bench_auth.py [antal]
+"""
+import os
+import sys
+import timeit
+from functools import wraps
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('TEST_DATABASE_URL', 'sqlite://')
+
+import jwt
+from flask import request, jsonify, g
+
+from app import create_app
+from models import db, User
+from utils.auth import authenticate_request
+from utils.token_utils import create_access_token, decode_token
+from utils.user_cache import user_cache
+
+
+def legacy_token_required(f):
+    """Kopia av den tidigare decorators.token_required"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        token = None
+        if 'Authorization' in request.headers:
+            auth_header = request.headers['Authorization']
+            if auth_header.startswith('Bearer '):
+                token = auth_header.split(' ')[1]
+        if not token:
+            return jsonify({'error': 'Token saknas'}), 401
+        try:
+            data = decode_token(token)
+            current_user = user_cache.get_user(data['user_id'])
+            if not current_user:
+                return jsonify({'error': 'Ogiltig token - användaren hittades inte'}), 401
+        except jwt.InvalidTokenError:
+            return jsonify({'error': 'Ogiltig token'}), 401
+        return f(current_user, *args, **kwargs)
+    return decorated
+
+
+def legacy_roles_required(allowed_roles):
+    """Kopia av den tidigare decorators.roles_required"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(current_user, *args, **kwargs):
+            roles = [allowed_roles] if isinstance(allowed_roles, str) else allowed_roles
+            if current_user.roll not in roles:
+                return jsonify({'error': 'Åtkomst nekad'}), 403
+            return f(current_user, *args, **kwargs)
+        return decorated_function
+    return decorator
+
+
+def main(antal=20000):
+    app = create_app(testing=True)
+    with app.app_context():
+        db.create_all()
+        admin = User(förnamn='Bench', efternamn='Mark', email='bench@example.com',
+                     lösenord='Benchmark1', roll='admin')
+        db.session.add(admin)
+        db.session.commit()
+        headers = {'Authorization': f'Bearer {create_access_token(admin)}'}
+
+    @legacy_token_required
+    @legacy_roles_required(['admin', 'tränare'])
+    def legacy_view(current_user):
+        return current_user.id
+
+    def new_view():
+        return g.current_user.id
+
+    ctx = app.test_request_context('/users/', headers=headers)
+    ctx.push()
+    ctx.request.url_rule, ctx.request.view_args = app.url_map.bind('localhost').match(
+        '/users/', return_rule=True)
+    try:
+        legacy = timeit.timeit(legacy_view, number=antal)
+        new = timeit.timeit(lambda: authenticate_request() or new_view(), number=antal)
+    finally:
+        ctx.pop()
+
+    print(f'{antal} anrop')
+    print(f'gammal stack:  {legacy / antal * 1e6:8.1f} µs/anrop')
+    print(f'ny hook:       {new / antal * 1e6:8.1f} µs/anrop')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
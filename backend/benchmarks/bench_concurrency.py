@@ -0,0 +1,154 @@
+"""
+Jämför hur många samtidiga anslutningar WSGI-stacken (Werkzeug, en tråd per
+anslutning) och ASGI-läget (asgi.py under uvicorn) klarar.
+
+1. `antal` klienter håller var sin SSE-ström mot /matcher/<id>/live. Mäter
+   hur lång tid det tar att ansluta alla, hur många trådar processen behöver
+   och hur lång tid en publicerad ställning tar att nå samtliga.
+2. 50 samtidiga klienter läser GET /lag/ och GET /matcher/ (requests/s).
+
+Kör från backend-katalogen (kräver asgiref, aiosqlite och uvicorn):
+
+    python benchmarks/bench_concurrency.py [antal]
+"""
+import asyncio
+import logging
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('TEST_DATABASE_URL', 'sqlite://')
+
+from asgi import create_asgi_app
+from models import db, Lag, Match
+from utils.live_hub import live_hub
+
+LÄSARE = 50
+LÄSNINGAR = 20
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def seed(app):
+    with app.app_context():
+        db.create_all()
+        lag = [Lag(namn=f'Lag {i}') for i in range(20)]
+        db.session.add_all(lag)
+        db.session.flush()
+        db.session.add_all([
+            Match(hemmalag_id=lag[i].id, bortalag_id=lag[i + 1].id, datum=datetime(2025, 5, 1 + i, 18, 0),
+                  plats='Solvädersvallen')
+            for i in range(19)
+        ])
+        db.session.commit()
+
+
+def serve_wsgi(flask_app, port):
+    from werkzeug.serving import make_server
+    server = make_server('127.0.0.1', port, flask_app, threaded=True)
+    server.socket.listen(4096)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.shutdown
+
+
+def serve_asgi(asgi_app, port):
+    import uvicorn
+    server = uvicorn.Server(uvicorn.Config(asgi_app, host='127.0.0.1', port=port, log_level='error',
+                                          lifespan='on', backlog=4096, timeout_keep_alive=30))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+
+    def stop():
+        server.should_exit = True
+    return stop
+
+
+async def open_stream(port, path):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port, limit=2 ** 20)
+    writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\nAccept: text/event-stream\r\n\r\n'.encode())
+    await writer.drain()
+    await wait_for_event(reader, b'event: resultat')
+    return reader, writer
+
+
+async def wait_for_event(reader, marker):
+    buffer = b''
+    while marker not in buffer:
+        chunk = await reader.read(4096)
+        if not chunk:
+            raise ConnectionError('Anslutningen stängdes')
+        buffer += chunk
+
+
+async def fetch(port, path):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n'.encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    assert response.startswith(b'HTTP/1.1 200'), response[:100]
+
+
+async def measure(label, port, flask_app, antal):
+    threads_before = threading.active_count()
+    start = time.perf_counter()
+    streams = await asyncio.gather(*(open_stream(port, '/matcher/1/live') for _ in range(antal)))
+    connected = time.perf_counter() - start
+    threads = threading.active_count() - threads_before
+
+    start = time.perf_counter()
+    with flask_app.app_context():
+        live_hub.publish('match:1', 'resultat', {'id': 1, 'resultat_hemma': 1, 'resultat_borta': 0})
+    await asyncio.gather(*(wait_for_event(reader, b'"resultat_hemma":1') for reader, _ in streams))
+    fanout = time.perf_counter() - start
+
+    for _, writer in streams:
+        writer.close()
+    await asyncio.sleep(0.5)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        fetch(port, path)
+        for _ in range(LÄSNINGAR) for path in ['/lag/', '/matcher/'] * (LÄSARE // 2)
+    ))
+    rps = LÄSARE * LÄSNINGAR / (time.perf_counter() - start)
+
+    print(f'{label:6s} {antal} SSE-klienter: ansluten på {connected * 1000:7.1f} ms, '
+          f'{threads:5d} nya trådar, ställning ute hos alla på {fanout * 1000:7.1f} ms, '
+          f'{rps:7.1f} läsningar/s')
+
+
+def main(antal=500):
+    with tempfile.TemporaryDirectory() as directory:
+        config = {'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(directory, 'bench.db')}",
+                  'RATELIMIT_ENABLED': False, 'LIVE_HEARTBEAT_SECONDS': 60}
+        asgi_app = create_asgi_app(testing=True, config=config)
+        flask_app = asgi_app.flask_app
+        seed(flask_app)
+
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+        # ASGI först: WSGI-trådarna lever kvar tills nästa heartbeat märker att klienten är borta
+        port = free_port()
+        stop = serve_asgi(asgi_app, port)
+        asyncio.run(measure('asgi', port, flask_app, antal))
+        stop()
+
+        port = free_port()
+        stop = serve_wsgi(flask_app, port)
+        asyncio.run(measure('wsgi', port, flask_app, antal))
+        stop()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
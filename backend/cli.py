@@ -0,0 +1,88 @@
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from models import db
+from utils.user_import import import_users, read_rows
+from utils.standings import rebuild
+from utils.token_utils import prune_refresh_tokens
+from utils.ical import prune_removals
+
+users_cli = AppGroup('users', help='Hantera användare')
+tabell_cli = AppGroup('tabell', help='Ligatabell och statistik')
+tokens_cli = AppGroup('tokens', help='Refresh-tokens')
+kalender_cli = AppGroup('kalender', help='Kalenderflöden')
+
+
+@users_cli.command('import')
+@click.argument('fil', type=click.File('r', encoding='utf-8'))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'json']), default=None,
+              help='Filformat, gissas från filändelsen om det utelämnas')
+def import_command(fil, fmt):
+    """Importera användare från en CSV-, JSON- eller NDJSON-fil."""
+    if fmt is None:
+        fmt = 'json' if fil.name.endswith(('.json', '.ndjson', '.jsonl')) else 'csv'
+
+    report = import_users(read_rows(fil, fmt))
+
+    click.echo(f"✅ {report['skapade']} användare skapade")
+    for fel in report['fel']:
+        click.echo(f"❌ Rad {fel['rad']} ({fel['email']}): {fel['fel']}", err=True)
+
+
+@tabell_cli.command('rebuild')
+def rebuild_command():
+    """Bygg om tabell, form och inbördes möten från alla matcher."""
+    antal = rebuild()
+    db.session.commit()
+    click.echo(f"✅ Tabellen ombyggd för {antal} lag")
+
+
+@tokens_cli.command('prune')
+@click.option('--revoked-days', default=7, show_default=True,
+              help='Dagar som återkallade tokens sparas för att känna igen återanvändning')
+def prune_command(revoked_days):
+    """Ta bort utgångna och gamla återkallade refresh-tokens."""
+    antal = prune_refresh_tokens(revoked_days)
+    db.session.commit()
+    click.echo(f"✅ {antal} refresh-tokens borttagna")
+
+
+@kalender_cli.command('prune')
+def prune_kalender_command():
+    """Ta bort borttagna händelser äldre än CALENDAR_HISTORY_DAYS."""
+    antal = prune_removals(current_app.config['CALENDAR_HISTORY_DAYS'])
+    db.session.commit()
+    click.echo(f"✅ {antal} borttagna händelser rensade")
+
+
+class MigrateGroup(click.Group):
+    """
+    `flask db` från Flask-Migrate, som laddas först när kommandot körs. Alembic
+    tar en stor del av starttiden och behövs aldrig i servern.
+    """
+
+    def __init__(self, app, db):
+        super().__init__('db', help='Databasmigreringar (Flask-Migrate)')
+        self.app = app
+        self.db = db
+        self._group = None
+
+    def _load(self):
+        if self._group is None:
+            from flask_migrate import Migrate
+            # Migrate.init_app ersätter den här gruppen med sin egen i app.cli
+            Migrate(self.app, self.db)
+            self._group = self.app.cli.commands['db']
+        return self._group
+
+    def make_context(self, info_name, args, parent=None, **extra):
+        # Flask-Migrates grupp tar över: dess flaggor (-d, -x) och underkommandon
+        return self._load().make_context(info_name, args, parent=parent, **extra)
+
+def register_cli(app):
+    """Registrera CLI-kommandon för flask"""
+    app.cli.add_command(users_cli)
+    app.cli.add_command(tabell_cli)
+    app.cli.add_command(tokens_cli)
+    app.cli.add_command(kalender_cli)
+    app.cli.add_command(MigrateGroup(app, db))
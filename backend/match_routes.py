@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify
 from models import db, Match
-from utils.token_utils import token_required
+from utils.auth import token_required
 
 # Viktigt: Se till att variabeln heter exakt "match_routes"
 match_routes = Blueprint('match_routes', __name__)
@@ -0,0 +1,26 @@
+"""Add token_version to users for token revocation
+
+Revision ID: 4f7b2d9e1a63
+Revises: 366ee9b85edd
+Create Date: 2025-04-02 10:21:44.106532
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f7b2d9e1a63'
+down_revision = '366ee9b85edd'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('token_version')
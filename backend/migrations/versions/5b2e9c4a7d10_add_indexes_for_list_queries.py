@@ -0,0 +1,48 @@
+"""Add indexes and constraints for list queries
+
+Revision ID: 5b2e9c4a7d10
+Revises: 7a3e5c1f9b24
+Create Date: 2025-04-12 14:03:51.218904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b2e9c4a7d10'
+down_revision = '7a3e5c1f9b24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('träningar', schema=None) as batch_op:
+        batch_op.create_index('ix_traningar_lag_id_datum_id', ['lag_id', 'datum', 'id'], unique=False)
+        batch_op.create_index('ix_traningar_datum_id', ['datum', 'id'], unique=False)
+        batch_op.create_index('ix_traningar_lag_id_plats_datum', ['lag_id', 'plats', 'datum'], unique=False)
+
+    with op.batch_alter_table('matcher', schema=None) as batch_op:
+        batch_op.create_index('ix_matcher_datum_id', ['datum', 'id'], unique=False)
+        batch_op.create_index('ix_matcher_hemmalag_id_datum', ['hemmalag_id', 'datum'], unique=False)
+        batch_op.create_index('ix_matcher_bortalag_id_datum', ['bortalag_id', 'datum'], unique=False)
+        batch_op.create_check_constraint('ck_matcher_olika_lag', 'hemmalag_id <> bortalag_id')
+
+    with op.batch_alter_table('user_lag', schema=None) as batch_op:
+        batch_op.create_index('ix_user_lag_lag_id_user_id', ['lag_id', 'user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user_lag', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_lag_lag_id_user_id')
+
+    with op.batch_alter_table('matcher', schema=None) as batch_op:
+        batch_op.drop_constraint('ck_matcher_olika_lag', type_='check')
+        batch_op.drop_index('ix_matcher_bortalag_id_datum')
+        batch_op.drop_index('ix_matcher_hemmalag_id_datum')
+        batch_op.drop_index('ix_matcher_datum_id')
+
+    with op.batch_alter_table('träningar', schema=None) as batch_op:
+        batch_op.drop_index('ix_traningar_lag_id_plats_datum')
+        batch_op.drop_index('ix_traningar_datum_id')
+        batch_op.drop_index('ix_traningar_lag_id_datum_id')
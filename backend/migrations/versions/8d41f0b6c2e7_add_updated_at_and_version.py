@@ -0,0 +1,35 @@
+"""Add updated_at and version to lag, matcher and träningar
+
+Revision ID: 8d41f0b6c2e7
+Revises: 5b2e9c4a7d10
+Create Date: 2025-04-14 09:26:12.508113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d41f0b6c2e7'
+down_revision = '5b2e9c4a7d10'
+branch_labels = None
+depends_on = None
+
+TABLES = ('lag', 'matcher', 'träningar')
+
+
+def upgrade():
+    # Befintliga rader får aktuell tid och version 1
+    for table in TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=False,
+                                          server_default=sa.func.current_timestamp()))
+            batch_op.add_column(sa.Column('version', sa.Integer(), nullable=False,
+                                          server_default='1'))
+
+
+def downgrade():
+    for table in reversed(TABLES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('version')
+            batch_op.drop_column('updated_at')
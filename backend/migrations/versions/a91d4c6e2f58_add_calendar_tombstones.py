@@ -0,0 +1,37 @@
+"""Add calendar tombstones for delta sync of feeds
+
+Revision ID: a91d4c6e2f58
+Revises: e5f19a3b7c42
+Create Date: 2025-04-20 14:03:51.218476
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a91d4c6e2f58'
+down_revision = 'e5f19a3b7c42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('kalender_borttagna',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('uid', sa.String(length=100), nullable=False),
+    sa.Column('lag_id', sa.Integer(), nullable=False),
+    sa.Column('datum', sa.DateTime(), nullable=False),
+    sa.Column('sekvens', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('raderad', sa.DateTime(), nullable=False, server_default=sa.func.current_timestamp()),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('kalender_borttagna', schema=None) as batch_op:
+        batch_op.create_index('ix_kalender_borttagna_lag_id_raderad', ['lag_id', 'raderad'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('kalender_borttagna', schema=None) as batch_op:
+        batch_op.drop_index('ix_kalender_borttagna_lag_id_raderad')
+
+    op.drop_table('kalender_borttagna')
@@ -0,0 +1,44 @@
+"""Add per-player training attendance
+
+Revision ID: c3a7e21f94b8
+Revises: 8d41f0b6c2e7
+Create Date: 2025-04-16 19:42:07.331645
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3a7e21f94b8'
+down_revision = '8d41f0b6c2e7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('training_attendance',
+    sa.Column('training_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['training_id'], ['träningar.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('training_id', 'user_id')
+    )
+    with op.batch_alter_table('training_attendance', schema=None) as batch_op:
+        batch_op.create_index('ix_training_attendance_user_id_training_id', ['user_id', 'training_id'], unique=False)
+
+    # Antalet räknas nu från training_attendance i stället för att lagras per träning
+    with op.batch_alter_table('träningar', schema=None) as batch_op:
+        batch_op.drop_column('närvaro')
+
+
+def downgrade():
+    with op.batch_alter_table('träningar', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('närvaro', sa.Integer(), nullable=True))
+
+    with op.batch_alter_table('training_attendance', schema=None) as batch_op:
+        batch_op.drop_index('ix_training_attendance_user_id_training_id')
+
+    op.drop_table('training_attendance')
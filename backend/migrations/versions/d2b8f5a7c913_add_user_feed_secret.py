@@ -0,0 +1,26 @@
+"""Add feed_secret to users for revocable calendar feed tokens
+
+Revision ID: d2b8f5a7c913
+Revises: a91d4c6e2f58
+Create Date: 2025-04-24 09:12:37.481265
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2b8f5a7c913'
+down_revision = 'a91d4c6e2f58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('feed_secret', sa.String(length=32), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('feed_secret')
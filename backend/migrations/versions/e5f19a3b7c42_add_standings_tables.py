@@ -0,0 +1,53 @@
+"""Add precomputed league table and head-to-head tables
+
+Revision ID: e5f19a3b7c42
+Revises: c3a7e21f94b8
+Create Date: 2025-04-18 10:15:44.902117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5f19a3b7c42'
+down_revision = 'c3a7e21f94b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('tabell',
+    sa.Column('lag_id', sa.Integer(), nullable=False),
+    sa.Column('spelade', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('vunna', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('oavgjorda', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('förlorade', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('gjorda', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('insläppta', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('poäng', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('form', sa.String(length=5), nullable=False, server_default=''),
+    sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.current_timestamp()),
+    sa.ForeignKeyConstraint(['lag_id'], ['lag.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('lag_id')
+    )
+    op.create_table('inbördes',
+    sa.Column('lag_a_id', sa.Integer(), nullable=False),
+    sa.Column('lag_b_id', sa.Integer(), nullable=False),
+    sa.Column('spelade', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('vinster_a', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('vinster_b', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('oavgjorda', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('gjorda_a', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('gjorda_b', sa.Integer(), nullable=False, server_default='0'),
+    sa.CheckConstraint('lag_a_id < lag_b_id', name='ck_inbordes_ordning'),
+    sa.ForeignKeyConstraint(['lag_a_id'], ['lag.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['lag_b_id'], ['lag.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('lag_a_id', 'lag_b_id')
+    )
+    # Fyll tabellerna med "flask tabell rebuild" efter uppgraderingen
+
+
+def downgrade():
+    op.drop_table('inbördes')
+    op.drop_table('tabell')
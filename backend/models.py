@@ -1,16 +1,34 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
-from werkzeug.security import generate_password_hash
+from utils.passwords import password_hasher
+from utils.db_routing import RoutingSession
+from utils.serialization import ModelSerializer
 
-# Skapa databas-instans
-db = SQLAlchemy()
+# Skapa databas-instans. Sessionen skickar läsningar i GET-requests till en
+# eventuell läsreplika (SQLALCHEMY_REPLICA_URI).
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 # Associationstabell för många-till-många relation mellan User och Lag
 user_lag = db.Table('user_lag',
                     db.Column('user_id', db.Integer, db.ForeignKey('users.id'), primary_key=True),
-                    db.Column('lag_id', db.Integer, db.ForeignKey('lag.id'), primary_key=True)
+                    db.Column('lag_id', db.Integer, db.ForeignKey('lag.id'), primary_key=True),
+                    # Primärnyckeln täcker uppslag per användare, detta index uppslag per lag
+                    db.Index('ix_user_lag_lag_id_user_id', 'lag_id', 'user_id')
                     )
 
+# Närvaro per spelare och träning. Primärnyckeln täcker uppslag per träning,
+# indexet uppslag per spelare (t.ex. närvarostatistik över säsongen).
+training_attendance = db.Table('training_attendance',
+                               db.Column('training_id', db.Integer,
+                                         db.ForeignKey('träningar.id', ondelete='CASCADE'), primary_key=True),
+                               db.Column('user_id', db.Integer,
+                                         db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+                               db.Column('status', db.String(20), nullable=False, default='närvarande'),
+                               db.Column('updated_at', db.DateTime, nullable=False,
+                                         default=datetime.utcnow, onupdate=datetime.utcnow),
+                               db.Index('ix_training_attendance_user_id_training_id', 'user_id', 'training_id')
+                               )
+
 
 class User(db.Model):
     """Användarmodell för systemet"""
@@ -23,33 +41,60 @@ class User(db.Model):
     lösenord_hash = db.Column(db.String(200), nullable=False)
     telefon = db.Column(db.String(20), nullable=True)
     roll = db.Column(db.String(20), default='spelare')  # spelare, tränare, admin
+    # Räknas upp när roll eller lösenord ändras så att utfärdade tokens återkallas
+    token_version = db.Column(db.Integer, nullable=False, default=0)
+    # Ingår i kalenderns feed-token; byts för att återkalla bara den (se /kalender/token)
+    feed_secret = db.Column(db.String(32), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     # Relationer till andra tabeller
     # Fixad relation som specificerar foreign_keys
     träningar = db.relationship('Träning', backref='användare', lazy=True, foreign_keys='Träning.user_id')
+    refresh_tokens = db.relationship('RefreshToken', backref='user', lazy='dynamic', passive_deletes=True)
 
     def __init__(self, förnamn, efternamn, email, lösenord, telefon=None, roll='spelare'):
         self.förnamn = förnamn
         self.efternamn = efternamn
         self.email = email
-        self.lösenord_hash = generate_password_hash(lösenord)
+        self.lösenord_hash = password_hasher.hash(lösenord)
         self.telefon = telefon
         self.roll = roll
 
+    def set_password(self, lösenord):
+        self.lösenord_hash = password_hasher.hash(lösenord)
+
+    def check_password(self, lösenord):
+        return password_hasher.verify(self.lösenord_hash, lösenord)
+
     def __repr__(self):
         return f'<User {self.förnamn} {self.efternamn}>'
 
+    serializer = ModelSerializer({
+        'id': 'id',
+        'förnamn': 'förnamn',
+        'efternamn': 'efternamn',
+        'email': 'email',
+        'telefon': 'telefon',
+        'roll': 'roll'
+    })
+
     # Lägg till serialize-metod för API-svar
-    def serialize(self):
-        return {
-            'id': self.id,
-            'förnamn': self.förnamn,
-            'efternamn': self.efternamn,
-            'email': self.email,
-            'telefon': self.telefon,
-            'roll': self.roll
-        }
+    def serialize(self, fields=None):
+        return self.serializer(self, fields)
+
+
+class RefreshToken(db.Model):
+    """Utfärdade refresh-tokens, slås upp på jti (primärnyckel)"""
+    __tablename__ = 'refresh_tokens'
+
+    jti = db.Column(db.String(36), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    revoked = db.Column(db.Boolean, nullable=False, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<RefreshToken {self.jti} för användare {self.user_id}>'
 
 
 class Lag(db.Model):
@@ -60,18 +105,39 @@ class Lag(db.Model):
     namn = db.Column(db.String(100), nullable=False)
     beskrivning = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # updated_at och version används för ETag/Last-Modified
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    version = db.Column(db.Integer, nullable=False, default=1)
+
+    __mapper_args__ = {'version_id_col': version}
 
     # Relationer
     medlemmar = db.relationship('User', secondary=user_lag, backref=db.backref('lag', lazy='dynamic'))
     träningar = db.relationship('Träning', backref='lag', lazy=True)
 
+    serializer = ModelSerializer({
+        'id': 'id',
+        'namn': 'namn',
+        'beskrivning': 'beskrivning'
+    })
+
     def __repr__(self):
         return f'<Lag {self.namn}>'
 
+    def serialize(self, fields=None):
+        return self.serializer(self, fields)
+
 
 class Match(db.Model):
     """Modell för matcher"""
     __tablename__ = 'matcher'
+    __table_args__ = (
+        # Listning sorterad på (datum, id) och uppslag per lag i datumordning
+        db.Index('ix_matcher_datum_id', 'datum', 'id'),
+        db.Index('ix_matcher_hemmalag_id_datum', 'hemmalag_id', 'datum'),
+        db.Index('ix_matcher_bortalag_id_datum', 'bortalag_id', 'datum'),
+        db.CheckConstraint('hemmalag_id <> bortalag_id', name='ck_matcher_olika_lag'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     hemmalag_id = db.Column(db.Integer, db.ForeignKey('lag.id'), nullable=False)
@@ -80,18 +146,44 @@ class Match(db.Model):
     plats = db.Column(db.String(100), nullable=False)
     resultat_hemma = db.Column(db.Integer, nullable=True)
     resultat_borta = db.Column(db.Integer, nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    version = db.Column(db.Integer, nullable=False, default=1)
+
+    __mapper_args__ = {'version_id_col': version}
 
     # Relationer
     hemmalag = db.relationship('Lag', foreign_keys=[hemmalag_id])
     bortalag = db.relationship('Lag', foreign_keys=[bortalag_id])
 
+    # Lagnamnen läses via relationerna, ladda dem med joinedload i listor
+    serializer = ModelSerializer({
+        'id': 'id',
+        'hemmalag_id': 'hemmalag_id',
+        'hemmalag_namn': 'hemmalag.namn',
+        'bortalag_id': 'bortalag_id',
+        'bortalag_namn': 'bortalag.namn',
+        'datum': 'datum',
+        'plats': 'plats',
+        'resultat_hemma': 'resultat_hemma',
+        'resultat_borta': 'resultat_borta'
+    }, dates=['datum'])
+
     def __repr__(self):
         return f'<Match {self.hemmalag_id} vs {self.bortalag_id} at {self.datum}>'
 
+    def serialize(self, fields=None):
+        return self.serializer(self, fields)
+
 
 class Träning(db.Model):
     """Modell för träningar"""
     __tablename__ = 'träningar'
+    __table_args__ = (
+        # Listning per lag och totalt sorterad på (datum, id), samt krockkontroll för serier
+        db.Index('ix_traningar_lag_id_datum_id', 'lag_id', 'datum', 'id'),
+        db.Index('ix_traningar_datum_id', 'datum', 'id'),
+        db.Index('ix_traningar_lag_id_plats_datum', 'lag_id', 'plats', 'datum'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     lag_id = db.Column(db.Integer, db.ForeignKey('lag.id'), nullable=False)
@@ -99,18 +191,112 @@ class Träning(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
     datum = db.Column(db.DateTime, nullable=False)
     plats = db.Column(db.String(100), nullable=False)
+    typ = db.Column(db.String(100), nullable=True)
     beskrivning = db.Column(db.Text, nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    version = db.Column(db.Integer, nullable=False, default=1)
+
+    __mapper_args__ = {'version_id_col': version}
 
     def __repr__(self):
         return f'<Träning för lag {self.lag_id} den {self.datum}>'
 
+    serializer = ModelSerializer({
+        'id': 'id',
+        'lag_id': 'lag_id',
+        'user_id': 'user_id',
+        'datum': 'datum',
+        'plats': 'plats',
+        'typ': 'typ',
+        'beskrivning': 'beskrivning'
+    }, dates=['datum'])
+
     # Lägg till serialize-metod för API-svar
-    def serialize(self):
-        return {
-            'id': self.id,
-            'lag_id': self.lag_id,
-            'user_id': self.user_id,
-            'datum': self.datum.isoformat() if self.datum else None,
-            'plats': self.plats,
-            'beskrivning': self.beskrivning
-        }
\ No newline at end of file
+    def serialize(self, fields=None):
+        return self.serializer(self, fields)
+
+
+class Tabellrad(db.Model):
+    """Ligatabellen: förberäknad rad per lag som uppdateras när matcher ändras"""
+    __tablename__ = 'tabell'
+
+    lag_id = db.Column(db.Integer, db.ForeignKey('lag.id', ondelete='CASCADE'), primary_key=True)
+    spelade = db.Column(db.Integer, nullable=False, default=0)
+    vunna = db.Column(db.Integer, nullable=False, default=0)
+    oavgjorda = db.Column(db.Integer, nullable=False, default=0)
+    förlorade = db.Column(db.Integer, nullable=False, default=0)
+    gjorda = db.Column(db.Integer, nullable=False, default=0)
+    insläppta = db.Column(db.Integer, nullable=False, default=0)
+    poäng = db.Column(db.Integer, nullable=False, default=0)
+    # De senaste fem resultaten, senaste först: V(inst), O(avgjort), F(örlust)
+    form = db.Column(db.String(5), nullable=False, default='')
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    lag = db.relationship('Lag')
+
+    serializer = ModelSerializer({
+        'lag_id': 'lag_id',
+        'lag_namn': 'lag.namn',
+        'spelade': 'spelade',
+        'vunna': 'vunna',
+        'oavgjorda': 'oavgjorda',
+        'förlorade': 'förlorade',
+        'gjorda': 'gjorda',
+        'insläppta': 'insläppta',
+        'målskillnad': 'målskillnad',
+        'poäng': 'poäng',
+        'form': 'form'
+    })
+
+    @property
+    def målskillnad(self):
+        return self.gjorda - self.insläppta
+
+    def __repr__(self):
+        return f'<Tabellrad lag {self.lag_id}: {self.poäng} p>'
+
+    def serialize(self, fields=None):
+        return self.serializer(self, fields)
+
+
+class Inbördes(db.Model):
+    """Inbördes möten mellan två lag, lagras en gång per par med lag_a_id < lag_b_id"""
+    __tablename__ = 'inbördes'
+    __table_args__ = (
+        db.CheckConstraint('lag_a_id < lag_b_id', name='ck_inbordes_ordning'),
+    )
+
+    lag_a_id = db.Column(db.Integer, db.ForeignKey('lag.id', ondelete='CASCADE'), primary_key=True)
+    lag_b_id = db.Column(db.Integer, db.ForeignKey('lag.id', ondelete='CASCADE'), primary_key=True)
+    spelade = db.Column(db.Integer, nullable=False, default=0)
+    vinster_a = db.Column(db.Integer, nullable=False, default=0)
+    vinster_b = db.Column(db.Integer, nullable=False, default=0)
+    oavgjorda = db.Column(db.Integer, nullable=False, default=0)
+    gjorda_a = db.Column(db.Integer, nullable=False, default=0)
+    gjorda_b = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<Inbördes {self.lag_a_id} mot {self.lag_b_id}>'
+
+
+class KalenderBorttagning(db.Model):
+    """
+    Händelse som försvunnit ur ett lags kalender (borttagen eller flyttad till
+    ett annat lag). Används av kalenderflödenas deltaläge för att skicka
+    inställda händelser till klienter som synkat tidigare.
+    """
+    __tablename__ = 'kalender_borttagna'
+    __table_args__ = (
+        db.Index('ix_kalender_borttagna_lag_id_raderad', 'lag_id', 'raderad'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    # UID i kalenderflödet, t.ex. "match-12@solvaders-fc"
+    uid = db.Column(db.String(100), nullable=False)
+    lag_id = db.Column(db.Integer, nullable=False)
+    datum = db.Column(db.DateTime, nullable=False)
+    sekvens = db.Column(db.Integer, nullable=False, default=0)
+    raderad = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<KalenderBorttagning {self.uid} för lag {self.lag_id}>'
@@ -0,0 +1,199 @@
+from flask import request, jsonify, current_app, abort
+from sqlalchemy import select, func
+from sqlalchemy.orm import joinedload
+from models import Lag, Match, Träning
+from utils.async_db import async_db
+from utils.pagination import keyset_query, keyset_page, page_args, page_payload, InvalidCursor
+from utils.conditional import (make_etag, not_modified, with_validators, state_columns,
+                               summarize_state, collection_etag)
+from utils.serialization import requested_fields
+from utils.live_hub import live_hub, format_event
+from utils.response_cache import response_cache
+from routes.training_routes import _filter_by_date_range
+
+# Asynkrona varianter av de mest lästa vyerna i lag-, match- och
+# träningsblueprintarna. De används bara i ASGI-läget (asgi.py), som kör dem
+# direkt på event-loopen i stället för i en tråd per request. Svaren är desamma
+# som från de vanliga vyerna: samma payload, ETag och felkoder, och de cachas i
+# samma response_cache.
+
+
+class AsyncViews:
+    """Register över asynkrona vyer, nycklade på den vanliga vyns endpoint"""
+
+    def __init__(self):
+        self.views = {}
+
+    def variant(self, endpoint):
+        def decorator(f):
+            self.views[endpoint] = f
+            return f
+        return decorator
+
+
+async_views = AsyncViews()
+
+
+async def _state(session, statement, model, *related):
+    """collection_state för en select(), som en enda SELECT"""
+    row = (await session.execute(
+        statement.with_only_columns(*state_columns(model, *related)).order_by(None)
+    )).one()
+    return summarize_state(row)
+
+
+async def _paginate(session, statement, columns, cursor=None, limit=20, descending=False, with_total=False):
+    """keyset_paginate för en select()"""
+    total = None
+    if with_total:
+        total = await session.scalar(select(func.count()).select_from(statement.order_by(None).subquery()))
+    rows = (await session.scalars(keyset_query(statement, columns, cursor, limit, descending))).all()
+    return keyset_page(rows, columns, limit, total)
+
+
+def _med_lagnamn(statement):
+    return statement.options(joinedload(Match.hemmalag), joinedload(Match.bortalag))
+
+
+@async_views.variant('lag_routes.get_all_lag')
+@response_cache.cached_async('lag')
+async def get_all_lag():
+    fields = requested_fields(Lag)
+    async with async_db.session() as session:
+        state, last_modified = await _state(session, select(Lag), Lag)
+        etag = collection_etag(Lag, state)
+        unchanged = not_modified(etag, last_modified)
+        if unchanged is not None:
+            return unchanged
+
+        try:
+            page = await _paginate(session, select(Lag), [Lag.id], **page_args())
+        except InvalidCursor:
+            return jsonify({'error': 'Ogiltig cursor'}), 400
+
+    result = Lag.serializer.many(page.items, fields)
+    return with_validators(jsonify(page_payload('lag', result, page)), etag, last_modified), 200
+
+
+@async_views.variant('lag_routes.get_lag')
+@response_cache.cached_async('lag')
+async def get_lag(lag_id):
+    fields = requested_fields(Lag)
+    async with async_db.session() as session:
+        lag = await session.get(Lag, lag_id)
+    if lag is None:
+        abort(404)
+
+    etag = make_etag('lag', lag.id, lag.version, fields)
+    unchanged = not_modified(etag, lag.updated_at)
+    if unchanged is not None:
+        return unchanged
+    return with_validators(jsonify(lag.serialize(fields)), etag, lag.updated_at), 200
+
+
+@async_views.variant('match_routes.get_all_matches')
+@response_cache.cached_async('matcher', 'lag')
+async def get_all_matches():
+    fields = requested_fields(Match)
+    async with async_db.session() as session:
+        state, last_modified = await _state(session, select(Match), Match, Lag)
+        etag = collection_etag(Match, state)
+        unchanged = not_modified(etag, last_modified)
+        if unchanged is not None:
+            return unchanged
+
+        try:
+            page = await _paginate(session, _med_lagnamn(select(Match)), [Match.datum, Match.id], **page_args())
+        except InvalidCursor:
+            return jsonify({'error': 'Ogiltig cursor'}), 400
+
+    result = Match.serializer.many(page.items, fields)
+    return with_validators(jsonify(page_payload('matcher', result, page)), etag, last_modified), 200
+
+
+@async_views.variant('match_routes.get_match')
+@response_cache.cached_async('matcher', 'lag')
+async def get_match(match_id):
+    fields = requested_fields(Match)
+    async with async_db.session() as session:
+        match = await session.get(Match, match_id, options=[joinedload(Match.hemmalag), joinedload(Match.bortalag)])
+    if match is None:
+        abort(404)
+
+    lag = [l for l in (match.hemmalag, match.bortalag) if l is not None]
+    etag = make_etag('matcher', match.id, match.version, fields, *(l.version for l in lag))
+    last_modified = max([match.updated_at] + [l.updated_at for l in lag])
+    unchanged = not_modified(etag, last_modified)
+    if unchanged is not None:
+        return unchanged
+    return with_validators(jsonify(match.serialize(fields)), etag, last_modified), 200
+
+
+@async_views.variant('match_routes.live_match')
+async def live_match(match_id):
+    """Som den vanliga livevyn, men varje klient är en korutin och inte en tråd"""
+    channel = f'match:{match_id}'
+    subscription = live_hub.subscribe_async(channel)
+    initial = live_hub.last(channel)
+    if initial is None:
+        async with async_db.session() as session:
+            match = await session.get(Match, match_id,
+                                      options=[joinedload(Match.hemmalag), joinedload(Match.bortalag)])
+        if match is None:
+            subscription.close()
+            return jsonify({'error': 'Matchen finns inte'}), 404
+        initial = format_event('resultat', current_app.json.dumps(match.serialize()), match.version)
+
+    return current_app.response_class(
+        live_hub.astream(subscription, live_hub.unseen(initial, request.headers.get('Last-Event-ID'))),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@async_views.variant('training_routes.get_training')
+async def get_training(training_id):
+    fields = requested_fields(Träning)
+    async with async_db.session() as session:
+        training = await session.get(Träning, training_id)
+    if training is None:
+        abort(404)
+
+    etag = make_etag('träningar', training.id, training.version, fields)
+    unchanged = not_modified(etag, training.updated_at)
+    if unchanged is not None:
+        return unchanged
+    return with_validators(jsonify({"training": training.serialize(fields)}), etag, training.updated_at), 200
+
+
+@async_views.variant('training_routes.get_team_trainings')
+async def get_team_trainings(lag_id):
+    fields = requested_fields(Träning)
+    async with async_db.session() as session:
+        team = await session.get(Lag, lag_id)
+        if team is None:
+            abort(404)
+
+        statement = _filter_by_date_range(select(Träning).where(Träning.lag_id == lag_id))
+        typ = request.args.get('typ')
+        if typ:
+            statement = statement.where(Träning.typ == typ)
+
+        # Lagets namn ingår i svaret
+        state, last_modified = await _state(session, statement, Träning)
+        etag = make_etag(collection_etag(Träning, state), team.version)
+        last_modified = max(filter(None, [last_modified, team.updated_at]))
+        unchanged = not_modified(etag, last_modified)
+        if unchanged is not None:
+            return unchanged
+
+        descending = request.args.get('sort_order', 'asc').lower() == 'desc'
+        try:
+            page = await _paginate(session, statement, [Träning.datum, Träning.id],
+                                   descending=descending, **page_args())
+        except InvalidCursor:
+            return jsonify({"error": "Invalid cursor parameter"}), 400
+
+    payload = page_payload("trainings", Träning.serializer.many(page.items, fields), page)
+    payload["team"] = team.namn
+    return with_validators(jsonify(payload), etag, last_modified), 200
@@ -1,9 +1,8 @@
 from flask import Blueprint, request, jsonify
-from models import db, User
-from werkzeug.security import check_password_hash
-import jwt
-import datetime
-from config import Config
+from models import db, User, RefreshToken
+from utils.passwords import password_hasher, PasswordHasherBusy
+from utils.token_utils import create_access_token, create_refresh_token, decode_token
+from utils.user_cache import user_cache
 from utils.validators import validate_json
 
 auth_routes = Blueprint('auth_routes', __name__)
@@ -15,19 +14,86 @@ def login():
         data = request.get_json()
         user = User.query.filter_by(email=data['email']).first()
         # Kontrollera att användaren finns och att lösenordet stämmer
-        if not user or not check_password_hash(user.lösenord_hash, data.get('lösenord')):
+        if not user or not user.check_password(data.get('lösenord')):
             return jsonify({"error": "Invalid credentials"}), 401
 
-        # Skapa JWT-token och avkoda om det returneras som bytes
-        token = jwt.encode({
-            'user_id': user.id,
-            'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=24)
-        }, Config.SECRET_KEY, algorithm="HS256")
-        if isinstance(token, bytes):
-            token = token.decode('utf-8')
+        # Uppgradera hashen om metod eller kostnad har ändrats sedan den skapades
+        rehashed = password_hasher.needs_rehash(user.lösenord_hash)
+        if rehashed:
+            user.set_password(data['lösenord'])
 
-        return jsonify({"token": token, "role": user.roll}), 200
+        token = create_access_token(user)
+        refresh_token = create_refresh_token(user)
+        db.session.commit()
+        if rehashed:
+            user_cache.invalidate(user.id)
 
+        return jsonify({"token": token, "refresh_token": refresh_token, "role": user.roll}), 200
+
+    except PasswordHasherBusy:
+        return jsonify({"error": "Servern är hårt belastad, försök igen om en stund"}), 503, {'Retry-After': '1'}
     except Exception as e:
+        db.session.rollback()
         # Logga gärna felet här om du vill
-        return jsonify({"error": f"An error occurred during login: {str(e)}"}), 500
\ No newline at end of file
+        return jsonify({"error": f"An error occurred during login: {str(e)}"}), 500
+
+
+@auth_routes.route('/refresh', methods=['POST'])
+@validate_json(['refresh_token'])
+def refresh():
+    """Byt en refresh-token mot ett nytt tokenpar utan lösenordskontroll"""
+    import jwt
+    try:
+        data = decode_token(request.get_json()['refresh_token'], expected_type='refresh')
+        user_id, jti = data['user_id'], data['jti']
+    except jwt.ExpiredSignatureError:
+        return jsonify({"error": "Refresh-token har löpt ut, logga in igen"}), 401
+    except (jwt.InvalidTokenError, KeyError):
+        return jsonify({"error": "Ogiltig refresh-token"}), 401
+
+    try:
+        # Rotera: ta token i anspråk med en villkorad UPDATE, så att bara ett av
+        # två samtidiga anrop med samma token kan lyckas
+        claimed = db.session.execute(
+            db.update(RefreshToken)
+            .where(RefreshToken.jti == jti, RefreshToken.user_id == user_id, RefreshToken.revoked.is_(False))
+            .values(revoked=True)
+        ).rowcount
+        if claimed != 1:
+            stored = db.session.get(RefreshToken, jti)
+            if stored is None or stored.user_id != user_id:
+                return jsonify({"error": "Ogiltig refresh-token"}), 401
+            # En redan använd token visas igen: återkalla hela användarens kedja
+            RefreshToken.query.filter_by(user_id=user_id, revoked=False).update({'revoked': True})
+            db.session.commit()
+            return jsonify({"error": "Refresh-token har redan använts"}), 401
+
+        user = user_cache.get_user(user_id)
+        if not user or data.get('ver', 0) < (user.token_version or 0):
+            db.session.rollback()
+            return jsonify({"error": "Refresh-token har återkallats"}), 401
+
+        token = create_access_token(user)
+        refresh_token = create_refresh_token(user)
+        db.session.commit()
+
+        return jsonify({"token": token, "refresh_token": refresh_token, "role": user.roll}), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"An error occurred during token refresh: {str(e)}"}), 500
+
+
+@auth_routes.route('/logout', methods=['POST'])
+@validate_json(['refresh_token'])
+def logout():
+    """Återkalla en refresh-token"""
+    import jwt
+    try:
+        data = decode_token(request.get_json()['refresh_token'], expected_type='refresh')
+    except jwt.InvalidTokenError:
+        return jsonify({"error": "Ogiltig refresh-token"}), 401
+
+    RefreshToken.query.filter_by(jti=data.get('jti'), user_id=data.get('user_id')).update({'revoked': True})
+    db.session.commit()
+    return jsonify({"message": "Utloggad"}), 200
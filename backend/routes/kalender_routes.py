@@ -0,0 +1,121 @@
+from flask import Blueprint, request, jsonify, current_app, url_for, stream_with_context
+from models import db, Lag, user_lag
+from utils.auth import token_required, load_current_user
+from utils.token_utils import create_feed_token, decode_token
+from utils.user_cache import user_cache
+from utils.response_cache import response_cache
+from utils.conditional import make_etag, not_modified, with_validators
+from utils.pagination import InvalidCursor
+from utils.ical import (CONTENT_TYPE, feed, feed_state, window_start, sync_token, parse_sync_token)
+
+# Prenumerationsbara iCalendar-flöden. Kalenderappar kan inte skicka en
+# Bearer-token, så flödena autentiseras med en feed-token i URL:en.
+kalender_routes = Blueprint('kalender_routes', __name__)
+
+ALLA_LAG_ROLLER = ('admin', 'tränare', 'superadmin')
+
+
+def _lag_ids(user_id):
+    return sorted(db.session.scalars(db.select(user_lag.c.lag_id).where(user_lag.c.user_id == user_id)))
+
+
+def _feed_user():
+    """Användaren i ?token=, eller None om token saknas, är ogiltig eller återkallad"""
+    token = request.args.get('token')
+    if not token:
+        return None
+    import jwt
+    try:
+        data = decode_token(token, expected_type='feed')
+        user = user_cache.get_user(data['user_id'])
+    except (jwt.InvalidTokenError, KeyError):
+        return None
+    if user is None or data.get('ver', 0) < (user.token_version or 0):
+        return None
+    if not user.feed_secret or data.get('fs') != user.feed_secret:
+        return None
+    return user
+
+
+def _feed_response(lag_ids, name):
+    """
+    Hela flödet, eller bara ändringar med ?sync_token=. Nästa sync-token
+    skickas i headern X-Sync-Token.
+
+    Hela flödet identifieras av en billig sammanfattning av raderna: oförändrat
+    flöde ger 304 mot klientens ETag, och annars återanvänds en tidigare
+    genererad kropp så länge ingen träning eller match har ändrats.
+    """
+    start = window_start(current_app.config['CALENDAR_HISTORY_DAYS'])
+    headers = {'X-Sync-Token': sync_token(lag_ids)}
+
+    since = None
+    if request.args.get('sync_token'):
+        try:
+            since = parse_sync_token(request.args['sync_token'], lag_ids, start)
+        except InvalidCursor:
+            return jsonify({'error': 'Ogiltig sync_token'}), 400
+
+    if since is not None:
+        body = stream_with_context(feed(lag_ids, name, start, since))
+        return current_app.response_class(body, mimetype=CONTENT_TYPE, headers=headers), 200
+
+    state, last_modified = feed_state(lag_ids, start)
+    etag = make_etag('kalender', name, start, ','.join(map(str, lag_ids)), *state)
+    unchanged = not_modified(etag, last_modified)
+    if unchanged is not None:
+        unchanged.headers.update(headers)
+        return unchanged
+
+    key = f'kalender|{etag}'
+    body = response_cache.get(key)
+    if body is None:
+        body = stream_with_context(response_cache.store_stream(
+            key, feed(lag_ids, name, start), current_app.config['CALENDAR_CACHE_TTL']))
+    response = current_app.response_class(body, mimetype=CONTENT_TYPE, headers=headers)
+    return with_validators(response, etag, last_modified), 200
+
+
+@kalender_routes.route('/token', methods=['GET', 'POST'])
+@token_required
+def get_feed_token():
+    """
+    Feed-token och prenumerationsadresser för den inloggade användaren. POST
+    byter token, så att tidigare utdelade adresser slutar fungera.
+    """
+    user = load_current_user()
+    secret = user.feed_secret
+    token = create_feed_token(user, rotate=request.method == 'POST')
+    if user.feed_secret != secret:
+        db.session.commit()
+        user_cache.invalidate(user.id)
+    return jsonify({
+        'token': token,
+        'mina_lag': url_for('kalender_routes.get_user_feed', token=token, _external=True),
+        'lag': [{
+            'lag_id': lag_id,
+            'url': url_for('kalender_routes.get_team_feed', lag_id=lag_id, token=token, _external=True)
+        } for lag_id in _lag_ids(user.id)]
+    }), 200
+
+
+@kalender_routes.route('/mina-lag.ics', methods=['GET'])
+def get_user_feed():
+    """Träningar och matcher för alla lag användaren är med i"""
+    user = _feed_user()
+    if user is None:
+        return jsonify({'error': 'Ogiltig eller saknad token'}), 401
+    return _feed_response(_lag_ids(user.id), f'Solvaders FC – {user.förnamn} {user.efternamn}')
+
+
+@kalender_routes.route('/lag/<int:lag_id>.ics', methods=['GET'])
+def get_team_feed(lag_id):
+    """Ett lags träningar och matcher, för lagets medlemmar och tränare"""
+    user = _feed_user()
+    if user is None:
+        return jsonify({'error': 'Ogiltig eller saknad token'}), 401
+
+    lag = Lag.query.get_or_404(lag_id)
+    if user.roll not in ALLA_LAG_ROLLER and lag_id not in _lag_ids(user.id):
+        return jsonify({'error': 'Åtkomst nekad'}), 403
+    return _feed_response([lag_id], f'Solvaders FC – {lag.namn}')
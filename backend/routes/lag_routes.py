@@ -1,34 +1,107 @@
 from flask import Blueprint, request, jsonify
-from models import db, Lag
-from utils.token_utils import token_required
+from models import db, Lag, Match, Tabellrad, Inbördes
+from sqlalchemy import func, or_, and_
+from utils.auth import token_required
+from utils.pagination import keyset_paginate, page_args, page_payload, InvalidCursor
+from utils.response_cache import response_cache
+from utils.conditional import make_etag, not_modified, with_validators, collection_validators
+from utils.serialization import requested_fields
 
 # Detta är det viktiga - se till att variabeln heter exakt "lag_routes"
 lag_routes = Blueprint('lag_routes', __name__)
 
 
 @lag_routes.route('/', methods=['GET'])
+@response_cache.cached('lag')
 def get_all_lag():
-    """Hämta alla lag"""
-    lag = Lag.query.all()
-    result = []
-    for l in lag:
-        result.append({
-            'id': l.id,
-            'namn': l.namn,
-            'beskrivning': l.beskrivning
-        })
-    return jsonify(result), 200
+    """Hämta lag, paginerade med cursor. ?fields=id,namn begränsar fälten."""
+    fields = requested_fields(Lag)
+    etag, last_modified = collection_validators(Lag.query, Lag)
+    unchanged = not_modified(etag, last_modified)
+    if unchanged is not None:
+        return unchanged
+
+    try:
+        page = keyset_paginate(Lag.query, [Lag.id], **page_args())
+    except InvalidCursor:
+        return jsonify({'error': 'Ogiltig cursor'}), 400
+
+    result = Lag.serializer.many(page.items, fields)
+    return with_validators(jsonify(page_payload('lag', result, page)), etag, last_modified), 200
+
+
+@lag_routes.route('/tabell', methods=['GET'])
+@response_cache.cached('matcher', 'lag')
+def get_tabell():
+    """Ligatabellen, förberäknad när matcher skapas, ändras eller tas bort"""
+    fields = requested_fields(Tabellrad)
+    rows = db.session.execute(
+        db.select(Lag, Tabellrad)
+        .outerjoin(Tabellrad, Tabellrad.lag_id == Lag.id)
+        .order_by(func.coalesce(Tabellrad.poäng, 0).desc(),
+                  func.coalesce(Tabellrad.gjorda - Tabellrad.insläppta, 0).desc(),
+                  func.coalesce(Tabellrad.gjorda, 0).desc(),
+                  Lag.namn)
+    ).all()
+
+    tabell = []
+    for placering, (lag, rad) in enumerate(rows, start=1):
+        if rad is None:
+            # Lag som inte spelat någon match än
+            rad = Tabellrad(lag_id=lag.id, spelade=0, vunna=0, oavgjorda=0, förlorade=0,
+                            gjorda=0, insläppta=0, poäng=0, form='')
+            rad.lag = lag
+        tabell.append({'placering': placering, **rad.serialize(fields)})
+
+    return jsonify({'tabell': tabell}), 200
+
+
+@lag_routes.route('/<int:lag_id>/mot/<int:motstandare_id>', methods=['GET'])
+@response_cache.cached('matcher', 'lag')
+def get_inbordes(lag_id, motstandare_id):
+    """Inbördes möten mellan två lag, sett från det första lagets håll"""
+    if lag_id == motstandare_id:
+        return jsonify({'error': 'Ange två olika lag'}), 400
+    lag = Lag.query.get_or_404(lag_id)
+    motståndare = Lag.query.get_or_404(motstandare_id)
+
+    a, b = sorted((lag_id, motstandare_id))
+    rad = db.session.get(Inbördes, (a, b))
+    vinster, förluster, gjorda, insläppta = (0, 0, 0, 0) if rad is None else (
+        (rad.vinster_a, rad.vinster_b, rad.gjorda_a, rad.gjorda_b) if lag_id == a
+        else (rad.vinster_b, rad.vinster_a, rad.gjorda_b, rad.gjorda_a)
+    )
+
+    senaste = Match.query.filter(or_(
+        and_(Match.hemmalag_id == lag_id, Match.bortalag_id == motstandare_id),
+        and_(Match.hemmalag_id == motstandare_id, Match.bortalag_id == lag_id)
+    )).order_by(Match.datum.desc(), Match.id.desc()).limit(5).all()
+
+    return jsonify({
+        'lag': lag.serialize(['id', 'namn']),
+        'motståndare': motståndare.serialize(['id', 'namn']),
+        'spelade': rad.spelade if rad else 0,
+        'vinster': vinster,
+        'oavgjorda': rad.oavgjorda if rad else 0,
+        'förluster': förluster,
+        'gjorda': gjorda,
+        'insläppta': insläppta,
+        'senaste': Match.serializer.many(senaste)
+    }), 200
 
 
 @lag_routes.route('/<int:lag_id>', methods=['GET'])
+@response_cache.cached('lag')
 def get_lag(lag_id):
     """Hämta ett specifikt lag baserat på ID"""
+    fields = requested_fields(Lag)
     lag = Lag.query.get_or_404(lag_id)
-    return jsonify({
-        'id': lag.id,
-        'namn': lag.namn,
-        'beskrivning': lag.beskrivning
-    }), 200
+    etag = make_etag('lag', lag.id, lag.version, fields)
+    unchanged = not_modified(etag, lag.updated_at)
+    if unchanged is not None:
+        return unchanged
+
+    return with_validators(jsonify(lag.serialize(fields)), etag, lag.updated_at), 200
 
 
 @lag_routes.route('/', methods=['POST'])
@@ -49,14 +122,11 @@ def create_lag():
 
     db.session.add(nytt_lag)
     db.session.commit()
+    response_cache.invalidate('lag')
 
     return jsonify({
         'message': 'Lag skapat',
-        'lag': {
-            'id': nytt_lag.id,
-            'namn': nytt_lag.namn,
-            'beskrivning': nytt_lag.beskrivning
-        }
+        'lag': nytt_lag.serialize()
     }), 201
 
 
@@ -73,14 +143,11 @@ def update_lag(lag_id):
         lag.beskrivning = data['beskrivning']
 
     db.session.commit()
+    response_cache.invalidate('lag')
 
     return jsonify({
         'message': 'Lag uppdaterat',
-        'lag': {
-            'id': lag.id,
-            'namn': lag.namn,
-            'beskrivning': lag.beskrivning
-        }
+        'lag': lag.serialize()
     }), 200
 
 
@@ -92,5 +159,6 @@ def delete_lag(lag_id):
 
     db.session.delete(lag)
     db.session.commit()
+    response_cache.invalidate('lag')
 
     return jsonify({'message': f'Lag med ID {lag_id} har tagits bort'}), 200
\ No newline at end of file
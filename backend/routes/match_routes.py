@@ -1,7 +1,16 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from models import db, Match, Lag
-from utils.token_utils import token_required, roles_required
+from utils.auth import token_required, roles_required
 from utils.validators import validate_json
+from utils.pagination import keyset_paginate, page_args, page_payload, InvalidCursor
+from utils.response_cache import response_cache
+from utils.conditional import make_etag, not_modified, with_validators, collection_validators
+from utils.serialization import requested_fields
+from utils.export import export_response, export_format
+from utils.standings import apply_change, snapshot
+from utils.ical import event_uid, record_removal
+from utils.live_hub import live_hub, format_event
+from sqlalchemy.orm import joinedload
 from datetime import datetime
 
 # VIKTIGT: Variabeln måste heta exakt "match_routes"
@@ -9,66 +18,101 @@ match_routes = Blueprint('match_routes', __name__)
 
 
 @match_routes.route('/', methods=['GET'])
+@response_cache.cached('matcher', 'lag')
 def get_all_matches():
-    """Hämta alla matcher"""
+    """Hämta matcher, sorterade på datum och paginerade med cursor. ?fields= begränsar fälten."""
+    fields = requested_fields(Match)
     try:
-        matches = Match.query.all()
-        result = []
-
-        for match in matches:
-            # Hämta lagnamn
-            hemmalag = Lag.query.get(match.hemmalag_id)
-            bortalag = Lag.query.get(match.bortalag_id)
-
-            result.append({
-                'id': match.id,
-                'hemmalag_id': match.hemmalag_id,
-                'hemmalag_namn': hemmalag.namn if hemmalag else None,
-                'bortalag_id': match.bortalag_id,
-                'bortalag_namn': bortalag.namn if bortalag else None,
-                'datum': match.datum.isoformat() if match.datum else None,
-                'plats': match.plats,
-                'resultat_hemma': match.resultat_hemma,
-                'resultat_borta': match.resultat_borta
-            })
-
-        return jsonify(result), 200
+        # Svaret innehåller lagnamn, så ändrade lag ger också en ny ETag
+        etag, last_modified = collection_validators(Match.query, Match, Lag)
+        unchanged = not_modified(etag, last_modified)
+        if unchanged is not None:
+            return unchanged
+
+        # Lagnamnen hämtas i samma fråga via JOIN i stället för två uppslag per match
+        query = Match.query.options(
+            joinedload(Match.hemmalag),
+            joinedload(Match.bortalag)
+        )
+        page = keyset_paginate(query, [Match.datum, Match.id], **page_args())
+        result = Match.serializer.many(page.items, fields)
+
+        return with_validators(jsonify(page_payload('matcher', result, page)), etag, last_modified), 200
 
+    except InvalidCursor:
+        return jsonify({'error': 'Ogiltig cursor'}), 400
     except Exception as e:
         return jsonify({"error": f"Ett fel inträffade: {str(e)}"}), 500
 
 
+@match_routes.route('/export', methods=['GET'])
+@token_required
+@roles_required(['admin', 'superadmin'])
+def export_matches():
+    """Exportera alla matcher i datumordning som NDJSON eller CSV"""
+    fmt = export_format()
+    fields = requested_fields(Match)
+    query = Match.query.options(
+        joinedload(Match.hemmalag),
+        joinedload(Match.bortalag)
+    ).order_by(Match.datum, Match.id)
+    return export_response(query, Match.serializer, 'matcher', fields, fmt)
+
+
 @match_routes.route('/<int:match_id>', methods=['GET'])
+@response_cache.cached('matcher', 'lag')
 def get_match(match_id):
     """Hämta en specifik match baserat på ID"""
+    fields = requested_fields(Match)
     try:
-        match = Match.query.get_or_404(match_id)
+        match = Match.query.options(
+            joinedload(Match.hemmalag),
+            joinedload(Match.bortalag)
+        ).get_or_404(match_id)
 
-        # Hämta lagnamn
-        hemmalag = Lag.query.get(match.hemmalag_id)
-        bortalag = Lag.query.get(match.bortalag_id)
+        lag = [l for l in (match.hemmalag, match.bortalag) if l is not None]
+        etag = make_etag('matcher', match.id, match.version, fields, *(l.version for l in lag))
+        last_modified = max([match.updated_at] + [l.updated_at for l in lag])
+        unchanged = not_modified(etag, last_modified)
+        if unchanged is not None:
+            return unchanged
 
-        return jsonify({
-            'id': match.id,
-            'hemmalag_id': match.hemmalag_id,
-            'hemmalag_namn': hemmalag.namn if hemmalag else None,
-            'bortalag_id': match.bortalag_id,
-            'bortalag_namn': bortalag.namn if bortalag else None,
-            'datum': match.datum.isoformat() if match.datum else None,
-            'plats': match.plats,
-            'resultat_hemma': match.resultat_hemma,
-            'resultat_borta': match.resultat_borta
-        }), 200
+        return with_validators(jsonify(match.serialize(fields)), etag, last_modified), 200
 
     except Exception as e:
         return jsonify({"error": f"Ett fel inträffade: {str(e)}"}), 500
 
 
+@match_routes.route('/<int:match_id>/live', methods=['GET'])
+def live_match(match_id):
+    """Ställningen i en match som server-sent events, skickas vid varje ändring"""
+    channel = f'match:{match_id}'
+    # Prenumerera före läsningen så att ingen ändring hamnar mellan dem
+    subscription = live_hub.subscribe(channel)
+    initial = live_hub.last(channel)
+    if initial is None:
+        match = Match.query.options(
+            joinedload(Match.hemmalag),
+            joinedload(Match.bortalag)
+        ).get(match_id)
+        if match is None:
+            subscription.close()
+            return jsonify({'error': 'Matchen finns inte'}), 404
+        initial = format_event('resultat', current_app.json.dumps(match.serialize()), match.version)
+
+    # Databassessionen stängs när vyn returnerar, strömmen läser bara från hubben
+    return current_app.response_class(
+        live_hub.stream(subscription, live_hub.unseen(initial, request.headers.get('Last-Event-ID'))),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 @match_routes.route('/', methods=['POST'])
 @token_required
 @roles_required(['admin', 'tränare'])
 @validate_json(['hemmalag_id', 'bortalag_id', 'datum', 'plats'])
-def create_match(current_user):
+def create_match():
     """Skapa en ny match"""
     try:
         data = request.get_json()
@@ -80,6 +124,9 @@ def create_match(current_user):
         if not hemmalag or not bortalag:
             return jsonify({'error': 'Ett eller båda lagen finns inte'}), 400
 
+        if hemmalag.id == bortalag.id:
+            return jsonify({'error': 'Hemmalag och bortalag måste vara olika lag'}), 400
+
         # Konvertera datum-sträng till datetime
         try:
             datum = datetime.fromisoformat(data['datum'].replace('Z', '+00:00'))
@@ -97,19 +144,13 @@ def create_match(current_user):
         )
 
         db.session.add(ny_match)
+        apply_change(None, snapshot(ny_match))
         db.session.commit()
+        response_cache.invalidate('matcher')
 
         return jsonify({
             'message': 'Match skapad',
-            'match': {
-                'id': ny_match.id,
-                'hemmalag_id': ny_match.hemmalag_id,
-                'bortalag_id': ny_match.bortalag_id,
-                'datum': ny_match.datum.isoformat() if ny_match.datum else None,
-                'plats': ny_match.plats,
-                'resultat_hemma': ny_match.resultat_hemma,
-                'resultat_borta': ny_match.resultat_borta
-            }
+            'match': ny_match.serialize()
         }), 201
 
     except Exception as e:
@@ -120,11 +161,12 @@ def create_match(current_user):
 @match_routes.route('/<int:match_id>', methods=['PUT'])
 @token_required
 @roles_required(['admin', 'tränare'])
-def update_match(current_user, match_id):
+def update_match(match_id):
     """Uppdatera en befintlig match"""
     try:
         match = Match.query.get_or_404(match_id)
         data = request.get_json()
+        före = snapshot(match)
 
         # Uppdatera fält om de finns i data
         if 'hemmalag_id' in data:
@@ -139,6 +181,9 @@ def update_match(current_user, match_id):
                 return jsonify({'error': 'Bortalaget finns inte'}), 400
             match.bortalag_id = data['bortalag_id']
 
+        if match.hemmalag_id == match.bortalag_id:
+            return jsonify({'error': 'Hemmalag och bortalag måste vara olika lag'}), 400
+
         if 'datum' in data:
             try:
                 match.datum = datetime.fromisoformat(data['datum'].replace('Z', '+00:00'))
@@ -154,19 +199,19 @@ def update_match(current_user, match_id):
         if 'resultat_borta' in data:
             match.resultat_borta = data['resultat_borta']
 
+        # Lag som inte längre spelar matchen får den som inställd i sin kalender
+        bortbytta = {före.hemmalag_id, före.bortalag_id} - {match.hemmalag_id, match.bortalag_id}
+        if bortbytta:
+            record_removal(event_uid('match', match.id), bortbytta, match.datum, match.version)
+
+        apply_change(före, snapshot(match))
         db.session.commit()
+        response_cache.invalidate('matcher')
+        live_hub.publish(f'match:{match.id}', 'resultat', match.serialize(), match.version)
 
         return jsonify({
             'message': 'Match uppdaterad',
-            'match': {
-                'id': match.id,
-                'hemmalag_id': match.hemmalag_id,
-                'bortalag_id': match.bortalag_id,
-                'datum': match.datum.isoformat() if match.datum else None,
-                'plats': match.plats,
-                'resultat_hemma': match.resultat_hemma,
-                'resultat_borta': match.resultat_borta
-            }
+            'match': match.serialize()
         }), 200
 
     except Exception as e:
@@ -177,13 +222,19 @@ def update_match(current_user, match_id):
 @match_routes.route('/<int:match_id>', methods=['DELETE'])
 @token_required
 @roles_required(['admin'])
-def delete_match(current_user, match_id):
+def delete_match(match_id):
     """Ta bort en match"""
     try:
         match = Match.query.get_or_404(match_id)
 
         db.session.delete(match)
+        record_removal(event_uid('match', match.id), [match.hemmalag_id, match.bortalag_id],
+                       match.datum, match.version)
+        apply_change(snapshot(match), None)
         db.session.commit()
+        response_cache.invalidate('matcher')
+        live_hub.publish(f'match:{match_id}', 'borttagen', {'id': match_id})
+        live_hub.forget(f'match:{match_id}')
 
         return jsonify({'message': f'Match med ID {match_id} har tagits bort'}), 200
 
@@ -0,0 +1,81 @@
+from flask import Blueprint, request, jsonify
+from models import Lag
+from utils.auth import token_required, roles_required
+from utils.validators import validate_date
+
+# Statistik för tränare, beräknad med NumPy över hela säsongshistoriken. utils.analytics
+# (och NumPy) importeras i vyerna, så att appen startar utan att ladda NumPy.
+statistik_routes = Blueprint('statistik_routes', __name__)
+
+TRÄNARROLLER = ['admin', 'tränare', 'superadmin']
+
+
+def _date_range():
+    """[from_date, to_date] ur query-parametrarna (None om de saknas), eller None om något datum är ogiltigt"""
+    dates = []
+    for name in ('from_date', 'to_date'):
+        value = request.args.get(name)
+        valid, parsed = validate_date(value) if value else (True, None)
+        if not valid:
+            return None
+        dates.append(parsed)
+    return dates
+
+
+@statistik_routes.route('/narvaro', methods=['GET'])
+@token_required
+@roles_required(TRÄNARROLLER)
+def get_attendance_rates():
+    """Närvaroandel per spelare och månad för ett lag (?lag_id=)"""
+    lag_id = request.args.get('lag_id', type=int)
+    if lag_id is None:
+        return jsonify({'error': 'lag_id krävs'}), 400
+    dates = _date_range()
+    if dates is None:
+        return jsonify({'error': 'Ogiltigt datum'}), 400
+    from_date, to_date = dates
+    Lag.query.get_or_404(lag_id)
+
+    from utils.analytics import load_attendance, attendance_rates
+    return jsonify({
+        'lag_id': lag_id,
+        'spelare': attendance_rates(load_attendance(lag_id, from_date, to_date))
+    }), 200
+
+
+@statistik_routes.route('/mal', methods=['GET'])
+@token_required
+@roles_required(TRÄNARROLLER)
+def get_rolling_goals():
+    """Mål per match med glidande medelvärde (?lag_id=&fonster=5)"""
+    lag_id = request.args.get('lag_id', type=int)
+    window = request.args.get('fonster', 5, type=int)
+    if not 1 <= window <= 50:
+        return jsonify({'error': 'fonster måste vara mellan 1 och 50'}), 400
+
+    from utils.analytics import load_matches, rolling_goals
+    dates = _date_range()
+    if dates is None:
+        return jsonify({'error': 'Ogiltigt datum'}), 400
+    from_date, to_date = dates
+    matches = load_matches(lag_id, from_date, to_date)
+    return jsonify({
+        'lag_id': lag_id,
+        'fönster': window,
+        **rolling_goals(matches, lag_id, window)
+    }), 200
+
+
+@statistik_routes.route('/hemma-borta', methods=['GET'])
+@token_required
+@roles_required(TRÄNARROLLER)
+def get_home_away_split():
+    """Hemma- och bortafacit per lag, eller för ett lag med ?lag_id="""
+    from utils.analytics import load_matches, home_away_split
+    lag_id = request.args.get('lag_id', type=int)
+    dates = _date_range()
+    if dates is None:
+        return jsonify({'error': 'Ogiltigt datum'}), 400
+    from_date, to_date = dates
+    matches = load_matches(lag_id, from_date, to_date)
+    return jsonify({'lag': home_away_split(matches, lag_id)}), 200
@@ -0,0 +1,25 @@
+from flask import Blueprint, jsonify
+from models import db
+from utils.auth import token_required, roles_required
+from utils.db_pool import pool_stats
+from utils.db_routing import replica_engine
+from utils.user_cache import user_cache
+from utils.response_cache import response_cache
+from utils.live_hub import live_hub
+
+system_routes = Blueprint('system_routes', __name__)
+
+
+@system_routes.route('/pool', methods=['GET'])
+@token_required
+@roles_required(['admin', 'superadmin'])
+def get_pool_stats():
+    """Statistik för databaspoolen och cacharna"""
+    replica = replica_engine()
+    return jsonify({
+        'database': pool_stats(db.engine),
+        'replica': pool_stats(replica) if replica is not None else None,
+        'user_cache': user_cache.stats(),
+        'response_cache': response_cache.stats(),
+        'live': live_hub.stats()
+    }), 200
@@ -1,8 +1,16 @@
 from flask import Blueprint, request, jsonify
-from models import db, Träning, Lag
-from datetime import datetime
-from decorators import token_required, roles_required
+from models import db, Träning, Lag, User, training_attendance, user_lag
+from datetime import datetime, timedelta, timezone
+from bisect import bisect_right
+from utils.auth import token_required, roles_required, current_user
 from utils.validators import validate_json, validate_date  # ✅ Importera validerare
+from utils.pagination import keyset_paginate, page_args, page_payload, InvalidCursor
+from utils.conditional import make_etag, not_modified, with_validators, collection_validators
+from utils.serialization import requested_fields
+from utils.export import export_response, export_format
+from utils.recurrence import parse_rrule, expand, InvalidRule
+from utils.attendance import upsert_attendance, headcount, STATUSES, PRESENT
+from utils.ical import event_uid, record_removal
 import logging
 
 # Create blueprint
@@ -12,13 +20,30 @@ training_routes = Blueprint('training_routes', __name__)
 logger = logging.getLogger(__name__)
 
 
+def _filter_by_date_range(query):
+    """Begränsa en träningsfråga med from_date/to_date från query-parametrarna"""
+    from_date = request.args.get('from_date')
+    if from_date:
+        valid, from_date_obj = validate_date(from_date)
+        if valid:
+            query = query.filter(Träning.datum >= from_date_obj)
+
+    to_date = request.args.get('to_date')
+    if to_date:
+        valid, to_date_obj = validate_date(to_date)
+        if valid:
+            query = query.filter(Träning.datum <= to_date_obj)
+
+    return query
+
+
 # ========== Training Routes ==========
 
 @training_routes.route('/', methods=['POST'])
 @token_required
 @roles_required(['admin', 'tränare', 'superadmin'])
 @validate_json(['lag_id', 'datum', 'typ'])
-def create_training(current_user):
+def create_training():
     try:
         data = request.get_json()
 
@@ -33,8 +58,7 @@ def create_training(current_user):
         new_training = Träning(
             lag_id=data['lag_id'],
             datum=training_date,
-            typ=data['typ'],
-            närvaro=data.get('närvaro', 0)
+            typ=data['typ']
         )
 
         db.session.add(new_training)
@@ -52,9 +76,102 @@ def create_training(current_user):
         return jsonify({"error": "An error occurred while creating the training session"}), 500
 
 
+@training_routes.route('/serie', methods=['POST'])
+@token_required
+@roles_required(['admin', 'tränare', 'superadmin'])
+@validate_json(['lag_id', 'plats', 'start', 'rrule'])
+def create_training_series():
+    """Skapa en återkommande serie träningar, t.ex. två pass i veckan hela säsongen.
+
+    Alla tillfällen kontrolleras mot befintliga träningar för samma lag och
+    plats med en enda intervallfråga och skapas sedan med en bulk-INSERT i
+    samma transaktion.
+    """
+    try:
+        data = request.get_json()
+
+        valid, start = validate_date(data['start'])
+        if not valid:
+            return jsonify({"error": "Ogiltigt datumformat. Använd ISO-format (YYYY-MM-DDTHH:MM:SS)"}), 400
+        # Datum lagras utan tidszon i UTC, som UNTIL i rrule
+        if start.tzinfo is not None:
+            start = start.astimezone(timezone.utc).replace(tzinfo=None)
+
+        try:
+            varaktighet = int(data.get('varaktighet', 90))
+        except (TypeError, ValueError):
+            varaktighet = 0
+        if varaktighet <= 0:
+            return jsonify({"error": "varaktighet måste vara ett positivt antal minuter"}), 400
+
+        try:
+            occurrences = expand(start, parse_rrule(data['rrule']))
+        except InvalidRule as e:
+            return jsonify({"error": f"Ogiltig rrule: {e}"}), 400
+
+        if not occurrences:
+            return jsonify({"error": "Serien innehåller inga tillfällen"}), 400
+
+        team = db.session.get(Lag, data['lag_id'])
+        if not team:
+            return jsonify({"error": f"Team with ID {data['lag_id']} not found"}), 404
+
+        # Två pass krockar om de börjar närmare varandra än passets längd
+        duration = timedelta(minutes=varaktighet)
+        existing = db.session.execute(
+            db.select(Träning.datum, Träning.id)
+            .where(Träning.lag_id == team.id,
+                   Träning.plats == data['plats'],
+                   Träning.datum > occurrences[0] - duration,
+                   Träning.datum < occurrences[-1] + duration)
+            .order_by(Träning.datum)
+        ).all()
+        existing_dates = [row.datum for row in existing]
+
+        conflicts = []
+        free = []
+        for datum in occurrences:
+            index = bisect_right(existing_dates, datum - duration)
+            if index < len(existing) and existing_dates[index] < datum + duration:
+                conflicts.append({"datum": datum.isoformat(), "training_id": existing[index].id})
+            else:
+                free.append(datum)
+
+        if conflicts and not data.get('hoppa_over_konflikter'):
+            return jsonify({
+                "error": "Serien krockar med befintliga träningar",
+                "konflikter": conflicts
+            }), 409
+
+        if free:
+            db.session.execute(db.insert(Träning), [{
+                'lag_id': team.id,
+                'user_id': current_user.id,
+                'datum': datum,
+                'plats': data['plats'],
+                'typ': data.get('typ'),
+                'beskrivning': data.get('beskrivning')
+            } for datum in free])
+            db.session.commit()
+
+        logger.info(f"Training series created: {len(free)} sessions for team {team.namn}")
+        return jsonify({
+            "message": "Training series created successfully",
+            "skapade": len(free),
+            "datum": [datum.isoformat() for datum in free],
+            "konflikter": conflicts
+        }), 201
+
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error creating training series: {str(e)}")
+        return jsonify({"error": "An error occurred while creating the training series"}), 500
+
+
 @training_routes.route('/', methods=['GET'])
 @token_required
-def get_all_trainings(current_user):
+def get_all_trainings():
+    fields = requested_fields(Träning)
     try:
         filters = {}
         lag_id = request.args.get('lag_id')
@@ -70,53 +187,53 @@ def get_all_trainings(current_user):
 
         query = Träning.query.filter_by(**filters)
 
-        from_date = request.args.get('from_date')
-        to_date = request.args.get('to_date')
-
-        if from_date:
-            from_date_obj = validate_date(from_date)
-            if from_date_obj:
-                query = query.filter(Träning.datum >= from_date_obj)
-
-        if to_date:
-            to_date_obj = validate_date(to_date)
-            if to_date_obj:
-                query = query.filter(Träning.datum <= to_date_obj)
-
-        sort_by = request.args.get('sort_by', 'datum')
-        sort_order = request.args.get('sort_order', 'asc')
+        query = _filter_by_date_range(query)
 
-        if sort_by not in ['datum', 'id', 'lag_id', 'typ', 'närvaro']:
-            sort_by = 'datum'
+        etag, last_modified = collection_validators(query, Träning)
+        unchanged = not_modified(etag, last_modified)
+        if unchanged is not None:
+            return unchanged
 
-        if sort_order.lower() == 'desc':
-            query = query.order_by(getattr(Träning, sort_by).desc())
-        else:
-            query = query.order_by(getattr(Träning, sort_by).asc())
+        descending = request.args.get('sort_order', 'asc').lower() == 'desc'
+        page = keyset_paginate(query, [Träning.datum, Träning.id], descending=descending, **page_args())
 
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
-        pagination = query.paginate(page=page, per_page=per_page)
-        trainings = pagination.items
-
-        return jsonify({
-            "trainings": [training.serialize() for training in trainings],
-            "total": pagination.total,
-            "pages": pagination.pages,
-            "current_page": page
-        }), 200
+        payload = page_payload("trainings", Träning.serializer.many(page.items, fields), page)
+        return with_validators(jsonify(payload), etag, last_modified), 200
 
+    except InvalidCursor:
+        return jsonify({"error": "Invalid cursor parameter"}), 400
     except Exception as e:
         logger.error(f"Error retrieving training sessions: {str(e)}")
         return jsonify({"error": "An error occurred while retrieving training sessions"}), 500
 
 
+@training_routes.route('/export', methods=['GET'])
+@token_required
+@roles_required(['admin', 'superadmin'])
+def export_trainings():
+    """Exportera träningar som NDJSON eller CSV, valfritt per lag och datumintervall"""
+    fmt = export_format()
+    fields = requested_fields(Träning)
+    query = Träning.query
+    lag_id = request.args.get('lag_id', type=int)
+    if lag_id:
+        query = query.filter(Träning.lag_id == lag_id)
+    query = _filter_by_date_range(query).order_by(Träning.datum, Träning.id)
+    return export_response(query, Träning.serializer, 'traningar', fields, fmt)
+
+
 @training_routes.route('/<int:training_id>', methods=['GET'])
 @token_required
-def get_training(current_user, training_id):
+def get_training(training_id):
+    fields = requested_fields(Träning)
     try:
         training = Träning.query.get_or_404(training_id)
-        return jsonify({"training": training.serialize()}), 200
+        etag = make_etag('träningar', training.id, training.version, fields)
+        unchanged = not_modified(etag, training.updated_at)
+        if unchanged is not None:
+            return unchanged
+
+        return with_validators(jsonify({"training": training.serialize(fields)}), etag, training.updated_at), 200
     except Exception as e:
         logger.error(f"Error retrieving training session {training_id}: {str(e)}")
         return jsonify({"error": "An error occurred while retrieving the training session"}), 500
@@ -124,49 +241,33 @@ def get_training(current_user, training_id):
 
 @training_routes.route('/lag/<int:lag_id>', methods=['GET'])
 @token_required
-def get_team_trainings(current_user, lag_id):
+def get_team_trainings(lag_id):
+    fields = requested_fields(Träning)
     try:
         team = Lag.query.get_or_404(lag_id)
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
-        query = Träning.query.filter_by(lag_id=lag_id)
-
-        from_date = request.args.get('from_date')
-        to_date = request.args.get('to_date')
-
-        if from_date:
-            from_date_obj = validate_date(from_date)
-            if from_date_obj:
-                query = query.filter(Träning.datum >= from_date_obj)
-
-        if to_date:
-            to_date_obj = validate_date(to_date)
-            if to_date_obj:
-                query = query.filter(Träning.datum <= to_date_obj)
+        query = _filter_by_date_range(Träning.query.filter_by(lag_id=lag_id))
 
         typ = request.args.get('typ')
         if typ:
             query = query.filter(Träning.typ == typ)
 
-        sort_by = request.args.get('sort_by', 'datum')
-        sort_order = request.args.get('sort_order', 'asc')
+        # Lagets namn ingår i svaret
+        etag, last_modified = collection_validators(query, Träning)
+        etag = make_etag(etag, team.version)
+        last_modified = max(filter(None, [last_modified, team.updated_at]))
+        unchanged = not_modified(etag, last_modified)
+        if unchanged is not None:
+            return unchanged
 
-        if sort_order.lower() == 'desc':
-            query = query.order_by(getattr(Träning, sort_by).desc())
-        else:
-            query = query.order_by(getattr(Träning, sort_by).asc())
+        descending = request.args.get('sort_order', 'asc').lower() == 'desc'
+        page = keyset_paginate(query, [Träning.datum, Träning.id], descending=descending, **page_args())
 
-        pagination = query.paginate(page=page, per_page=per_page)
-        trainings = pagination.items
-
-        return jsonify({
-            "team": team.namn,
-            "trainings": [training.serialize() for training in trainings],
-            "total": pagination.total,
-            "pages": pagination.pages,
-            "current_page": page
-        }), 200
+        payload = page_payload("trainings", Träning.serializer.many(page.items, fields), page)
+        payload["team"] = team.namn
+        return with_validators(jsonify(payload), etag, last_modified), 200
 
+    except InvalidCursor:
+        return jsonify({"error": "Invalid cursor parameter"}), 400
     except Exception as e:
         logger.error(f"Error retrieving training sessions for team {lag_id}: {str(e)}")
         return jsonify({"error": "An error occurred while retrieving team training sessions"}), 500
@@ -175,7 +276,7 @@ def get_team_trainings(current_user, lag_id):
 @training_routes.route('/<int:training_id>', methods=['PUT'])
 @token_required
 @roles_required(['admin', 'tränare', 'superadmin'])
-def update_training(current_user, training_id):
+def update_training(training_id):
     try:
         training = Träning.query.get_or_404(training_id)
         data = request.get_json()
@@ -189,13 +290,14 @@ def update_training(current_user, training_id):
         if 'typ' in data:
             training.typ = data['typ']
 
-        if 'närvaro' in data:
-            training.närvaro = data['närvaro']
-
         if 'lag_id' in data:
             team = Lag.query.get(data['lag_id'])
             if not team:
                 return jsonify({"error": f"Team with ID {data['lag_id']} not found"}), 404
+            if team.id != training.lag_id:
+                # Försvinner ur det gamla lagets kalender
+                record_removal(event_uid('traning', training.id), [training.lag_id],
+                               training.datum, training.version)
             training.lag_id = data['lag_id']
 
         db.session.commit()
@@ -215,23 +317,56 @@ def update_training(current_user, training_id):
 @token_required
 @roles_required(['admin', 'tränare', 'superadmin'])
 @validate_json(['närvaro'])
-def record_attendance(current_user, training_id):
+def record_attendance(training_id):
+    """Checka in en hel trupp: {"närvaro": [{"user_id": 1, "status": "närvarande"}, ...]}.
+
+    Ett heltal i listan betyder att spelaren är närvarande. Alla rader sparas
+    med en enda upsert, så en ny inskickning skriver över tidigare status.
+    """
     try:
         training = Träning.query.get_or_404(training_id)
         data = request.get_json()
 
-        try:
-            närvaro = int(data['närvaro'])
-        except ValueError:
-            return jsonify({"error": "Attendance must be a number"}), 400
-
-        training.närvaro = närvaro
+        invalid = jsonify({"error": "närvaro must be a list of user ids or {user_id, status} objects"}), 400
+        if not isinstance(data['närvaro'], list):
+            return invalid
+
+        entries = {}
+        for item in data['närvaro']:
+            if isinstance(item, int) and not isinstance(item, bool):
+                user_id, status = item, PRESENT
+            elif isinstance(item, dict) and isinstance(item.get('user_id'), int):
+                user_id, status = item['user_id'], item.get('status', PRESENT)
+            else:
+                return invalid
+            if status not in STATUSES:
+                return jsonify({"error": f"Invalid status '{status}'", "valid": list(STATUSES)}), 400
+            entries[user_id] = status
+
+        known = set(db.session.scalars(db.select(User.id).where(User.id.in_(entries))))
+        unknown = sorted(set(entries) - known)
+        if unknown:
+            return jsonify({"error": "Unknown users", "user_ids": unknown}), 400
+
+        # Närvaro kan bara registreras för spelare i träningens lag
+        members = set(db.session.scalars(
+            db.select(user_lag.c.user_id)
+            .where(user_lag.c.lag_id == training.lag_id, user_lag.c.user_id.in_(entries))
+        ))
+        outsiders = sorted(set(entries) - members)
+        if outsiders:
+            return jsonify({"error": "Users are not members of the team", "user_ids": outsiders}), 400
+
+        saved = upsert_attendance(training.id, entries.items())
         db.session.commit()
 
-        logger.info(f"Attendance recorded for training session {training.id}: {närvaro}")
+        present = headcount([training.id])[training.id]
+        logger.info(f"Attendance recorded for training session {training.id}: {saved} players")
         return jsonify({
             "message": "Attendance recorded successfully",
-            "training": training.serialize()
+            "training_id": training.id,
+            "saved": saved,
+            "närvarande": present
         }), 200
 
     except Exception as e:
@@ -240,12 +375,43 @@ def record_attendance(current_user, training_id):
         return jsonify({"error": "An error occurred while recording attendance"}), 500
 
 
+@training_routes.route('/<int:training_id>/narvaro', methods=['GET'])
+@token_required
+def get_attendance(training_id):
+    """Närvarolistan för en träning och antal närvarande"""
+    try:
+        training = Träning.query.get_or_404(training_id)
+        rows = db.session.execute(
+            db.select(User.id, User.förnamn, User.efternamn, training_attendance.c.status)
+            .join(training_attendance, training_attendance.c.user_id == User.id)
+            .where(training_attendance.c.training_id == training.id)
+            .order_by(User.efternamn, User.förnamn)
+        ).all()
+
+        return jsonify({
+            "training_id": training.id,
+            "närvarande": sum(1 for row in rows if row.status == PRESENT),
+            "spelare": [{
+                "user_id": row.id,
+                "förnamn": row.förnamn,
+                "efternamn": row.efternamn,
+                "status": row.status
+            } for row in rows]
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Error retrieving attendance for training session {training_id}: {str(e)}")
+        return jsonify({"error": "An error occurred while retrieving attendance"}), 500
+
+
 @training_routes.route('/<int:training_id>', methods=['DELETE'])
 @token_required
 @roles_required(['admin', 'superadmin'])
-def delete_training(current_user, training_id):
+def delete_training(training_id):
     try:
         training = Träning.query.get_or_404(training_id)
+        record_removal(event_uid('traning', training.id), [training.lag_id],
+                       training.datum, training.version)
         db.session.delete(training)
         db.session.commit()
         logger.info(f"Training session deleted: {training_id}")
@@ -1,7 +1,14 @@
 from flask import Blueprint, jsonify, request
 from models import db, User
-from decorators import token_required, roles_required
+from utils.auth import token_required, roles_required, current_user, load_current_user
 from utils.validators import validate_json
+from utils.user_cache import user_cache
+from utils.token_versions import token_versions
+from utils.pagination import keyset_paginate, page_args, page_payload, InvalidCursor
+from utils.user_import import import_users, read_rows
+from utils.serialization import requested_fields
+from utils.export import export_response, export_format
+import io
 import logging
 
 user_routes = Blueprint('user_routes', __name__)
@@ -10,9 +17,13 @@ logger = logging.getLogger(__name__)
 # 🟢 Hämta info om inloggad användare
 @user_routes.route('/me', methods=['GET'])
 @token_required
-def get_current_user(current_user):
+def get_current_user():
+    user = load_current_user()
+    if user is None:
+        return jsonify({"error": "Användaren hittades inte"}), 404
+
     logger.info(f"Användare {current_user.id} hämtade sina uppgifter.")
-    return jsonify(current_user.serialize()), 200
+    return jsonify(user.serialize()), 200
 
 
 # 🟢 Skapa en ny användare (Endast admin)
@@ -20,7 +31,7 @@ def get_current_user(current_user):
 @token_required
 @roles_required(['admin'])
 @validate_json(['namn', 'email', 'lösenord', 'roll'])
-def create_user(current_user):
+def create_user():
     data = request.get_json()
 
     if User.query.filter_by(email=data['email']).first():
@@ -39,24 +50,69 @@ def create_user(current_user):
     return jsonify({"message": "Användare skapad", "user": new_user.serialize()}), 201
 
 
-# 📄 Hämta alla användare (Endast admin)
+# 📥 Massimport av användare från CSV eller JSON (Endast admin)
+@user_routes.route('/bulk', methods=['POST'])
+@token_required
+@roles_required(['admin'])
+def bulk_import_users():
+    if 'fil' in request.files:
+        upload = request.files['fil']
+        stream, mimetype = upload.stream, upload.mimetype
+        filename = upload.filename or ''
+    else:
+        stream, mimetype, filename = io.BufferedReader(request.stream), request.mimetype, ''
+
+    if mimetype in ('application/json', 'application/x-ndjson') or filename.endswith(('.json', '.ndjson')):
+        fmt = 'json'
+    elif mimetype == 'text/csv' or filename.endswith('.csv'):
+        fmt = 'csv'
+    else:
+        return jsonify({"error": "Filen måste vara CSV eller JSON"}), 415
+
+    try:
+        report = import_users(read_rows(io.TextIOWrapper(stream, encoding='utf-8', newline=''), fmt))
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify({"error": f"Filen kunde inte läsas: {e}"}), 400
+
+    logger.info(f"Admin {current_user.id} importerade {report['skapade']} användare, {len(report['fel'])} fel.")
+    return jsonify(report), 200
+
+
+# 📄 Hämta användare sida för sida (Endast admin)
 @user_routes.route('/', methods=['GET'])
 @token_required
 @roles_required(['admin'])
-def get_all_users(current_user):
-    users = User.query.all()
-    logger.info(f"Admin {current_user.id} hämtade alla användare.")
-    return jsonify({"users": [user.serialize() for user in users]}), 200
+def get_all_users():
+    fields = requested_fields(User)
+    try:
+        page = keyset_paginate(User.query, [User.id], **page_args())
+    except InvalidCursor:
+        return jsonify({"error": "Ogiltig cursor"}), 400
+
+    logger.info(f"Admin {current_user.id} hämtade användare.")
+    return jsonify(page_payload("users", User.serializer.many(page.items, fields), page)), 200
+
+
+# 📤 Exportera alla användare som NDJSON eller CSV (Endast admin)
+@user_routes.route('/export', methods=['GET'])
+@token_required
+@roles_required(['admin'])
+def export_users():
+    fmt = export_format()
+    fields = requested_fields(User)
+    logger.info(f"Admin {current_user.id} exporterade användare som {fmt}.")
+    return export_response(User.query.order_by(User.id), User.serializer, 'anvandare', fields, fmt)
 
 
 # 📄 Hämta en specifik användare (Endast admin)
 @user_routes.route('/<int:user_id>', methods=['GET'])
 @token_required
 @roles_required(['admin'])
-def get_user_by_id(current_user, user_id):
+def get_user_by_id(user_id):
+    fields = requested_fields(User)
     user = User.query.get_or_404(user_id)
     logger.info(f"Admin {current_user.id} hämtade användare {user_id}.")
-    return jsonify({"user": user.serialize()}), 200
+    return jsonify({"user": user.serialize(fields)}), 200
 
 
 # 🛠 Uppdatera info om användare (Endast admin)
@@ -64,14 +120,18 @@ def get_user_by_id(current_user, user_id):
 @token_required
 @roles_required(['admin'])
 @validate_json(['namn', 'email', 'roll'])
-def update_user(current_user, user_id):
+def update_user(user_id):
     user = User.query.get_or_404(user_id)
     data = request.get_json()
 
     user.namn = data['namn']
     user.email = data['email']
+    if user.roll != data['roll']:
+        user.token_version += 1
     user.roll = data['roll']
     db.session.commit()
+    user_cache.invalidate(user_id)
+    token_versions.revoke(user_id, user.token_version)
 
     logger.info(f"Admin {current_user.id} uppdaterade användare {user_id}.")
     return jsonify({"message": "Användare uppdaterad", "user": user.serialize()}), 200
@@ -81,14 +141,17 @@ def update_user(current_user, user_id):
 @user_routes.route('/<int:user_id>/password', methods=['PUT'])
 @token_required
 @validate_json(['lösenord'])
-def update_password(current_user, user_id):
+def update_password(user_id):
     user = User.query.get_or_404(user_id)
     if current_user.id != user.id and current_user.roll != "admin":
         return jsonify({"error": "Endast användaren själv eller admin kan ändra lösenord"}), 403
 
     data = request.get_json()
     user.set_password(data['lösenord'])
+    user.token_version += 1
     db.session.commit()
+    user_cache.invalidate(user_id)
+    token_versions.revoke(user_id, user.token_version)
 
     logger.info(f"Lösenord ändrat för användare {user_id} av {current_user.id}.")
     return jsonify({"message": "Lösenord uppdaterat"}), 200
@@ -98,10 +161,12 @@ def update_password(current_user, user_id):
 @user_routes.route('/<int:user_id>', methods=['DELETE'])
 @token_required
 @roles_required(['admin'])
-def delete_user(current_user, user_id):
+def delete_user(user_id):
     user = User.query.get_or_404(user_id)
     db.session.delete(user)
     db.session.commit()
+    user_cache.invalidate(user_id)
+    token_versions.forget(user_id)
 
     logger.info(f"Admin {current_user.id} tog bort användare {user_id}.")
     return jsonify({"message": "Användare borttagen"}), 200
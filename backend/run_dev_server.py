@@ -1,16 +1,23 @@
-from app import app
-
 """
 Detta skript startar utvecklingsservern med debugläge aktiverat.
 Du kan köra den direkt genom:
 python run_dev_server.py
+
+Med SERVER_MODE=asgi (eller --asgi) startas i stället ASGI-läget med uvicorn.
 """
+import sys
+from app import create_app
 
 if __name__ == "__main__":
+    app = create_app()
     print(f"Startar server med databas: {app.config['SQLALCHEMY_DATABASE_URI']}")
     print(f"Besök http://127.0.0.1:5000 för att komma åt API:et")
     print(f"Tillgängliga rutter:")
     for rule in app.url_map.iter_rules():
         print(f"  {rule.endpoint} - {rule.methods} - {rule}")
 
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    if '--asgi' in sys.argv or app.config['SERVER_MODE'] == 'asgi':
+        import uvicorn
+        uvicorn.run('asgi:create_asgi_app', factory=True, host='0.0.0.0', port=5000, reload=True)
+    else:
+        app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
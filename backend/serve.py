@@ -0,0 +1,182 @@
+"""
+Produktionsserver med gunicorn. Appen byggs en gång i mastern innan workers
+forkas (WEB_PRELOAD), och antalet workers och trådar räknas fram från antalet
+CPU:er processen får använda och databaspoolens storlek. Alla val kan skrivas
+över med WEB_*-inställningarna i config.py.
+
+    python serve.py
+
+Med SERVER_MODE=asgi körs asgi.py med uvicorns gunicorn-worker.
+
+Flera workers kräver delade backends: svarscachens generationer och
+SSE-hubben finns annars bara i den process som gjorde ändringen, så andra
+workers skulle servera gamla svar och missa livehändelser. Med
+RESPONSE_CACHE_BACKEND eller LIVE_HUB_BACKEND = "memory" körs därför en enda
+worker, och ett uttryckligt WEB_WORKERS > 1 stoppar starten. Även
+read-your-writes, användarcachen och rate limiting gäller per process.
+
+SSE (/matcher/<id>/live) håller anslutningen öppen så länge klienten lyssnar.
+Kör då SERVER_MODE=asgi eller WEB_WORKER_CLASS=gevent: gthread binder en tråd
+per klient, och sync-workers avbryts efter WEB_TIMEOUT sekunder.
+"""
+import logging
+import os
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+ASGI_WORKER = 'uvicorn.workers.UvicornWorker'
+
+# Backends som bara delas inom en process med värdet "memory"
+PROCESS_LOCAL_BACKENDS = ('RESPONSE_CACHE_BACKEND', 'LIVE_HUB_BACKEND')
+
+
+def cpu_count():
+    """CPU:er som processen får köra på, vilket i en container kan vara färre än maskinens"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # pragma: no cover - finns inte på macOS/Windows
+        return os.cpu_count() or 1
+
+
+def sizing(config, cpus=None):
+    """
+    (workers, trådar per worker) enligt WEB_WORKERS och WEB_THREADS, där 0
+    betyder automatiskt.
+
+    WSGI: 2 × CPU + 1 workers, så att någon alltid kan köra medan andra väntar
+    på databasen. ASGI: en worker per CPU, eftersom event-loopen redan hanterar
+    många anslutningar. Trådarna begränsas av databaspoolen, fler trådar än
+    anslutningar ger bara väntan i poolen.
+
+    Med minnesbackends blir det en worker (se modulens docstring), och
+    RuntimeError om WEB_WORKERS uttryckligen begär fler.
+    """
+    cpus = cpus or cpu_count()
+    asgi = config['SERVER_MODE'] == 'asgi'
+
+    workers = config['WEB_WORKERS'] or min(cpus if asgi else 2 * cpus + 1, config['WEB_MAX_WORKERS'])
+    local = [key for key in PROCESS_LOCAL_BACKENDS if config[key] == 'memory']
+    if workers > 1 and local:
+        if config['WEB_WORKERS']:
+            raise RuntimeError(f"WEB_WORKERS={workers} kräver delade backends, {', '.join(local)} är 'memory'")
+        logger.warning('%s är "memory", startar en enda worker', ', '.join(local))
+        workers = 1
+    if asgi:
+        return workers, 1
+
+    connections = config['DB_POOL_SIZE'] + config['DB_MAX_OVERFLOW']
+    threads = min(config['WEB_THREADS'] or 4, connections)
+    return workers, max(1, threads)
+
+
+def gunicorn_options(config, cpus=None):
+    """Inställningar till gunicorn utifrån appens config"""
+    workers, threads = sizing(config, cpus)
+    worker_class = config['WEB_WORKER_CLASS']
+    if not worker_class:
+        if config['SERVER_MODE'] == 'asgi':
+            worker_class = ASGI_WORKER
+        else:
+            worker_class = 'gthread' if threads > 1 else 'sync'
+
+    return {
+        'bind': config['WEB_BIND'],
+        'workers': workers,
+        'threads': threads,
+        'worker_class': worker_class,
+        'preload_app': config['WEB_PRELOAD'],
+        'timeout': config['WEB_TIMEOUT'],
+        'graceful_timeout': config['WEB_GRACEFUL_TIMEOUT'],
+        'keepalive': config['WEB_KEEPALIVE'],
+        'max_requests': config['WEB_MAX_REQUESTS'],
+        'max_requests_jitter': config['WEB_MAX_REQUESTS_JITTER'],
+        'accesslog': config['WEB_ACCESS_LOG'],
+        'post_fork': _post_fork,
+        'worker_exit': _worker_exit,
+    }
+
+
+def _flask_app(server):
+    """Flask-appen som byggdes i mastern, eller None utan preload"""
+    application = getattr(server.app, 'callable', None)
+    return getattr(application, 'flask_app', application)
+
+
+def reset_after_fork(app):
+    """
+    Släpp resurser som ärvts från mastern: poolade databasanslutningar
+    (close=False, så att masterns egna inte stängs), asynkrona motorer och
+    lösenordspoolen. Allt skapas på nytt i workern vid första användning.
+    """
+    from models import db
+    from utils.db_routing import replica_engine
+    from utils.passwords import password_hasher
+
+    with app.app_context():
+        db.engine.dispose(close=False)
+        replica = replica_engine()
+        if replica is not None:
+            replica.dispose(close=False)
+        app.extensions['async_db'] = {}
+        password_hasher.shutdown()
+
+
+def shutdown_worker(app):
+    """Stäng lösenordspoolen och databasanslutningarna när en worker avslutas"""
+    from models import db
+    from utils.db_routing import replica_engine
+    from utils.passwords import password_hasher
+
+    password_hasher.shutdown()
+    with app.app_context():
+        db.engine.dispose()
+        replica = replica_engine()
+        if replica is not None:
+            replica.dispose()
+
+
+def _post_fork(server, worker):
+    app = _flask_app(server)
+    if app is not None:
+        reset_after_fork(app)
+
+
+def _worker_exit(server, worker):
+    app = getattr(worker, 'wsgi', None)
+    app = getattr(app, 'flask_app', app)
+    if app is not None:
+        shutdown_worker(app)
+
+
+def build_application(config):
+    """Flask-appen, eller ASGI-lagret runt den med SERVER_MODE=asgi"""
+    if config['SERVER_MODE'] == 'asgi':
+        from asgi import create_asgi_app
+        return create_asgi_app()
+    from app import create_app
+    return create_app()
+
+
+def main():
+    from gunicorn.app.base import BaseApplication
+
+    config = {key: getattr(Config, key) for key in dir(Config) if key.isupper()}
+    options = gunicorn_options(config)
+
+    class Server(BaseApplication):
+
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return build_application(config)
+
+    logger.warning('Startar %s med %d workers à %d trådar (%s) på %s', config['SERVER_MODE'],
+                   options['workers'], options['threads'], options['worker_class'], options['bind'])
+    Server().run()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,13 @@
 import pytest
 from app import create_app
-from models import db, User
+from models import db, User, Lag, Match
 from werkzeug.security import generate_password_hash
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from utils.db_routing import replica_engine
 import os
+import shutil
 
 
 @pytest.fixture(scope='function')
@@ -78,4 +83,72 @@ def user_token(client):
         'email': 'user@test.com',
         'lösenord': 'Testpassword1'
     })
-    return response.json['token']
\ No newline at end of file
+    return response.json['token']
+
+@pytest.fixture(scope='function')
+def replica_app(tmp_path):
+    """App med en läsreplika i en egen SQLite-fil"""
+    primary = tmp_path / 'primary.db'
+    replica = tmp_path / 'replica.db'
+    app = create_app(testing=True, config={
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{primary}',
+        'SQLALCHEMY_REPLICA_URI': f'sqlite:///{replica}',
+        'RATELIMIT_ENABLED': False,
+    })
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(förnamn='Admin', efternamn='Testsson', email='admin@test.com',
+                            lösenord='Testpassword1', roll='admin'))
+        db.session.commit()
+        replica_engine().dispose()
+        # Repliken startar som en kopia av primären men har ett eget lag, så att
+        # testet kan se vilken databas en läsning gick till
+        shutil.copyfile(primary, replica)
+        with replica_engine().begin() as conn:
+            conn.execute(Lag.__table__.insert().values(namn='Bara i repliken'))
+    yield app
+    with app.app_context():
+        db.session.remove()
+        replica_engine().dispose()
+
+
+@pytest.fixture(scope='function')
+def count_queries(app):
+    """Räkna SQL-satser som skickas till databasen: `with count_queries() as statements:`"""
+    @contextmanager
+    def counter():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+    return counter
+
+
+@pytest.fixture(scope='function')
+def create_matches(app):
+    """Skapa `antal` matcher mellan lagen "Lag 0" … "Lag <antal>", en i veckan"""
+    def create(antal):
+        with app.app_context():
+            lag = [Lag(namn=f'Lag {i}') for i in range(antal + 1)]
+            db.session.add_all(lag)
+            db.session.flush()
+            start = datetime(2025, 4, 1, 18, 0)
+            for i in range(antal):
+                db.session.add(Match(
+                    hemmalag_id=lag[i].id,
+                    bortalag_id=lag[i + 1].id,
+                    datum=start + timedelta(days=7 * i),
+                    plats='Solvädersvallen'
+                ))
+            db.session.commit()
+
+    return create
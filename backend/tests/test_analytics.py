@@ -0,0 +1,68 @@
+# tests/test_analytics.py
+from datetime import datetime
+
+from models import db, Lag, Match, Träning, User
+from utils.analytics import load_matches, rolling_goals, home_away_split
+from utils.attendance import upsert_attendance
+
+
+def seed(app):
+    with app.app_context():
+        a, b = Lag(namn='A'), Lag(namn='B')
+        db.session.add_all([a, b])
+        db.session.flush()
+        for i, (hemma, borta, mål_h, mål_b) in enumerate([(a, b, 2, 0), (b, a, 1, 1), (a, b, 0, 3)]):
+            db.session.add(Match(hemmalag_id=hemma.id, bortalag_id=borta.id, datum=datetime(2025, 4, 1 + 7 * i),
+                                 plats='Solvädersvallen', resultat_hemma=mål_h, resultat_borta=mål_b))
+        träningar = [Träning(lag_id=a.id, datum=datetime(2025, m, d, 18), plats='Konstgräset')
+                     for m, d in ((9, 2), (9, 9), (10, 7))]
+        db.session.add_all(träningar)
+        db.session.flush()
+        spelare = User.query.filter_by(email='user@test.com').one()
+        upsert_attendance(träningar[0].id, [(spelare.id, 'närvarande')])
+        upsert_attendance(träningar[1].id, [(spelare.id, 'sjuk')])
+        upsert_attendance(träningar[2].id, [(spelare.id, 'närvarande')])
+        db.session.commit()
+        return a.id, b.id, spelare.id
+
+
+def test_rolling_goals_and_home_away_split(app):
+    a, b, _ = seed(app)
+    with app.app_context():
+        matches = load_matches()
+        totals = rolling_goals(matches, window=2)
+        assert totals['gjorda'] == [2, 2, 3]
+        assert totals['snitt_gjorda'] == [2.0, 2.0, 2.5]
+
+        för_a = rolling_goals(load_matches(a), lag_id=a, window=3)
+        assert för_a['gjorda'] == [2, 1, 0]
+        assert för_a['insläppta'] == [0, 1, 3]
+
+        split = {row['lag_id']: row for row in home_away_split(matches)}
+        assert split[a]['hemma'] == {'matcher': 2, 'vunna': 1, 'oavgjorda': 0, 'förlorade': 1,
+                                     'gjorda': 2, 'insläppta': 3, 'poäng_per_match': 1.5}
+        assert split[a]['borta']['oavgjorda'] == 1
+
+
+def test_attendance_rates_endpoint(client, app, admin_token, user_token):
+    a, _, spelare_id = seed(app)
+
+    assert client.get(f'/statistik/narvaro?lag_id={a}',
+                      headers={'Authorization': f'Bearer {user_token}'}).status_code == 403
+
+    response = client.get(f'/statistik/narvaro?lag_id={a}', headers={'Authorization': f'Bearer {admin_token}'})
+    assert response.status_code == 200
+    [spelare] = response.get_json()['spelare']
+    assert spelare['user_id'] == spelare_id
+    assert [(m['månad'], m['pass'], m['närvarande'], m['andel']) for m in spelare['månader']] == [
+        ('2025-09', 2, 1, 0.5), ('2025-10', 1, 1, 1.0)
+    ]
+
+
+def test_invalid_date_is_rejected(client, admin_token):
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    for path in ('/statistik/narvaro?lag_id=1', '/statistik/mal?lag_id=1', '/statistik/hemma-borta'):
+        response = client.get(f'{path}&from_date=2025-13-01' if '?' in path else f'{path}?to_date=igår',
+                              headers=headers)
+        assert response.status_code == 400, path
+        assert response.get_json()['error'] == 'Ogiltigt datum'
@@ -0,0 +1,159 @@
+# tests/test_asgi.py
+import asyncio
+import json
+import threading
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip('asgiref')
+pytest.importorskip('aiosqlite')
+
+from asgi import create_asgi_app
+from models import db, Lag, Match, Träning, User
+from utils.live_hub import live_hub
+from utils.response_cache import response_cache
+from utils.token_utils import create_access_token
+
+
+@pytest.fixture
+def asgi_app(tmp_path):
+    # Fil i stället för :memory:, så att den synkrona och den asynkrona motorn ser samma databas
+    app = create_asgi_app(testing=True, config={'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'asgi.db'}"})
+    with app.flask_app.app_context():
+        db.create_all()
+        p14, p15 = Lag(namn='P14'), Lag(namn='P15')
+        db.session.add_all([p14, p15])
+        db.session.flush()
+        db.session.add(Match(hemmalag_id=p14.id, bortalag_id=p15.id, datum=datetime(2025, 5, 1, 18, 0),
+                             plats='Solvädersvallen'))
+        db.session.add(Träning(lag_id=p14.id, datum=datetime(2025, 5, 2, 18, 0), plats='Konstgräset'))
+        db.session.add(User(förnamn='Tränare', efternamn='Testsson', email='tranare@test.com',
+                            lösenord='Testpassword1', roll='tränare'))
+        db.session.commit()
+    yield app
+    asyncio.run(app._lifespan(*_lifespan_shutdown()))
+
+
+def _lifespan_shutdown():
+    messages = iter([{'type': 'lifespan.shutdown'}])
+
+    async def receive():
+        return next(messages)
+
+    async def send(message):
+        pass
+
+    return receive, send
+
+
+def _scope(path, headers=None):
+    path, _, query = path.partition('?')
+    return {
+        'type': 'http', 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+        'path': path, 'root_path': '', 'query_string': query.encode(),
+        'headers': [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        'server': ('localhost', 80), 'client': ('127.0.0.1', 5000),
+    }
+
+
+async def _get(app, path, headers=None):
+    """Anropa ASGI-appen och returnera (status, headers, kropp)"""
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(_scope(path, headers), receive, send)
+    headers = {k.decode(): v.decode() for k, v in messages[0]['headers']}
+    return messages[0]['status'], headers, b''.join(m.get('body', b'') for m in messages[1:])
+
+
+def test_async_views_match_the_wsgi_responses(asgi_app):
+    client = asgi_app.flask_app.test_client()
+    with asgi_app.flask_app.app_context():
+        token = create_access_token(User.query.filter_by(email='tranare@test.com').one())
+        lag_id = Lag.query.filter_by(namn='P14').one().id
+    auth = {'Authorization': f'Bearer {token}'}
+
+    for path, headers in [('/lag/', {}), (f'/lag/{lag_id}?fields=id,namn', {}), ('/matcher/', {}),
+                          ('/matcher/1', {}), (f'/traningar/lag/{lag_id}', auth)]:
+        status, async_headers, body = asyncio.run(_get(asgi_app, path, headers))
+        expected = client.get(path, headers=headers)
+        assert status == expected.status_code == 200, path
+        assert json.loads(body) == expected.get_json()
+        assert async_headers['etag'] == expected.headers['ETag']
+
+    # Vyerna kördes med den asynkrona motorn, och autentiseringen gäller som vanligt
+    assert 'primary' in asgi_app.flask_app.extensions['async_db']
+    assert asyncio.run(_get(asgi_app, f'/traningar/lag/{lag_id}'))[0] == 401
+    assert asyncio.run(_get(asgi_app, '/lag/999'))[0] == 404
+
+
+def test_async_live_stream_receives_published_scores(asgi_app):
+    client = asgi_app.flask_app.test_client()
+    with asgi_app.flask_app.app_context():
+        token = create_access_token(User.query.filter_by(email='tranare@test.com').one())
+
+    async def scenario():
+        chunks = asyncio.Queue()
+        disconnect = asyncio.Event()
+
+        async def receive():
+            await disconnect.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message.get('body'):
+                await chunks.put(message['body'])
+
+        stream = asyncio.ensure_future(asgi_app(_scope('/matcher/1/live'), receive, send))
+        assert (await chunks.get()).startswith(b'retry:')
+        assert b'"resultat_hemma":null' in (await chunks.get()).replace(b' ', b'')
+        assert live_hub.stats()['prenumeranter'] == 1
+
+        # Skrivningen går genom WSGI-vyn, i en annan tråd än event-loopen
+        await asyncio.to_thread(client.put, '/matcher/1', json={'resultat_hemma': 3, 'resultat_borta': 0},
+                                headers={'Authorization': f'Bearer {token}'})
+        assert b'"resultat_hemma":3' in (await asyncio.wait_for(chunks.get(), 5)).replace(b' ', b'')
+
+        disconnect.set()
+        await asyncio.wait_for(stream, 5)
+        assert live_hub.stats()['prenumeranter'] == 0
+
+    asyncio.run(scenario())
+
+
+def test_async_views_use_the_response_cache(asgi_app):
+    response_cache.enabled = True
+    try:
+        first = asyncio.run(_get(asgi_app, '/lag/'))
+        # Ändringen går förbi invalidate(), så en träff syns som det gamla svaret
+        with asgi_app.flask_app.app_context():
+            db.session.add(Lag(namn='P16'))
+            db.session.commit()
+        hits = response_cache.hits
+        status, headers, body = asyncio.run(_get(asgi_app, '/lag/'))
+        assert (status, headers['etag'], body) == (200, first[1]['etag'], first[2])
+        assert response_cache.hits == hits + 1
+
+        with asgi_app.flask_app.app_context():
+            response_cache.invalidate('lag')
+        assert b'P16' in asyncio.run(_get(asgi_app, '/lag/'))[2]
+    finally:
+        response_cache.enabled = False
+
+
+def test_before_request_hooks_run_off_the_event_loop(asgi_app):
+    threads = []
+    asgi_app.flask_app.before_request(lambda: threads.append(threading.get_ident()))
+
+    async def scenario():
+        await _get(asgi_app, '/lag/')
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(scenario())
+    assert threads and loop_thread not in threads
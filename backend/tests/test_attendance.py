@@ -0,0 +1,66 @@
+# tests/test_attendance.py
+from datetime import datetime
+
+from models import db, Lag, Träning, User
+
+
+def create_training(app):
+    with app.app_context():
+        lag = Lag(namn='P14')
+        lag.medlemmar.extend(User.query.all())
+        db.session.add(lag)
+        db.session.flush()
+        träning = Träning(lag_id=lag.id, datum=datetime(2025, 9, 2, 18, 0), plats='Konstgräset')
+        db.session.add(träning)
+        db.session.commit()
+        return träning.id, [u.id for u in User.query.order_by(User.id)]
+
+
+def test_bulk_check_in_upserts_in_one_statement(client, app, admin_token, count_queries):
+    training_id, (admin_id, user_id) = create_training(app)
+    headers = {'Authorization': f'Bearer {admin_token}'}
+
+    response = client.post(f'/traningar/{training_id}/narvaro', headers=headers, json={
+        'närvaro': [admin_id, {'user_id': user_id, 'status': 'sjuk'}]
+    })
+    assert response.status_code == 200
+    assert response.get_json()['närvarande'] == 1
+
+    # Ny inskickning skriver över statusen i stället för att ge dubbletter
+    with count_queries() as statements:
+        response = client.post(f'/traningar/{training_id}/narvaro', headers=headers, json={
+            'närvaro': [{'user_id': user_id, 'status': 'närvarande'}]
+        })
+    assert response.get_json()['närvarande'] == 2
+    assert len([s for s in statements if 'ON CONFLICT' in s]) == 1
+
+    spelare = client.get(f'/traningar/{training_id}/narvaro', headers=headers).get_json()['spelare']
+    assert sorted(s['status'] for s in spelare) == ['närvarande', 'närvarande']
+
+
+def test_check_in_rejects_unknown_users_and_statuses(client, app, admin_token):
+    training_id, (admin_id, _) = create_training(app)
+    headers = {'Authorization': f'Bearer {admin_token}'}
+
+    response = client.post(f'/traningar/{training_id}/narvaro', headers=headers, json={'närvaro': [9999]})
+    assert response.status_code == 400
+    assert response.get_json()['user_ids'] == [9999]
+
+    response = client.post(f'/traningar/{training_id}/narvaro', headers=headers, json={
+        'närvaro': [{'user_id': admin_id, 'status': 'kanske'}]
+    })
+    assert response.status_code == 400
+
+
+def test_check_in_rejects_players_from_other_teams(client, app, admin_token):
+    training_id, (admin_id, user_id) = create_training(app)
+    with app.app_context():
+        utomstående = User(förnamn='Ulla', efternamn='Annat', email='ulla@test.com', lösenord='Testpassword1')
+        db.session.add(utomstående)
+        db.session.commit()
+        outsider_id = utomstående.id
+
+    response = client.post(f'/traningar/{training_id}/narvaro', headers={'Authorization': f'Bearer {admin_token}'},
+                           json={'närvaro': [user_id, outsider_id]})
+    assert response.status_code == 400
+    assert response.get_json()['user_ids'] == [outsider_id]
@@ -24,4 +24,92 @@ def test_login_success(client, app):
     })
 
     assert response.status_code == 200
-    assert "token" in response.get_json()
\ No newline at end of file
+    assert "token" in response.get_json()
+
+def test_protected_route_requires_token(client):
+    response = client.get("/users/me")
+    assert response.status_code == 401
+
+
+def test_roles_are_checked_before_the_view(client, user_token):
+    response = client.get("/users/", headers={"Authorization": f"Bearer {user_token}"})
+    assert response.status_code == 403
+
+
+def test_route_table_lists_roles_per_endpoint(app):
+    route_roles = app.extensions["auth_routes"]
+    assert route_roles["user_routes.get_current_user"] is None
+    assert route_roles["match_routes.delete_match"] == frozenset(["admin"])
+    assert "lag_routes.get_all_lag" not in route_roles
+
+
+def login_pair(client):
+    response = client.post("/auth/login", json={"email": "user@test.com", "lösenord": "Testpassword1"})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_refresh_issues_new_pair(client):
+    pair = login_pair(client)
+
+    response = client.post("/auth/refresh", json={"refresh_token": pair["refresh_token"]})
+
+    assert response.status_code == 200
+    new_pair = response.get_json()
+    assert new_pair["refresh_token"] != pair["refresh_token"]
+    assert client.get("/users/me", headers={"Authorization": f"Bearer {new_pair['token']}"}).status_code == 200
+
+
+def test_refresh_token_is_not_an_access_token(client):
+    pair = login_pair(client)
+    response = client.get("/users/me", headers={"Authorization": f"Bearer {pair['refresh_token']}"})
+    assert response.status_code == 401
+
+
+def test_reused_refresh_token_revokes_the_chain(client):
+    pair = login_pair(client)
+    rotated = client.post("/auth/refresh", json={"refresh_token": pair["refresh_token"]}).get_json()
+
+    assert client.post("/auth/refresh", json={"refresh_token": pair["refresh_token"]}).status_code == 401
+    assert client.post("/auth/refresh", json={"refresh_token": rotated["refresh_token"]}).status_code == 401
+
+
+def test_concurrent_refreshes_with_the_same_token_yield_one_pair(client, monkeypatch):
+    from utils.user_cache import user_cache
+    pair = login_pair(client)
+    get_user = user_cache.get_user
+    responses = []
+
+    def interleaved(user_id):
+        # Den andra refreshen körs medan den första står mellan kontroll och commit
+        monkeypatch.setattr(user_cache, "get_user", get_user)
+        responses.append(client.post("/auth/refresh", json={"refresh_token": pair["refresh_token"]}))
+        return get_user(user_id)
+
+    monkeypatch.setattr(user_cache, "get_user", interleaved)
+    responses.append(client.post("/auth/refresh", json={"refresh_token": pair["refresh_token"]}))
+
+    assert sorted(r.status_code for r in responses) == [200, 401]
+
+
+def test_prune_removes_expired_and_old_revoked_tokens(app):
+    import datetime
+    from models import RefreshToken
+    from utils.token_utils import prune_refresh_tokens
+
+    now = datetime.datetime.utcnow()
+    with app.app_context():
+        user_id = User.query.filter_by(email="user@test.com").one().id
+        db.session.add_all([
+            RefreshToken(jti="utgangen", user_id=user_id, expires_at=now - datetime.timedelta(days=1)),
+            RefreshToken(jti="gammal", user_id=user_id, expires_at=now + datetime.timedelta(days=9),
+                         revoked=True, created_at=now - datetime.timedelta(days=20)),
+            RefreshToken(jti="nyss-roterad", user_id=user_id, expires_at=now + datetime.timedelta(days=29),
+                         revoked=True, created_at=now - datetime.timedelta(days=1)),
+            RefreshToken(jti="giltig", user_id=user_id, expires_at=now + datetime.timedelta(days=30)),
+        ])
+        db.session.commit()
+
+        assert prune_refresh_tokens(revoked_days=7) == 2
+        db.session.commit()
+        assert sorted(t.jti for t in RefreshToken.query) == ["giltig", "nyss-roterad"]
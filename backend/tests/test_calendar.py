@@ -0,0 +1,143 @@
+# tests/test_calendar.py
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db, Lag, Match, Träning, User, KalenderBorttagning
+from utils.ical import fold, parse_sync_token, window_start
+from utils.pagination import encode_cursor
+from utils.response_cache import response_cache
+
+
+def setup_schedule(app):
+    """Två lag, spelaren med i P14, en träning och en match den kommande veckan"""
+    with app.app_context():
+        p14, p15 = Lag(namn='P14'), Lag(namn='P15')
+        db.session.add_all([p14, p15])
+        db.session.flush()
+        spelare = User.query.filter_by(email='user@test.com').one()
+        p14.medlemmar.append(spelare)
+        nästa_vecka = datetime.utcnow().replace(microsecond=0) + timedelta(days=7)
+        träning = Träning(lag_id=p14.id, datum=nästa_vecka, plats='Konstgräset', typ='Passning')
+        match = Match(hemmalag_id=p14.id, bortalag_id=p15.id, datum=nästa_vecka + timedelta(days=2),
+                      plats='Solvädersvallen')
+        db.session.add_all([träning, match])
+        db.session.commit()
+        return p14.id, p15.id, träning.id, match.id
+
+
+def feed_token(client, token):
+    response = client.get('/kalender/token', headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 200
+    return response.get_json()['token']
+
+
+@pytest.fixture
+def cache_enabled(app):
+    response_cache.enabled = True
+    yield response_cache
+    response_cache.enabled = False
+
+
+def test_user_feed_merges_trainings_and_matches(client, app, user_token):
+    p14, p15, training_id, match_id = setup_schedule(app)
+    token = feed_token(client, user_token)
+
+    response = client.get(f'/kalender/mina-lag.ics?token={token}')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/calendar'
+    body = response.data.decode('utf-8')
+    assert body.startswith('BEGIN:VCALENDAR\r\n') and body.endswith('END:VCALENDAR\r\n')
+    assert f'UID:traning-{training_id}@solvaders-fc' in body
+    assert f'UID:match-{match_id}@solvaders-fc' in body
+    assert 'SUMMARY:Träning P14 – Passning' in body
+
+    # Spelaren är inte med i P15 och får inte dess flöde, och tokens kan inte bytas
+    assert client.get(f'/kalender/lag/{p15}.ics?token={token}').status_code == 403
+    assert client.get(f'/kalender/lag/{p14}.ics?token={user_token}').status_code == 401
+
+
+def test_unchanged_feed_is_cheap(client, app, user_token, cache_enabled, count_queries):
+    setup_schedule(app)
+    url = f'/kalender/mina-lag.ics?token={feed_token(client, user_token)}'
+    first = client.get(url)
+
+    # Cachad kropp: bara sammanfattningsfrågorna körs, inte själva flödet
+    with count_queries() as statements:
+        second = client.get(url)
+    assert second.data == first.data
+    assert not any('JOIN' in s for s in statements)
+
+    assert client.get(url, headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+
+def test_sync_token_returns_changes_and_cancellations(client, app, admin_token, user_token):
+    p14, p15, training_id, match_id = setup_schedule(app)
+    url = f'/kalender/mina-lag.ics?token={feed_token(client, user_token)}'
+    sync_token = client.get(url).headers['X-Sync-Token']
+
+    # Inget har ändrats sedan förra hämtningen (utöver överlappet)
+    with app.app_context():
+        db.session.execute(db.update(Träning).values(updated_at=datetime(2025, 1, 1)))
+        db.session.execute(db.update(Match).values(updated_at=datetime(2025, 1, 1)))
+        db.session.commit()
+    delta = client.get(f'{url}&sync_token={sync_token}').data.decode('utf-8')
+    assert 'BEGIN:VEVENT' not in delta
+
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    assert client.put(f'/matcher/{match_id}', json={'plats': 'Bortaplan'}, headers=headers).status_code == 200
+    assert client.delete(f'/traningar/{training_id}', headers=headers).status_code == 200
+
+    delta = client.get(f'{url}&sync_token={sync_token}').data.decode('utf-8')
+    assert f'UID:match-{match_id}@solvaders-fc' in delta
+    assert 'LOCATION:Bortaplan' in delta
+    assert f'UID:traning-{training_id}@solvaders-fc\r\n' in delta
+    assert 'STATUS:CANCELLED' in delta
+
+    assert client.get(f'{url}&sync_token=trasig').status_code == 400
+
+
+def test_rotating_feed_token_revokes_old_urls(client, app, user_token):
+    setup_schedule(app)
+    old = feed_token(client, user_token)
+    assert feed_token(client, user_token) == old
+    assert client.get(f'/kalender/mina-lag.ics?token={old}').status_code == 200
+
+    response = client.post('/kalender/token', headers={'Authorization': f'Bearer {user_token}'})
+    assert response.status_code == 200
+    new = response.get_json()['token']
+    assert new != old
+    assert client.get(f'/kalender/mina-lag.ics?token={old}').status_code == 401
+    assert client.get(f'/kalender/mina-lag.ics?token={new}').status_code == 200
+    # Vanliga tokens påverkas inte
+    assert client.get('/kalender/token', headers={'Authorization': f'Bearer {user_token}'}).status_code == 200
+
+
+def test_old_removals_are_pruned(runner, app):
+    with app.app_context():
+        days = app.config['CALENDAR_HISTORY_DAYS']
+        db.session.add_all([
+            KalenderBorttagning(uid='traning-1@solvaders-fc', lag_id=1, datum=datetime.utcnow(),
+                                raderad=datetime.utcnow() - timedelta(days=days + 2)),
+            KalenderBorttagning(uid='traning-2@solvaders-fc', lag_id=1, datum=datetime.utcnow(),
+                                raderad=datetime.utcnow()),
+        ])
+        db.session.commit()
+
+    result = runner.invoke(args=['kalender', 'prune'])
+    assert result.exit_code == 0
+    with app.app_context():
+        assert [b.uid for b in KalenderBorttagning.query.all()] == ['traning-2@solvaders-fc']
+
+    # En sync-token äldre än rensningen ger hela flödet i stället för ett delta
+    start = window_start(days)
+    old = encode_cursor([start - timedelta(days=1), '1'])
+    assert parse_sync_token(old, [1], start) is None
+    assert parse_sync_token(encode_cursor([start, '1']), [1], start) == start
+
+
+def test_long_lines_are_folded_on_character_boundaries():
+    line = 'SUMMARY:' + 'å' * 100
+    folded = fold(line)
+    assert all(len(part) <= 75 for part in folded.split(b'\r\n'))
+    assert folded.replace(b'\r\n ', b'').decode('utf-8') == line + '\r\n'
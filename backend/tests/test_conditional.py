@@ -0,0 +1,56 @@
+# tests/test_conditional.py
+from models import db, Lag, Match
+
+
+def test_match_list_answers_304_with_a_single_probe(client, app, create_matches, count_queries):
+    create_matches(3)
+
+    first = client.get('/matcher/')
+    assert first.status_code == 200
+    assert first.headers['ETag']
+    assert first.headers['Last-Modified']
+
+    with count_queries() as statements:
+        again = client.get('/matcher/', headers={'If-None-Match': first.headers['ETag']})
+
+    assert again.status_code == 304
+    assert again.data == b''
+    assert len(statements) == 1
+
+
+def test_match_list_etag_changes_when_team_is_renamed(client, app, create_matches):
+    create_matches(1)
+    etag = client.get('/matcher/').headers['ETag']
+
+    with app.app_context():
+        lag = Lag.query.first()
+        lag.namn = 'Nytt namn'
+        db.session.commit()
+
+    response = client.get('/matcher/', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_match_detail_version_and_conditional_get(client, app, create_matches):
+    create_matches(1)
+    with app.app_context():
+        match_id = Match.query.first().id
+
+    first = client.get(f'/matcher/{match_id}')
+    assert client.get(f'/matcher/{match_id}', headers={
+        'If-None-Match': first.headers['ETag']
+    }).status_code == 304
+    assert client.get(f'/matcher/{match_id}', headers={
+        'If-Modified-Since': first.headers['Last-Modified']
+    }).status_code == 304
+
+    with app.app_context():
+        match = db.session.get(Match, match_id)
+        match.plats = 'Bortaplan'
+        db.session.commit()
+        assert match.version == 2
+
+    response = client.get(f'/matcher/{match_id}', headers={'If-None-Match': first.headers['ETag']})
+    assert response.status_code == 200
+    assert response.get_json()['plats'] == 'Bortaplan'
@@ -0,0 +1,55 @@
+# tests/test_db_pool.py
+import sqlite3
+
+import pytest
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+
+from config import Config
+from utils.db_pool import InstrumentedQueuePool, engine_options
+
+
+def test_engine_options_for_postgres():
+    config = {key: getattr(Config, key) for key in dir(Config) if key.isupper()}
+    config['SQLALCHEMY_DATABASE_URI'] = 'postgresql://sfc@db/solvaders_fc'
+    config['DB_STATEMENT_TIMEOUT_MS'] = 2500
+
+    options = engine_options(config)
+
+    assert options['poolclass'] is InstrumentedQueuePool
+    assert options['pool_size'] == Config.DB_POOL_SIZE
+    assert options['pool_pre_ping'] is True
+    assert options['connect_args'] == {'options': '-c statement_timeout=2500'}
+
+
+def test_engine_options_for_sqlite_skip_pool_sizing():
+    options = engine_options({
+        'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+        'DB_POOL_PRE_PING': True,
+        'DB_POOL_RECYCLE': 60,
+    })
+    assert 'pool_size' not in options
+
+
+def test_pool_stats_endpoint_is_admin_only(client, admin_token, user_token):
+    assert client.get('/system/pool', headers={'Authorization': f'Bearer {user_token}'}).status_code == 403
+
+    response = client.get('/system/pool', headers={'Authorization': f'Bearer {admin_token}'})
+    assert response.status_code == 200
+    assert 'status' in response.get_json()['database']
+
+
+def test_only_pool_timeouts_are_counted_as_timeouts():
+    pool = InstrumentedQueuePool(lambda: sqlite3.connect(':memory:'), pool_size=1, max_overflow=0, timeout=0.01)
+    connection = pool.connect()
+    with pytest.raises(PoolTimeout):
+        pool.connect()
+    connection.close()
+    assert pool.timeouts == 1
+
+    def refused():
+        raise sqlite3.OperationalError('connection refused')
+
+    broken = InstrumentedQueuePool(refused, pool_size=1, max_overflow=0, timeout=0.01)
+    with pytest.raises(sqlite3.OperationalError):
+        broken.connect()
+    assert broken.timeouts == 0
@@ -0,0 +1,51 @@
+# tests/test_export.py
+import csv
+import io
+import json
+
+from models import db, User
+
+
+def test_export_matches_as_ndjson(client, app, admin_token, create_matches):
+    create_matches(3)
+
+    response = client.get('/matcher/export', headers={'Authorization': f'Bearer {admin_token}'})
+
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'application/x-ndjson'
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [row['hemmalag_namn'] for row in rows] == ['Lag 0', 'Lag 1', 'Lag 2']
+
+
+def test_export_users_as_csv_with_selected_fields(client, admin_token):
+    response = client.get('/users/export?format=csv&fields=email,roll',
+                          headers={'Authorization': f'Bearer {admin_token}'})
+
+    assert response.status_code == 200
+    assert 'attachment; filename="anvandare.csv"' == response.headers['Content-Disposition']
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True).lstrip('\ufeff'))))
+    assert rows[0] == ['email', 'roll']
+    assert ['admin@test.com', 'admin'] in rows
+
+
+def test_export_requires_admin(client, user_token):
+    headers = {'Authorization': f'Bearer {user_token}'}
+    assert client.get('/traningar/export', headers=headers).status_code == 403
+
+
+def test_csv_export_neutralizes_formulas(client, app, admin_token):
+    with app.app_context():
+        user = User.query.filter_by(email='user@test.com').one()
+        user.förnamn, user.efternamn = '=HYPERLINK("http://evil.example")', '@SUM(A1)'
+        db.session.commit()
+
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    response = client.get('/users/export?format=csv&fields=email,förnamn,efternamn', headers=headers)
+    rows = list(csv.reader(io.StringIO(response.get_data(as_text=True).lstrip('\ufeff'))))
+    assert ['user@test.com', '\'=HYPERLINK("http://evil.example")', "'@SUM(A1)"] in rows
+
+    # NDJSON lämnas orört
+    response = client.get('/users/export?fields=email,förnamn', headers=headers)
+    assert {'email': 'user@test.com', 'förnamn': '=HYPERLINK("http://evil.example")'} in \
+        [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
@@ -0,0 +1,113 @@
+# tests/test_live.py
+import json
+
+import pytest
+
+from models import Match
+from utils.live_hub import live_hub, HubBackend, MemoryBackend
+
+
+class SharedBackend(MemoryBackend):
+    """Som ett delat backend (t.ex. Redis) som inte sparar senaste meddelandet"""
+
+    def last(self, channel):
+        return HubBackend.last(self, channel)
+
+
+def read_event(chunks):
+    """Nästa event i strömmen som (namn, data), heartbeats och retry hoppas över"""
+    for chunk in chunks:
+        fields = dict(line.split(': ', 1) for line in chunk.decode('utf-8').strip().split('\n'))
+        if 'event' in fields:
+            return fields['event'], json.loads(fields['data'])
+
+
+def test_score_update_is_pushed_to_open_streams(client, app, admin_token, create_matches, count_queries):
+    create_matches(1)
+    with app.app_context():
+        match_id = Match.query.one().id
+
+    response = client.get(f'/matcher/{match_id}/live', buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    chunks = iter(response.response)
+    event, data = read_event(chunks)
+    assert event == 'resultat' and data['resultat_hemma'] is None
+    assert live_hub.stats()['prenumeranter'] == 1
+
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    client.put(f'/matcher/{match_id}', json={'resultat_hemma': 2, 'resultat_borta': 1}, headers=headers)
+
+    # Strömmen läser bara från hubben, inte från databasen
+    with count_queries() as statements:
+        event, data = read_event(chunks)
+    assert (data['resultat_hemma'], data['resultat_borta']) == (2, 1)
+    assert statements == []
+
+    # Nya klienter får senaste ställningen direkt ur hubben
+    with count_queries() as statements:
+        other = client.get(f'/matcher/{match_id}/live', buffered=False)
+        assert read_event(iter(other.response))[1]['resultat_hemma'] == 2
+    assert statements == []
+    other.close()
+
+    response.close()
+    assert live_hub.stats()['prenumeranter'] == 0
+
+
+def test_slow_subscriber_keeps_latest_messages(app):
+    subscription = live_hub.subscribe('match:1')
+    with app.app_context():
+        for goals in range(40):
+            live_hub.publish('match:1', 'resultat', {'resultat_hemma': goals})
+
+    messages = []
+    while (message := subscription.get(timeout=0)) is not None:
+        messages.append(message)
+    subscription.close()
+    assert len(messages) == app.config['LIVE_HUB_QUEUE_SIZE']
+    assert read_event(messages[-1:]) == ('resultat', {'resultat_hemma': 39})
+
+
+def test_live_stream_for_missing_match_is_404(client):
+    assert client.get('/matcher/999/live').status_code == 404
+    assert live_hub.stats()['prenumeranter'] == 0
+
+
+def test_event_ids_are_match_versions(client, app, admin_token, create_matches):
+    create_matches(1)
+    with app.app_context():
+        match = Match.query.one()
+        match_id, version = match.id, match.version
+
+    response = client.get(f'/matcher/{match_id}/live', buffered=False)
+    chunks = iter(response.response)
+    next(chunks)
+    assert next(chunks).startswith(f'id: {version}\n'.encode())
+
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    client.put(f'/matcher/{match_id}', json={'resultat_hemma': 1}, headers=headers)
+    assert next(chunks).startswith(f'id: {version + 1}\n'.encode())
+    response.close()
+
+    # En klient som redan sett versionen får inget initialt meddelande
+    assert live_hub.unseen(live_hub.last(f'match:{match_id}'), str(version + 1)) is None
+
+
+def test_shared_backend_reads_initial_state_from_database(client, app, admin_token, monkeypatch, create_matches, count_queries):
+    create_matches(1)
+    with app.app_context():
+        match_id = Match.query.one().id
+        live_hub.publish(f'match:{match_id}', 'resultat', {'resultat_hemma': 99}, 1)
+    monkeypatch.setattr(live_hub, 'backend', SharedBackend())
+
+    # En annan process kan ha publicerat något nyare, så databasen gäller
+    with count_queries() as statements:
+        response = client.get(f'/matcher/{match_id}/live', buffered=False)
+        assert read_event(iter(response.response))[1]['resultat_hemma'] is None
+    assert statements
+    response.close()
+
+
+def test_hub_backend_is_abstract():
+    with pytest.raises(TypeError):
+        HubBackend()
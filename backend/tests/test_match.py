@@ -0,0 +1,40 @@
+# tests/test_match.py
+from models import Match
+
+
+def test_get_all_matches_includes_team_names(client, app, create_matches):
+    create_matches(2)
+
+    response = client.get('/matcher/')
+
+    assert response.status_code == 200
+    matches = response.get_json()['matcher']
+    assert [m['hemmalag_namn'] for m in matches] == ['Lag 0', 'Lag 1']
+    assert [m['bortalag_namn'] for m in matches] == ['Lag 1', 'Lag 2']
+
+
+def test_get_all_matches_query_count_is_constant(client, app, create_matches, count_queries):
+    create_matches(1)
+    with count_queries() as few:
+        assert client.get('/matcher/').status_code == 200
+
+    create_matches(25)
+    with count_queries() as many:
+        response = client.get('/matcher/?limit=100')
+
+    assert response.status_code == 200
+    assert len(response.get_json()['matcher']) == 26
+    assert len(many) == len(few)
+
+
+def test_get_match_uses_single_query(client, app, create_matches, count_queries):
+    create_matches(1)
+    with app.app_context():
+        match_id = Match.query.first().id
+
+    with count_queries() as statements:
+        response = client.get(f'/matcher/{match_id}')
+
+    assert response.status_code == 200
+    assert response.get_json()['bortalag_namn'] == 'Lag 1'
+    assert len(statements) == 1
@@ -0,0 +1,41 @@
+# tests/test_pagination.py
+from datetime import datetime
+
+import pytest
+
+from models import db, Lag
+from utils.pagination import encode_cursor, decode_cursor, InvalidCursor
+
+
+def test_cursor_roundtrip_keeps_datetime():
+    values = [datetime(2025, 5, 1, 18, 30), 42]
+    assert decode_cursor(encode_cursor(values), 2) == values
+
+
+def test_decode_cursor_rejects_garbage():
+    with pytest.raises(InvalidCursor):
+        decode_cursor('inte-en-cursor', 2)
+
+
+def test_lag_listing_follows_next_cursor(client, app):
+    with app.app_context():
+        db.session.add_all([Lag(namn=f'Lag {i}') for i in range(5)])
+        db.session.commit()
+
+    first = client.get('/lag/?limit=2&include_total=1').get_json()
+    assert [l['namn'] for l in first['lag']] == ['Lag 0', 'Lag 1']
+    assert first['total'] == 5
+
+    namn = [l['namn'] for l in first['lag']]
+    cursor = first['next_cursor']
+    while cursor:
+        page = client.get(f'/lag/?limit=2&cursor={cursor}').get_json()
+        namn.extend(l['namn'] for l in page['lag'])
+        cursor = page['next_cursor']
+
+    assert namn == [f'Lag {i}' for i in range(5)]
+
+
+def test_invalid_cursor_returns_400(client):
+    response = client.get('/matcher/?cursor=%%%')
+    assert response.status_code == 400
@@ -0,0 +1,66 @@
+# tests/test_passwords.py
+import threading
+
+from werkzeug.security import generate_password_hash
+
+from models import db, User
+from utils.passwords import PasswordHasher, PasswordHasherBusy
+
+
+def test_login_upgrades_hash_to_configured_method(client, app):
+    with app.app_context():
+        user = User.query.filter_by(email='user@test.com').first()
+        user.lösenord_hash = generate_password_hash('Testpassword1', 'pbkdf2:sha256:2')
+        db.session.commit()
+
+    response = client.post('/auth/login', json={'email': 'user@test.com', 'lösenord': 'Testpassword1'})
+    assert response.status_code == 200
+
+    with app.app_context():
+        user = User.query.filter_by(email='user@test.com').first()
+        assert user.lösenord_hash.startswith('pbkdf2:sha256:1$')
+        assert user.check_password('Testpassword1')
+
+
+def test_pool_hashes_and_verifies():
+    hasher = PasswordHasher(method='pbkdf2:sha256:1', workers=1, queue_depth=2)
+    try:
+        pwhash = hasher.hash('hemligt')
+        assert hasher.verify(pwhash, 'hemligt')
+        assert not hasher.verify(pwhash, 'fel')
+        assert len(hasher.hash_many(['a', 'b', 'c'])) == 3
+        assert not hasher.needs_rehash(pwhash)
+    finally:
+        hasher.shutdown()
+
+
+def test_hash_many_waits_for_queue_slots():
+    hasher = PasswordHasher(method='pbkdf2:sha256:1', workers=1, queue_depth=1)
+    try:
+        hasher._slots.acquire()  # kön full, t.ex. av inloggningar
+        result = []
+        thread = threading.Thread(target=lambda: result.extend(hasher.hash_many(['a', 'b'])))
+        thread.start()
+        thread.join(0.5)
+        assert thread.is_alive() and not result
+
+        hasher._slots.release()
+        thread.join(10)
+        assert len(result) == 2
+        # Alla platser lämnas tillbaka
+        assert hasher._slots.acquire(blocking=False)
+    finally:
+        hasher.shutdown()
+
+
+def test_busy_hasher_returns_503(client, admin_token, monkeypatch):
+    def busy(self, lösenord):
+        raise PasswordHasherBusy()
+    monkeypatch.setattr(User, 'set_password', busy)
+
+    with client.application.app_context():
+        user_id = User.query.filter_by(email='user@test.com').first().id
+    response = client.put(f'/users/{user_id}/password', json={'lösenord': 'Nyttlösen1'},
+                          headers={'Authorization': f'Bearer {admin_token}'})
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
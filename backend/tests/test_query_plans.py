@@ -0,0 +1,97 @@
+# tests/test_query_plans.py
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from models import db, Lag, Match, Träning
+
+
+def seed(app):
+    with app.app_context():
+        lag = [Lag(namn=f'Lag {i}') for i in range(4)]
+        db.session.add_all(lag)
+        db.session.flush()
+        start = datetime(2025, 4, 1, 18, 0)
+        for i in range(40):
+            db.session.add(Match(hemmalag_id=lag[i % 4].id, bortalag_id=lag[(i + 1) % 4].id,
+                                 datum=start + timedelta(days=i), plats='Solvädersvallen'))
+            db.session.add(Träning(lag_id=lag[i % 4].id, datum=start + timedelta(days=i, hours=1),
+                                   plats='Konstgräset'))
+        db.session.commit()
+        return lag[0].id
+
+
+def capture_selects(app, client, url, headers):
+    with app.app_context():
+        engine = db.engine
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = client.get(url, headers=headers)
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+    assert response.status_code == 200, url
+    return response, statements
+
+
+def sequential_scans(app, statement, parameters):
+    """Returnera de tabeller som läses med full tabellskanning enligt EXPLAIN"""
+    with app.app_context():
+        with db.engine.connect() as conn:
+            if conn.dialect.name == 'postgresql':
+                # Med få rader väljer planeraren alltid seq scan; stäng av den så
+                # att den bara används när inget index kan användas
+                conn.exec_driver_sql('SET enable_seqscan = off')
+                plan = [row[0] for row in conn.exec_driver_sql('EXPLAIN ' + statement, parameters)]
+                return re.findall(r'Seq Scan on "?(\w+)', '\n'.join(plan), re.UNICODE)
+
+            plan = [row[-1] for row in conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)]
+
+    # SQLite läser en tabell i rowid-ordning vid "ORDER BY id LIMIT n" utan
+    # villkor, vilket är en indexläsning. En SCAN som följs av sortering i
+    # minnet, eller en SCAN utan index trots villkor, läser hela tabellen.
+    sorts_in_memory = any('USE TEMP B-TREE' in step for step in plan)
+    filtered = ' WHERE ' in statement.upper()
+    scans = []
+    for step in plan:
+        match = re.match(r'SCAN (\w+)( USING)?', step, re.UNICODE)
+        if match and (sorts_in_memory or (filtered and not match.group(2))):
+            scans.append(match.group(1))
+    return scans
+
+
+@pytest.mark.parametrize('url', [
+    '/lag/?limit=5',
+    '/matcher/?limit=5',
+    '/matcher/{match_id}',
+    '/traningar/?limit=5',
+    '/traningar/?limit=5&sort_order=desc',
+    '/traningar/lag/{lag_id}?limit=5&from_date=2025-04-10T00:00:00',
+    '/users/?limit=5',
+])
+def test_list_queries_use_indexes(client, app, admin_token, url):
+    lag_id = seed(app)
+    with app.app_context():
+        match_id = Match.query.first().id
+    headers = {'Authorization': f'Bearer {admin_token}'}
+
+    url = url.format(lag_id=lag_id, match_id=match_id)
+    response, statements = capture_selects(app, client, url, headers)
+
+    # Andra sidan går via cursorn, dvs. WHERE på sorteringsnyckeln
+    next_cursor = (response.get_json() or {}).get('next_cursor')
+    if next_cursor:
+        separator = '&' if '?' in url else '?'
+        statements += capture_selects(app, client, f'{url}{separator}cursor={next_cursor}', headers)[1]
+
+    assert statements
+    for statement, parameters in statements:
+        assert sequential_scans(app, statement, parameters) == [], statement
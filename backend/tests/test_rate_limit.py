@@ -0,0 +1,58 @@
+# tests/test_rate_limit.py
+import pytest
+
+from app import create_app
+from models import db, User
+from utils.rate_limit import MemoryStore, RateLimitStore, parse_limit
+
+
+def test_token_bucket_refills_over_time():
+    store = MemoryStore()
+    rate, capacity = parse_limit('2/second')
+
+    assert store.consume('k', rate, capacity) == (True, 0)
+    assert store.consume('k', rate, capacity) == (True, 0)
+    allowed, retry_after = store.consume('k', rate, capacity)
+    assert not allowed
+    assert 0 < retry_after <= 0.5
+
+
+def test_store_interface_is_abstract():
+    with pytest.raises(TypeError):
+        RateLimitStore()
+
+
+@pytest.fixture
+def limited_app():
+    app = create_app(testing=True, config={'RATELIMIT_LOGIN': '2/minute', 'TRUSTED_PROXIES': 1})
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(förnamn='Vanlig', efternamn='Användarsson', email='user@test.com',
+                            lösenord='Testpassword1'))
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+def test_login_attempts_are_throttled_with_retry_after(limited_app):
+    client = limited_app.test_client()
+    for _ in range(2):
+        response = client.post('/auth/login', json={'email': 'user@test.com', 'lösenord': 'fel'})
+        assert response.status_code == 401
+
+    response = client.post('/auth/login', json={'email': 'User@test.com ', 'lösenord': 'Testpassword1'})
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+
+
+def test_clients_behind_proxy_get_their_own_bucket(limited_app):
+    client = limited_app.test_client()
+
+    def login(email, ip):
+        return client.post('/auth/login', json={'email': email, 'lösenord': 'fel'},
+                           headers={'X-Forwarded-For': ip}).status_code
+
+    assert [login(f'okand{i}@test.com', '203.0.113.7') for i in range(3)] == [401, 401, 429]
+    assert login('annan@test.com', '198.51.100.2') == 401
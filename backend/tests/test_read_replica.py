@@ -0,0 +1,48 @@
+# tests/test_read_replica.py
+from models import db, User, Lag
+
+
+def test_get_reads_from_replica_until_user_writes(replica_app):
+    client = replica_app.test_client()
+    token = client.post('/auth/login', json={
+        'email': 'admin@test.com', 'lösenord': 'Testpassword1'
+    }).get_json()['token']
+    headers = {'Authorization': f'Bearer {token}'}
+
+    lag = client.get('/lag/', headers=headers).get_json()['lag']
+    assert [l['namn'] for l in lag] == ['Bara i repliken']
+
+    assert client.post('/lag/', json={'namn': 'Nytt lag'}, headers=headers).status_code == 201
+
+    # Direkt efter skrivningen läser samma användare från primären
+    lag = client.get('/lag/', headers=headers).get_json()['lag']
+    assert [l['namn'] for l in lag] == ['Nytt lag']
+
+
+def test_writer_key_decodes_token_once_per_request(replica_app, monkeypatch):
+    import utils.token_utils
+    from utils.db_routing import writer_key
+
+    with replica_app.app_context():
+        token = utils.token_utils.create_access_token(User.query.filter_by(email='admin@test.com').one())
+
+    calls = []
+    decode = utils.token_utils.decode_token
+    monkeypatch.setattr(utils.token_utils, 'decode_token', lambda *a, **kw: calls.append(1) or decode(*a, **kw))
+    with replica_app.test_request_context('/lag/', headers={'Authorization': f'Bearer {token}'}):
+        assert writer_key() == writer_key() == 'user:1'
+    assert len(calls) == 1
+
+
+def test_second_commit_in_a_request_records_the_writer(replica_app):
+    from flask import g
+    from utils.db_routing import read_your_writes
+
+    with replica_app.test_request_context('/lag/', method='POST'):
+        g.current_user = User.query.filter_by(email='admin@test.com').one()
+        db.session.add(Lag(namn='Första'))
+        db.session.commit()
+        # current_user är nu utgången, after_commit får inte försöka ladda om den
+        db.session.add(Lag(namn='Andra'))
+        db.session.commit()
+        assert read_your_writes.is_recent(f'user:{g.current_user.id}')
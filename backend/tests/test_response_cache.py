@@ -0,0 +1,68 @@
+# tests/test_response_cache.py
+import pytest
+
+from models import Lag
+from utils.response_cache import CacheBackend, response_cache
+
+
+@pytest.fixture
+def cache_enabled(app):
+    response_cache.enabled = True
+    yield response_cache
+    response_cache.enabled = False
+
+
+def test_second_request_is_served_without_queries(client, app, cache_enabled, create_matches, count_queries):
+    create_matches(2)
+    first = client.get('/matcher/')
+
+    with count_queries() as statements:
+        second = client.get('/matcher/')
+
+    assert second.status_code == 200
+    assert second.data == first.data
+    assert second.headers['ETag'] == first.headers['ETag']
+    assert statements == []
+
+    # Samma ETag besvaras med 304 direkt från cachen
+    assert client.get('/matcher/', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+
+def test_writes_invalidate_cached_responses(client, app, admin_token, cache_enabled, create_matches):
+    create_matches(1)
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    assert len(client.get('/lag/').get_json()['lag']) == 2
+    client.get('/matcher/')
+
+    assert client.post('/lag/', json={'namn': 'Nytt lag'}, headers=headers).status_code == 201
+    assert len(client.get('/lag/').get_json()['lag']) == 3
+
+    # Lagnamnen ingår i matchsvaren, så ändrade lag ogiltigförklarar dem också
+    with app.app_context():
+        lag_id = Lag.query.order_by(Lag.id).first().id
+    assert client.put(f'/lag/{lag_id}', json={'namn': 'Omdöpt'}, headers=headers).status_code == 200
+    assert client.get('/matcher/').get_json()['matcher'][0]['hemmalag_namn'] == 'Omdöpt'
+
+
+def test_cache_misses_are_filled_from_the_primary(replica_app):
+    response_cache.enabled = True
+    try:
+        admin = replica_app.test_client()
+        token = admin.post('/auth/login', json={
+            'email': 'admin@test.com', 'lösenord': 'Testpassword1'
+        }).get_json()['token']
+        assert admin.post('/lag/', json={'namn': 'Nytt lag'},
+                          headers={'Authorization': f'Bearer {token}'}).status_code == 201
+
+        # En annan klient missar cachen direkt efter skrivningen; repliken ligger efter
+        anonymous = replica_app.test_client()
+        anonymous.environ_base['REMOTE_ADDR'] = '198.51.100.2'
+        for _ in range(2):
+            assert [l['namn'] for l in anonymous.get('/lag/').get_json()['lag']] == ['Nytt lag']
+    finally:
+        response_cache.enabled = False
+
+
+def test_backend_interface_is_abstract():
+    with pytest.raises(TypeError):
+        CacheBackend()
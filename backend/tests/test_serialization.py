@@ -0,0 +1,41 @@
+# tests/test_serialization.py
+from app import create_app
+from models import db, Match
+from utils.json_provider import OrjsonProvider, Utf8JSONProvider
+
+
+def test_fields_parameter_limits_list_response(client, app, create_matches):
+    create_matches(2)
+
+    response = client.get('/matcher/?fields=id,hemmalag_namn,datum')
+
+    assert response.status_code == 200
+    match = response.get_json()['matcher'][0]
+    assert list(match) == ['id', 'hemmalag_namn', 'datum']
+    assert match['datum'] == '2025-04-01T18:00:00'
+
+
+def test_unknown_field_is_rejected(client):
+    response = client.get('/lag/?fields=id,lösenord')
+    assert response.status_code == 400
+    assert 'lösenord' in response.get_json()['message']
+
+
+def test_serializer_matches_model_columns(app, create_matches):
+    create_matches(1)
+    with app.app_context():
+        match = db.session.get(Match, Match.query.first().id)
+        data = match.serialize()
+        assert data['hemmalag_namn'] == 'Lag 0'
+        assert data['resultat_hemma'] is None
+        assert match.serialize(('plats',)) == {'plats': 'Solvädersvallen'}
+
+
+def test_json_is_utf8_without_escapes():
+    for provider in ('auto', 'std'):
+        app = create_app(testing=True, config={'JSON_PROVIDER': provider})
+        assert isinstance(app.json, (OrjsonProvider, Utf8JSONProvider))
+        with app.app_context():
+            body = app.json.response({'förnamn': 'Åsa'}).get_data()
+        assert 'förnamn'.encode('utf-8') in body
+        assert app.json.loads(body) == {'förnamn': 'Åsa'}
@@ -0,0 +1,54 @@
+# tests/test_serve.py
+import pytest
+
+from config import Config
+from models import db
+from serve import sizing, gunicorn_options, reset_after_fork
+from utils.passwords import password_hasher
+
+
+def settings(**overrides):
+    config = {key: getattr(Config, key) for key in dir(Config) if key.isupper()}
+    # Delade backends, så att flera workers är tillåtna
+    config.update(RESPONSE_CACHE_BACKEND='utils.redis_cache:RedisBackend', LIVE_HUB_BACKEND='utils.redis_hub:RedisHub')
+    config.update(overrides)
+    return config
+
+
+def test_workers_and_threads_follow_cpus_and_pool():
+    assert sizing(settings(SERVER_MODE='wsgi'), cpus=4) == (9, 4)
+    assert sizing(settings(SERVER_MODE='asgi'), cpus=4) == (4, 1)
+    # Taket för workers och databaspoolen begränsar, uttryckliga värden gäller
+    assert sizing(settings(SERVER_MODE='wsgi', WEB_MAX_WORKERS=6), cpus=8)[0] == 6
+    assert sizing(settings(SERVER_MODE='wsgi', WEB_THREADS=50, DB_POOL_SIZE=5, DB_MAX_OVERFLOW=2), cpus=1)[1] == 7
+    assert sizing(settings(SERVER_MODE='wsgi', WEB_WORKERS=3, WEB_THREADS=2), cpus=8) == (3, 2)
+
+
+def test_memory_backends_limit_to_one_worker():
+    assert sizing(settings(SERVER_MODE='wsgi', RESPONSE_CACHE_BACKEND='memory'), cpus=4) == (1, 4)
+    assert sizing(settings(SERVER_MODE='asgi', LIVE_HUB_BACKEND='memory'), cpus=4) == (1, 1)
+    assert sizing(settings(SERVER_MODE='wsgi', WEB_WORKERS=1, LIVE_HUB_BACKEND='memory'), cpus=4)[0] == 1
+
+
+def test_explicit_workers_with_memory_backends_refuse_to_start():
+    with pytest.raises(RuntimeError, match='LIVE_HUB_BACKEND'):
+        gunicorn_options(settings(SERVER_MODE='wsgi', WEB_WORKERS=4, LIVE_HUB_BACKEND='memory'))
+
+
+def test_gunicorn_options_pick_worker_class():
+    options = gunicorn_options(settings(SERVER_MODE='wsgi'), cpus=2)
+    assert options['worker_class'] == 'gthread' and options['preload_app'] is True
+    assert gunicorn_options(settings(SERVER_MODE='wsgi', WEB_THREADS=1), cpus=2)['worker_class'] == 'sync'
+    assert gunicorn_options(settings(SERVER_MODE='asgi'), cpus=2)['worker_class'] == 'uvicorn.workers.UvicornWorker'
+
+
+def test_reset_after_fork_drops_inherited_connections(app):
+    with app.app_context():
+        db.session.execute(db.text('SELECT 1'))
+        db.session.remove()
+    app.extensions['async_db'] = {'primary': object()}
+
+    reset_after_fork(app)
+
+    assert app.extensions['async_db'] == {}
+    assert password_hasher._pool is None
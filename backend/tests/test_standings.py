@@ -0,0 +1,67 @@
+# tests/test_standings.py
+from models import db, Lag, Tabellrad
+from utils.standings import rebuild
+
+
+def setup_lag(app, *namn):
+    with app.app_context():
+        lag = [Lag(namn=n) for n in namn]
+        db.session.add_all(lag)
+        db.session.commit()
+        return [l.id for l in lag]
+
+
+def post_match(client, headers, hemma, borta, datum, resultat=(None, None)):
+    response = client.post('/matcher/', headers=headers, json={
+        'hemmalag_id': hemma, 'bortalag_id': borta, 'datum': datum, 'plats': 'Solvädersvallen',
+        'resultat_hemma': resultat[0], 'resultat_borta': resultat[1]
+    })
+    assert response.status_code == 201
+    return response.get_json()['match']['id']
+
+
+def tabell_snapshot(app):
+    with app.app_context():
+        return {r.lag_id: (r.spelade, r.poäng, r.gjorda, r.insläppta, r.form) for r in Tabellrad.query}
+
+
+def test_table_is_maintained_by_match_writes(client, app, admin_token):
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    sfc, ifk, bk = setup_lag(app, 'Solvaders FC', 'IFK', 'BK')
+
+    post_match(client, headers, sfc, ifk, '2025-04-05T15:00:00', (3, 1))
+    post_match(client, headers, ifk, bk, '2025-04-12T15:00:00', (2, 2))
+    match_id = post_match(client, headers, bk, sfc, '2025-04-19T15:00:00')
+
+    tabell = client.get('/lag/tabell').get_json()['tabell']
+    assert [(r['lag_namn'], r['poäng'], r['målskillnad']) for r in tabell] == [
+        ('Solvaders FC', 3, 2), ('BK', 1, 0), ('IFK', 1, -2)
+    ]
+
+    # Resultatet sätts i efterhand och ändras sedan
+    assert client.put(f'/matcher/{match_id}', headers=headers,
+                      json={'resultat_hemma': 1, 'resultat_borta': 0}).status_code == 200
+    assert client.put(f'/matcher/{match_id}', headers=headers,
+                      json={'resultat_hemma': 0, 'resultat_borta': 0}).status_code == 200
+    rader = {r['lag_namn']: r for r in client.get('/lag/tabell').get_json()['tabell']}
+    assert rader['Solvaders FC']['form'] == 'OV'
+    assert rader['BK']['poäng'] == 2
+
+    inbördes = client.get(f'/lag/{sfc}/mot/{bk}').get_json()
+    assert (inbördes['spelade'], inbördes['oavgjorda'], inbördes['vinster']) == (1, 1, 0)
+
+    # Inkrementell uppdatering och ombyggnad ger samma tabell
+    incremental = tabell_snapshot(app)
+    with app.app_context():
+        rebuild()
+        db.session.commit()
+    assert tabell_snapshot(app) == incremental
+
+    assert client.delete(f'/matcher/{match_id}', headers=headers).status_code == 200
+    assert tabell_snapshot(app)[bk] == (1, 1, 2, 2, 'O')
+
+
+def test_rebuild_cli(runner, app):
+    setup_lag(app, 'Solvaders FC')
+    result = runner.invoke(args=['tabell', 'rebuild'])
+    assert 'ombyggd för 1 lag' in result.output
@@ -0,0 +1,47 @@
+# tests/test_startup.py
+import os
+import subprocess
+import sys
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Summan av importtiderna (python -X importtime) för create_app, som multipel
+# av `import flask` mätt i samma körning så att maskinens hastighet tar ut sig.
+# Ligger kring 2,7; alembic, NumPy och PyJWT skulle ensamma lägga till ett par
+# hundra ms, alltså ungefär en flask-import till.
+IMPORT_BUDGET = 4
+
+# Laddas först när de behövs: `flask db`, /statistik, tokenhantering och ASGI-läget
+LAZY_MODULES = ['alembic', 'flask_migrate', 'numpy', 'jwt', 'asgiref', 'uvicorn', 'gunicorn']
+
+
+def run(code, *flags):
+    env = {**os.environ, 'TEST_DATABASE_URL': 'sqlite://', 'PYTHONDONTWRITEBYTECODE': '1'}
+    return subprocess.run([sys.executable, *flags, '-c', code], cwd=BACKEND, env=env,
+                          capture_output=True, text=True, check=True)
+
+
+def import_time_ms(code):
+    stderr = run(code, '-X', 'importtime').stderr
+    return sum(int(line.split('|')[0].split(':')[1]) for line in stderr.splitlines()
+               if line.startswith('import time:') and 'self' not in line) / 1000
+
+
+def test_importing_app_builds_nothing():
+    out = run('import sys, app; print(sorted(m for m in sys.modules if m.startswith("routes")))').stdout
+    assert out.strip() == '[]'
+    assert not hasattr(__import__('app'), 'app')
+
+
+def test_create_app_defers_heavy_imports():
+    out = run('import sys; from app import create_app; create_app(testing=True); '
+              f'print(sorted(m for m in {LAZY_MODULES!r} if m in sys.modules))').stdout
+    assert out.strip() == '[]'
+
+
+def test_import_time_budget():
+    # Bästa av tre, så att en tillfälligt belastad maskin inte fäller testet
+    flask = min(import_time_ms('import flask') for _ in range(3))
+    best = min(import_time_ms('from app import create_app; create_app(testing=True)') for _ in range(3))
+    assert best < IMPORT_BUDGET * flask, \
+        f'create_app importerar för {best:.0f} ms, {best / flask:.1f} gånger flask (budget {IMPORT_BUDGET})'
@@ -0,0 +1,79 @@
+# tests/test_token_claims.py
+import pytest
+
+from models import db, User
+from utils.token_versions import TokenVersionMap
+
+
+@pytest.fixture
+def claims_app(app):
+    app.config['JWT_CLAIMS_IN_TOKEN'] = True
+    return app
+
+
+def login(client, email):
+    response = client.post('/auth/login', json={'email': email, 'lösenord': 'Testpassword1'})
+    return {'Authorization': f"Bearer {response.json['token']}"}
+
+
+def test_claims_token_authorizes_without_users_table(claims_app, client, count_queries):
+    headers = login(client, 'admin@test.com')
+    assert client.get('/matcher/', headers=headers).status_code == 200
+    # Första requesten läser in versionskartan, därefter ska users inte läsas
+    assert client.delete('/matcher/999', headers=headers).status_code != 401
+
+    with count_queries() as statements:
+        response = client.delete('/matcher/999', headers=headers)
+
+    assert response.status_code != 401
+    assert not [s for s in statements if 'users' in s]
+
+
+def test_role_change_revokes_claims_token(claims_app, client):
+    admin_headers = login(client, 'admin@test.com')
+    user_headers = login(client, 'user@test.com')
+    assert client.get('/traningar/', headers=user_headers).status_code == 200
+
+    with claims_app.app_context():
+        user_id = User.query.filter_by(email='user@test.com').first().id
+
+    response = client.put(f'/users/{user_id}', headers=admin_headers, json={
+        'namn': 'Vanlig Användarsson',
+        'email': 'user@test.com',
+        'roll': 'tränare'
+    })
+    assert response.status_code == 200
+
+    assert client.get('/traningar/', headers=user_headers).status_code == 401
+    assert client.get('/traningar/', headers=login(client, 'user@test.com')).status_code == 200
+
+
+def test_deleting_the_newest_user_keeps_its_tokens_revoked(app):
+    with app.app_context():
+        user = User.query.filter_by(email='user@test.com').one()
+        user_id = user.id
+        versions = TokenVersionMap()
+        assert versions.is_valid(user_id, 0)
+
+        # Borttagen i en annan process, den här får bara veta det vid nästa inläsning
+        db.session.delete(user)
+        db.session.commit()
+        versions.refresh()
+        assert not versions.is_valid(user_id, 0)
+
+
+def test_only_one_caller_reloads_a_stale_map(app, monkeypatch):
+    with app.app_context():
+        versions = TokenVersionMap(refresh_interval=0)
+        versions.refresh()
+        user_id = User.query.filter_by(email='user@test.com').one().id
+        calls = []
+        monkeypatch.setattr(versions, 'refresh', lambda: calls.append(1))
+
+        # En annan request läser redan om kartan
+        with versions._refresh_lock:
+            assert versions.is_valid(user_id, 0)
+        assert calls == []
+
+        versions.is_valid(user_id, 0)
+        assert calls == [1]
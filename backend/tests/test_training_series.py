@@ -0,0 +1,69 @@
+# tests/test_training_series.py
+from datetime import datetime
+
+from models import db, Lag, Träning
+from utils.recurrence import parse_rrule, expand
+
+
+def test_weekly_rule_expands_on_given_weekdays():
+    rule = parse_rrule('FREQ=WEEKLY;BYDAY=MO,TH;COUNT=4')
+    occurrences = expand(datetime(2025, 8, 5, 18, 0), rule)  # en tisdag
+
+    assert occurrences == [
+        datetime(2025, 8, 7, 18, 0),
+        datetime(2025, 8, 11, 18, 0),
+        datetime(2025, 8, 14, 18, 0),
+        datetime(2025, 8, 18, 18, 0),
+    ]
+
+
+def test_series_is_created_and_conflicts_are_detected(client, app, admin_token):
+    with app.app_context():
+        lag = Lag(namn='F12')
+        db.session.add(lag)
+        db.session.flush()
+        db.session.add(Träning(lag_id=lag.id, datum=datetime(2025, 8, 14, 18, 30), plats='Konstgräset'))
+        db.session.commit()
+        lag_id = lag.id
+
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    serie = {
+        'lag_id': lag_id,
+        'plats': 'Konstgräset',
+        'start': '2025-08-04T18:00:00',
+        'rrule': 'FREQ=WEEKLY;BYDAY=MO,TH;UNTIL=20250831'
+    }
+
+    response = client.post('/traningar/serie', headers=headers, json=serie)
+    assert response.status_code == 409
+    assert [k['datum'] for k in response.get_json()['konflikter']] == ['2025-08-14T18:00:00']
+
+    response = client.post('/traningar/serie', headers=headers, json={**serie, 'hoppa_over_konflikter': True})
+    assert response.status_code == 201
+    assert response.get_json()['skapade'] == 7
+
+    with app.app_context():
+        assert Träning.query.filter_by(lag_id=lag_id).count() == 8
+
+
+def test_series_rejects_bad_duration_and_normalizes_time_zones(client, app, admin_token):
+    with app.app_context():
+        lag = Lag(namn='F13')
+        db.session.add(lag)
+        db.session.commit()
+        lag_id = lag.id
+
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    serie = {'lag_id': lag_id, 'plats': 'Konstgräset', 'start': '2025-08-04T18:00:00+02:00',
+             'rrule': 'FREQ=WEEKLY;COUNT=2'}
+
+    response = client.post('/traningar/serie', headers=headers, json={**serie, 'varaktighet': 'lång'})
+    assert response.status_code == 400
+
+    response = client.post('/traningar/serie', headers=headers, json=serie)
+    assert response.status_code == 201
+    assert response.get_json()['datum'] == ['2025-08-04T16:00:00', '2025-08-11T16:00:00']
+
+    response = client.post('/traningar/serie', headers=headers,
+                           json={**serie, 'start': '2025-08-04T16:00:00Z', 'rrule': 'FREQ=DAILY;UNTIL=20250805T160000Z'})
+    assert response.status_code == 409
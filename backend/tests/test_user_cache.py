@@ -0,0 +1,54 @@
+# tests/test_user_cache.py
+from models import User
+from utils.user_cache import UserCache, user_cache
+
+
+def test_me_is_served_from_cache_on_second_request(client, user_token):
+    headers = {'Authorization': f'Bearer {user_token}'}
+
+    assert client.get('/users/me', headers=headers).status_code == 200
+    assert client.get('/users/me', headers=headers).status_code == 200
+
+    stats = user_cache.stats()
+    assert stats['misses'] == 1
+    assert stats['hits'] == 1
+
+
+def test_update_user_invalidates_cached_user(client, app, admin_token, user_token):
+    user_headers = {'Authorization': f'Bearer {user_token}'}
+    assert client.get('/users/me', headers=user_headers).json['roll'] == 'spelare'
+
+    with app.app_context():
+        user_id = User.query.filter_by(email='user@test.com').first().id
+
+    response = client.put(f'/users/{user_id}', headers={'Authorization': f'Bearer {admin_token}'}, json={
+        'namn': 'Vanlig Användarsson',
+        'email': 'user@test.com',
+        'roll': 'tränare'
+    })
+    assert response.status_code == 200
+
+    # Rollbytet återkallar gamla tokens, så logga in igen
+    response = client.post('/auth/login', json={'email': 'user@test.com', 'lösenord': 'Testpassword1'})
+    user_headers = {'Authorization': f"Bearer {response.json['token']}"}
+    assert client.get('/users/me', headers=user_headers).json['roll'] == 'tränare'
+
+
+def test_invalidations_are_bounded_and_still_block_stale_reads(app):
+    cache = UserCache(maxsize=2)
+    with app.app_context():
+        user = User.query.filter_by(email='user@test.com').first()
+        for user_id in range(1000, 1010):
+            cache.invalidate(user_id)
+        assert len(cache._invalidated) == 2
+
+        # En läsning som påbörjades före ändringen sparas inte, även när noteringen trängts undan
+        started = cache._clock
+        cache.invalidate(user.id)
+        for user_id in range(2000, 2010):
+            cache.invalidate(user_id)
+        cache._store(user.id, user, 0, started)
+        assert cache.stats()['size'] == 0
+
+        cache.get_user(user.id)
+        assert cache.stats()['size'] == 1
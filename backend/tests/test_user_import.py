@@ -0,0 +1,129 @@
+# tests/test_user_import.py
+import io
+import json
+
+from models import db, Lag, User
+from utils.passwords import password_hasher
+from utils.user_import import import_users
+
+
+def test_bulk_import_reports_errors_per_row(client, app, admin_token):
+    with app.app_context():
+        lag = Lag(namn='P14')
+        db.session.add(lag)
+        db.session.commit()
+        lag_id = lag.id
+
+    csv_data = (
+        'förnamn,efternamn,email,lösenord,roll,lag\n'
+        f'Alva,Berg,alva@test.com,Hemligt123,spelare,{lag_id}\n'
+        'Bo,Ek,user@test.com,Hemligt123,spelare,\n'
+        'Cia,Ås,,Hemligt123,spelare,\n'
+        f'Dan,Lund,dan@test.com,Hemligt123,spelare,{lag_id};999\n'
+        'Eva,Sjö,eva@test.com,Hemligt123,tränare,\n'
+    )
+    response = client.post(
+        '/users/bulk',
+        headers={'Authorization': f'Bearer {admin_token}'},
+        data={'fil': (io.BytesIO(csv_data.encode('utf-8')), 'p14.csv')},
+        content_type='multipart/form-data'
+    )
+
+    assert response.status_code == 200
+    report = response.get_json()
+    assert report['skapade'] == 2
+    assert sorted(fel['rad'] for fel in report['fel']) == [2, 3, 4]
+
+    with app.app_context():
+        alva = User.query.filter_by(email='alva@test.com').first()
+        assert alva.check_password('Hemligt123')
+        assert [l.id for l in alva.lag] == [lag_id]
+
+
+def test_cli_imports_ndjson(runner, app, tmp_path):
+    fil = tmp_path / 'users.ndjson'
+    fil.write_text(
+        '{"förnamn": "Fia", "efternamn": "Holm", "email": "fia@test.com", "lösenord": "Hemligt123"}\n',
+        encoding='utf-8'
+    )
+
+    result = runner.invoke(args=['users', 'import', str(fil)])
+
+    assert '1 användare skapade' in result.output
+    with app.app_context():
+        assert User.query.filter_by(email='fia@test.com').count() == 1
+
+
+def test_import_enforces_password_policy(app):
+    with app.app_context():
+        report = import_users([
+            {'förnamn': 'Gry', 'efternamn': 'Ek', 'email': 'gry@test.com', 'lösenord': 'admin123'},
+            {'förnamn': 'Hans', 'efternamn': 'Ek', 'email': 'hans@test.com', 'lösenord': 'Hemligt123'},
+        ])
+
+    assert report['skapade'] == 1
+    assert report['fel'][0]['rad'] == 1
+    assert 'stor bokstav' in report['fel'][0]['fel']
+
+
+def test_database_error_is_reported_for_the_failing_row_only(app, monkeypatch):
+    hash_many = password_hasher.hash_many
+
+    def concurrent_signup(passwords):
+        # Någon annan registrerar samma e-post mellan kontrollen och INSERT
+        db.session.add(User(förnamn='Ivar', efternamn='Ek', email='ivar@test.com', lösenord='Hemligt123'))
+        db.session.commit()
+        return hash_many(passwords)
+
+    monkeypatch.setattr(password_hasher, 'hash_many', concurrent_signup)
+    rows = [{'förnamn': namn, 'efternamn': 'Ek', 'email': f'{namn.lower()}@test.com', 'lösenord': 'Hemligt123'}
+            for namn in ('Jon', 'Ivar', 'Kim')]
+    with app.app_context():
+        report = import_users(rows)
+        assert User.query.filter(User.email.in_(['jon@test.com', 'kim@test.com'])).count() == 2
+
+    assert report['skapade'] == 2
+    assert [(fel['rad'], fel['email']) for fel in report['fel']] == [(2, 'ivar@test.com')]
+
+
+def test_malformed_ndjson_line_after_first_batch_is_reported(client, app, admin_token, monkeypatch):
+    # Hashningen är inte det som testas här
+    monkeypatch.setattr(password_hasher, 'hash_many', lambda passwords: ['hash' for _ in passwords])
+    lines = [json.dumps({'förnamn': 'Spelare', 'efternamn': str(i), 'email': f'spelare{i}@test.com',
+                         'lösenord': 'Hemligt123'}) for i in range(501)]
+    lines += ['{"förnamn": "Trasig",', lines.pop()]
+
+    response = client.post(
+        '/users/bulk',
+        headers={'Authorization': f'Bearer {admin_token}'},
+        data={'fil': (io.BytesIO('\n'.join(lines).encode('utf-8')), 'spelare.ndjson')},
+        content_type='multipart/form-data'
+    )
+
+    assert response.status_code == 200
+    report = response.get_json()
+    assert report['skapade'] == 501
+    assert [(fel['rad'], fel['fel'].startswith('Ogiltig JSON')) for fel in report['fel']] == [(501, True)]
+
+
+def test_field_types_are_checked(app):
+    with app.app_context():
+        lag = Lag(namn='P14')
+        db.session.add(lag)
+        db.session.commit()
+        report = import_users([
+            {'förnamn': 'Ida', 'efternamn': 'Ek', 'email': 'ida@test.com', 'lösenord': 'Hemligt123', 'lag': '12'},
+            {'förnamn': 'Jan', 'efternamn': 'Ek', 'email': ['jan@test.com'], 'lösenord': 'Hemligt123'},
+            {'förnamn': 'Kim', 'efternamn': 'Ek', 'email': 'kim@test.com', 'lösenord': 'Hemligt123', 'telefon': 123},
+            {'förnamn': 'Lo', 'efternamn': 'Ek', 'email': 'lo@test.com', 'lösenord': 'Hemligt123', 'lag': lag.id},
+            {'förnamn': 'Mo', 'efternamn': 'Ek', 'email': 'mo@test.com', 'lösenord': 'Hemligt123',
+             'lag': [str(lag.id)]},
+        ])
+
+        assert report['skapade'] == 2
+        assert [(fel['rad'], fel['fel']) for fel in report['fel']] == [
+            (1, 'Ogiltigt lag-id'),
+            (2, 'Följande fält måste vara text: email'),
+            (3, 'Följande fält måste vara text: telefon'),
+        ]
+        assert [l.id for l in User.query.filter_by(email='lo@test.com').one().lag] == [lag.id]
@@ -0,0 +1,192 @@
+from itertools import chain
+import numpy as np
+from sqlalchemy import BigInteger, case, cast, func
+from models import db, Match, Träning, User, training_attendance
+from utils.attendance import PRESENT
+
+POÄNG_VINST = 3
+
+# Säsongsstatistik beräknad kolumnvis: varje datamängd hämtas med en enda SELECT
+# av de kolumner som behövs och aggregeras med bincount/cumsum/unique i stället
+# för Python-loopar över ORM-objekt.
+
+
+def _between(column, from_date, to_date):
+    conditions = []
+    if from_date is not None:
+        conditions.append(column >= from_date)
+    if to_date is not None:
+        conditions.append(column <= to_date)
+    return conditions
+
+
+def _epoch(column):
+    """Datum som sekunder sedan 1970, så att hela kolumnen blir ett heltalsfält"""
+    return cast(func.extract('epoch', column), BigInteger)
+
+
+def _columns(query, names):
+    """Kör frågan och returnera resultatet som en int64-array per kolumn"""
+    rows = db.session.connection().execute(query).all()
+    # fromiter över de platta värdena; np.array() på Row-objekt är mycket långsammare
+    data = np.fromiter(chain.from_iterable(rows), dtype=np.int64,
+                       count=len(rows) * len(names)).reshape(len(rows), len(names))
+    return {name: data[:, i] for i, name in enumerate(names)}
+
+
+def load_matches(lag_id=None, from_date=None, to_date=None):
+    """Spelade matcher som kolumner: datum, hemmalag, bortalag, mål hemma och borta"""
+    query = (
+        db.select(_epoch(Match.datum), Match.hemmalag_id, Match.bortalag_id,
+                  Match.resultat_hemma, Match.resultat_borta)
+        .where(Match.resultat_hemma.isnot(None), Match.resultat_borta.isnot(None),
+               *_between(Match.datum, from_date, to_date))
+        .order_by(Match.datum, Match.id)
+    )
+    if lag_id is not None:
+        query = query.where((Match.hemmalag_id == lag_id) | (Match.bortalag_id == lag_id))
+
+    matches = _columns(query, ['datum', 'hemmalag', 'bortalag', 'hemma', 'borta'])
+    matches['datum'] = matches['datum'].astype('datetime64[s]')
+    return matches
+
+
+def rolling_goals(matches, lag_id=None, window=5):
+    """
+    Mål per match och glidande medelvärde över `window` matcher.
+
+    Med lag_id räknas lagets gjorda och insläppta mål, annars det totala
+    antalet mål i matchen.
+    """
+    if lag_id is None:
+        gjorda = matches['hemma'] + matches['borta']
+        insläppta = None
+    else:
+        hemma = matches['hemmalag'] == lag_id
+        gjorda = np.where(hemma, matches['hemma'], matches['borta'])
+        insläppta = np.where(hemma, matches['borta'], matches['hemma'])
+
+    def rolling(values):
+        # Glidande medel med kumulativ summa: (S[i] - S[i-window]) / antal i fönstret
+        cumulative = np.concatenate(([0], np.cumsum(values, dtype=np.float64)))
+        index = np.arange(1, len(values) + 1)
+        start = np.maximum(index - window, 0)
+        return (cumulative[index] - cumulative[start]) / (index - start)
+
+    result = {
+        'datum': np.datetime_as_string(matches['datum']).tolist(),
+        'gjorda': gjorda.tolist(),
+        'snitt_gjorda': np.round(rolling(gjorda), 2).tolist() if len(gjorda) else []
+    }
+    if insläppta is not None:
+        result['insläppta'] = insläppta.tolist()
+        result['snitt_insläppta'] = np.round(rolling(insläppta), 2).tolist() if len(insläppta) else []
+    return result
+
+
+def home_away_split(matches, lag_id=None):
+    """Hemma/borta per lag: matcher, vinster, oavgjorda, förluster, mål och poäng per match"""
+    if len(matches['datum']) == 0:
+        return []
+
+    hemmalag, bortalag = matches['hemmalag'], matches['bortalag']
+    hemma, borta = matches['hemma'], matches['borta']
+    lag_ids, inverse = np.unique(np.concatenate((hemmalag, bortalag)), return_inverse=True)
+    n = len(matches['datum'])
+    hem_index, bort_index = inverse[:n], inverse[n:]
+    antal_lag = len(lag_ids)
+
+    def split(index, gjorda, insläppta):
+        count = lambda weights=None: np.bincount(index, weights=weights, minlength=antal_lag)
+        vinster = count(gjorda > insläppta)
+        oavgjorda = count(gjorda == insläppta)
+        matcher = count()
+        return {
+            'matcher': matcher.astype(int),
+            'vunna': vinster.astype(int),
+            'oavgjorda': oavgjorda.astype(int),
+            'förlorade': (matcher - vinster - oavgjorda).astype(int),
+            'gjorda': count(gjorda).astype(int),
+            'insläppta': count(insläppta).astype(int),
+            'poäng_per_match': np.divide(POÄNG_VINST * vinster + oavgjorda, matcher,
+                                         out=np.zeros(antal_lag), where=matcher > 0)
+        }
+
+    hemma_stats = split(hem_index, hemma, borta)
+    borta_stats = split(bort_index, borta, hemma)
+
+    def row(stats, i):
+        return {key: round(float(values[i]), 2) if key == 'poäng_per_match' else int(values[i])
+                for key, values in stats.items()}
+
+    return [
+        {'lag_id': team, 'hemma': row(hemma_stats, i), 'borta': row(borta_stats, i)}
+        for i, team in enumerate(lag_ids.tolist())
+        if lag_id is None or team == lag_id
+    ]
+
+
+def load_attendance(lag_id, from_date=None, to_date=None):
+    """Lagets träningar med närvarorader (LEFT JOIN, så träningar utan närvaro syns)"""
+    query = (
+        db.select(Träning.id, _epoch(Träning.datum),
+                  # -1 för träningar utan någon närvarorad
+                  func.coalesce(training_attendance.c.user_id, -1),
+                  case((training_attendance.c.status == PRESENT, 1), else_=0))
+        .outerjoin(training_attendance, training_attendance.c.training_id == Träning.id)
+        .where(Träning.lag_id == lag_id, *_between(Träning.datum, from_date, to_date))
+    )
+    data = _columns(query, ['training_id', 'månad', 'user_id', 'närvarande'])
+    if len(data['training_id']) == 0:
+        return None
+    data['månad'] = data['månad'].astype('datetime64[s]').astype('datetime64[M]')
+    data['närvarande'] = data['närvarande'].astype(bool)
+    return data
+
+
+def attendance_rates(data):
+    """
+    Närvaroandel per spelare och månad: antal närvarande pass delat med antal
+    pass laget hade den månaden.
+    """
+    if data is None:
+        return []
+
+    månader, månad_index = np.unique(data['månad'], return_inverse=True)
+    antal_månader = len(månader)
+
+    # Varje träning räknas en gång per månad, oavsett hur många närvarorader den har
+    _, första = np.unique(data['training_id'], return_index=True)
+    pass_per_månad = np.bincount(månad_index[första], minlength=antal_månader)
+
+    har_spelare = data['user_id'] >= 0
+    spelare, spelare_index = np.unique(data['user_id'][har_spelare], return_inverse=True)
+    if len(spelare) == 0:
+        return []
+
+    cell = spelare_index * antal_månader + månad_index[har_spelare]
+    närvarande = np.bincount(cell, weights=data['närvarande'][har_spelare],
+                             minlength=len(spelare) * antal_månader).reshape(len(spelare), antal_månader)
+    andel = närvarande / pass_per_månad
+
+    namn = dict(
+        (row.id, f'{row.förnamn} {row.efternamn}')
+        for row in db.session.execute(
+            db.select(User.id, User.förnamn, User.efternamn).where(User.id.in_(spelare.tolist()))
+        )
+    )
+    månad_text = np.datetime_as_string(månader, unit='M').tolist()
+
+    result = []
+    for i, user_id in enumerate(spelare.tolist()):
+        result.append({
+            'user_id': user_id,
+            'namn': namn.get(user_id),
+            'månader': [{
+                'månad': månad_text[j],
+                'pass': int(pass_per_månad[j]),
+                'närvarande': int(närvarande[i, j]),
+                'andel': round(float(andel[i, j]), 3)
+            } for j in range(antal_månader)]
+        })
+    return result
@@ -0,0 +1,90 @@
+from flask import current_app, g, has_request_context, request
+from sqlalchemy.engine import make_url
+from utils.db_routing import READ_METHODS, read_your_writes, writer_key
+
+# Asynkrona drivrutiner för de databaser appen använder
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+
+def async_url(url):
+    """Samma databas-URL med asynkron drivrutin, t.ex. postgresql+asyncpg://"""
+    url = make_url(url.replace('postgres://', 'postgresql://', 1))
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise RuntimeError(f'Ingen asynkron drivrutin känd för {backend}')
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+
+def async_engine_options(config, url):
+    """Poolinställningar för en asynkron motor, motsvarande utils.db_pool.engine_options"""
+    options = {
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+    }
+    if url.get_backend_name() == 'sqlite':
+        return options
+
+    options.update({
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+    })
+    if url.get_backend_name() == 'postgresql' and config['DB_STATEMENT_TIMEOUT_MS']:
+        options['connect_args'] = {'server_settings': {'statement_timeout': str(config['DB_STATEMENT_TIMEOUT_MS'])}}
+    return options
+
+
+class AsyncDatabase:
+    """
+    Asynkrona motorer för läsvyerna i ASGI-läget (se asgi.py).
+
+    Motorerna skapas först när de behövs, så att WSGI-läget varken importerar
+    sqlalchemy.ext.asyncio eller kräver asyncpg/aiosqlite. Läsningar går till
+    repliken enligt samma regler som RoutingSession.
+    """
+
+    def init_app(self, app):
+        app.extensions['async_db'] = {}
+
+    def _engine(self, role):
+        engines = current_app.extensions['async_db']
+        if role not in engines:
+            try:
+                from sqlalchemy.ext.asyncio import create_async_engine
+            except ImportError as e:  # pragma: no cover - beror på installationen
+                raise RuntimeError('ASGI-läget kräver greenlet och en asynkron drivrutin') from e
+
+            config = current_app.config
+            if role == 'replica':
+                url = config.get('ASYNC_REPLICA_URI') or config['SQLALCHEMY_REPLICA_URI']
+            else:
+                url = config.get('ASYNC_DATABASE_URI') or config['SQLALCHEMY_DATABASE_URI']
+            url = async_url(str(url))
+            engines[role] = create_async_engine(url, **async_engine_options(config, url))
+        return engines[role]
+
+    def engine(self):
+        """Motorn för aktuell request: repliken för läsningar om den finns, annars primären"""
+        config = current_app.config
+        if ((config.get('ASYNC_REPLICA_URI') or config.get('SQLALCHEMY_REPLICA_URI'))
+                and has_request_context() and request.method in READ_METHODS
+                and not g.get('read_from_primary')
+                and not read_your_writes.is_recent(writer_key())):
+            return self._engine('replica')
+        return self._engine('primary')
+
+    def session(self):
+        """Ny AsyncSession, används som `async with async_db.session() as session:`"""
+        from sqlalchemy.ext.asyncio import AsyncSession
+        return AsyncSession(self.engine(), expire_on_commit=False)
+
+    async def dispose(self, app):
+        for engine in app.extensions.get('async_db', {}).values():
+            await engine.dispose()
+        app.extensions['async_db'] = {}
+
+
+async_db = AsyncDatabase()
@@ -0,0 +1,62 @@
+from datetime import datetime
+from sqlalchemy import func
+from models import db, training_attendance
+
+# Giltiga närvarostatusar. Endast "närvarande" räknas i antalet.
+STATUSES = ('närvarande', 'frånvarande', 'sjuk', 'skadad', 'ledig')
+PRESENT = 'närvarande'
+
+
+def _upsert_statement(dialect_name):
+    if dialect_name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect_name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+
+    stmt = insert(training_attendance)
+    return stmt.on_conflict_do_update(
+        index_elements=[training_attendance.c.training_id, training_attendance.c.user_id],
+        set_={'status': stmt.excluded.status, 'updated_at': stmt.excluded.updated_at}
+    )
+
+
+def upsert_attendance(training_id, entries):
+    """
+    Spara närvaro för en hel trupp i en sats: INSERT ... ON CONFLICT DO UPDATE.
+
+    `entries` är en lista av (user_id, status). Anroparen committar.
+    """
+    now = datetime.utcnow()
+    rows = [{'training_id': training_id, 'user_id': user_id, 'status': status, 'updated_at': now}
+            for user_id, status in entries]
+    if not rows:
+        return 0
+
+    stmt = _upsert_statement(db.session.get_bind().dialect.name)
+    if stmt is None:
+        # Databaser utan ON CONFLICT: ta bort och lägg in på nytt i samma transaktion
+        db.session.execute(training_attendance.delete().where(
+            training_attendance.c.training_id == training_id,
+            training_attendance.c.user_id.in_([row['user_id'] for row in rows])
+        ))
+        stmt = training_attendance.insert()
+
+    db.session.execute(stmt, rows)
+    return len(rows)
+
+
+def headcount(training_ids):
+    """Antal närvarande per träning, räknat från närvarotabellen"""
+    if not training_ids:
+        return {}
+    rows = db.session.execute(
+        db.select(training_attendance.c.training_id, func.count())
+        .where(training_attendance.c.training_id.in_(training_ids),
+               training_attendance.c.status == PRESENT)
+        .group_by(training_attendance.c.training_id)
+    ).all()
+    counts = dict.fromkeys(training_ids, 0)
+    counts.update({training_id: count for training_id, count in rows})
+    return counts
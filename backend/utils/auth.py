@@ -0,0 +1,107 @@
+from collections import namedtuple
+from flask import request, jsonify, g, current_app
+from werkzeug.local import LocalProxy
+from utils.token_utils import decode_token
+from utils.token_versions import token_versions
+from utils.user_cache import user_cache
+
+# Inloggad användare för pågående request, satt av authenticate_request.
+# Är en User, eller en TokenPrincipal när behörigheten avgjorts från claims.
+current_user = LocalProxy(lambda: g.get('current_user'))
+
+# Användare byggd enbart från verifierade claims i token
+TokenPrincipal = namedtuple('TokenPrincipal', ['id', 'roll', 'lag_ids'])
+
+
+def token_required(f):
+    """Markera en route som skyddad med JWT-token.
+
+    Själva kontrollen görs en gång per request i authenticate_request, så
+    dekoratorn lägger inte till något eget anropslager runt funktionen.
+    """
+    if not hasattr(f, '_auth_roles'):
+        f._auth_roles = None
+    return f
+
+
+def roles_required(allowed_roles):
+    """Markera vilka roller som får anropa en route (kräver även token)."""
+    if isinstance(allowed_roles, str):
+        allowed_roles = [allowed_roles]
+    roles = frozenset(allowed_roles)
+
+    def decorator(f):
+        f._auth_roles = roles
+        return f
+
+    return decorator
+
+
+def load_current_user():
+    """Hämta inloggad användare som User, även när den byggts från claims"""
+    user = g.get('current_user')
+    if isinstance(user, TokenPrincipal):
+        return user_cache.get_user(user.id)
+    return user
+
+
+def _bearer_token():
+    auth_header = request.headers.get('Authorization', '')
+    if auth_header.startswith('Bearer '):
+        return auth_header[7:]
+    return None
+
+
+def authenticate_request():
+    """before_request-hook: verifiera token och roller för skyddade routes."""
+    route_roles = current_app.extensions['auth_routes']
+    if request.endpoint not in route_roles or request.method == 'OPTIONS':
+        return None
+
+    token = _bearer_token()
+    if not token:
+        return jsonify({'error': 'Token saknas'}), 401
+
+    import jwt
+    try:
+        data = decode_token(token)
+        user_id = data['user_id']
+    except jwt.ExpiredSignatureError:
+        return jsonify({'error': 'Token har löpt ut'}), 401
+    except (jwt.InvalidTokenError, KeyError):
+        return jsonify({'error': 'Ogiltig token'}), 401
+
+    if 'roll' in data and current_app.config.get('JWT_CLAIMS_IN_TOKEN'):
+        if not token_versions.is_valid(user_id, data.get('ver', 0)):
+            return jsonify({'error': 'Token har återkallats'}), 401
+        user = TokenPrincipal(user_id, data['roll'], tuple(data.get('lag', ())))
+    else:
+        user = user_cache.get_user(user_id)
+        if not user:
+            return jsonify({'error': 'Ogiltig token - användaren hittades inte'}), 401
+        if data.get('ver', 0) < (user.token_version or 0):
+            return jsonify({'error': 'Token har återkallats'}), 401
+
+    g.current_user = user
+
+    roles = route_roles[request.endpoint]
+    if roles is not None and user.roll not in roles:
+        return jsonify({
+            'error': 'Åtkomst nekad',
+            'message': 'Du har inte behörighet för denna åtgärd'
+        }), 403
+
+    return None
+
+
+def init_auth(app):
+    """Bygg tabellen route → roller och registrera autentiseringshooken.
+
+    Anropas efter att alla blueprints registrerats.
+    """
+    app.extensions['auth_routes'] = {
+        endpoint: view._auth_roles
+        for endpoint, view in app.view_functions.items()
+        if hasattr(view, '_auth_roles')
+    }
+    app.before_request(authenticate_request)
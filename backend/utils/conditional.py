@@ -0,0 +1,91 @@
+import hashlib
+from datetime import timezone
+from flask import request, current_app
+from sqlalchemy import func, select
+
+
+def make_etag(*parts):
+    """Stark ETag byggd av delarna, t.ex. ('match', id, version)"""
+    raw = '|'.join(str(part) for part in parts)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def _as_utc(value):
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    # HTTP-datum har sekundupplösning
+    return value.replace(microsecond=0)
+
+
+def not_modified(etag, last_modified=None):
+    """
+    Returnera ett tomt 304-svar om klientens cachade version är aktuell.
+
+    If-None-Match har företräde framför If-Modified-Since. Returnerar None när
+    svaret ska byggas som vanligt.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return None
+
+    if request.if_none_match:
+        fresh = request.if_none_match.contains_weak(etag)
+    elif request.if_modified_since and last_modified is not None:
+        fresh = _as_utc(last_modified) <= request.if_modified_since
+    else:
+        fresh = False
+
+    if not fresh:
+        return None
+    response = current_app.response_class(status=304)
+    return with_validators(response, etag, last_modified)
+
+
+def with_validators(response, etag, last_modified=None):
+    """Sätt ETag och Last-Modified på ett svar"""
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = _as_utc(last_modified)
+    # Klienten får spara svaret men måste fråga om det fortfarande gäller
+    response.headers.setdefault('Cache-Control', 'no-cache')
+    return response
+
+
+def state_columns(model, *related):
+    """Kolumnerna i collection_state, för att kunna ställa frågan själv (t.ex. asynkront)"""
+    columns = [func.count(model.id), func.max(model.updated_at), func.sum(model.version)]
+    for other in related:
+        columns.append(select(func.max(other.updated_at)).scalar_subquery())
+        columns.append(select(func.sum(other.version)).scalar_subquery())
+    return columns
+
+
+def summarize_state(row):
+    """(tillstånd, senaste updated_at) ur en rad med state_columns"""
+    last_modified = max((value for value in row[1::2] if value is not None), default=None)
+    return tuple(row), last_modified
+
+
+def collection_state(query, model, *related):
+    """
+    Billig sammanfattning av en listfråga: antal rader, senaste updated_at och
+    summan av versionerna, i en enda SELECT utan sortering eller paginering.
+
+    `related` är modeller vars ändringar också syns i svaret (t.ex. lagnamn i
+    matchlistan); deras senaste updated_at och versionssumma tas med som
+    skalära delfrågor.
+    """
+    row = query.order_by(None).with_entities(*state_columns(model, *related)).one()
+    return summarize_state(row)
+
+
+def collection_etag(model, state):
+    """ETag för en listning med tillståndet `state`, beroende av query-parametrarna"""
+    return make_etag(model.__tablename__, request.full_path, *state)
+
+
+def collection_validators(query, model, *related):
+    """ETag och Last-Modified för en listning, beroende av query-parametrarna"""
+    state, last_modified = collection_state(query, model, *related)
+    return collection_etag(model, state), last_modified
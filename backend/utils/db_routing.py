@@ -0,0 +1,147 @@
+import threading
+import time
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event, inspect
+from utils.db_pool import engine_options
+
+READ_METHODS = ('GET', 'HEAD')
+
+
+class ReadYourWrites:
+    """
+    Håller reda på vilka användare som nyligen skrivit till databasen.
+
+    Under `window` sekunder efter en skrivning läser samma användare från
+    primären, så att t.ex. en tränare direkt ser en nyss skapad träning även
+    om repliken ligger efter. Gäller per process.
+    """
+
+    def __init__(self, window=5, max_keys=10000):
+        self.window = window
+        self.max_keys = max_keys
+        self._writes = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.window = app.config.get('READ_YOUR_WRITES_SECONDS', self.window)
+        with self._lock:
+            self._writes.clear()
+
+    def record(self, key):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._writes) >= self.max_keys:
+                self._writes = {k: t for k, t in self._writes.items() if t > now}
+            self._writes[key] = now + self.window
+
+    def is_recent(self, key):
+        expires = self._writes.get(key)
+        return expires is not None and expires > time.monotonic()
+
+
+read_your_writes = ReadYourWrites()
+
+
+def init_replica(app):
+    """Skapa motorn för läsrepliken om SQLALCHEMY_REPLICA_URI är satt"""
+    url = app.config.get('SQLALCHEMY_REPLICA_URI')
+    engine = None
+    if url:
+        url = url.replace('postgres://', 'postgresql://', 1)
+        engine = create_engine(url, **engine_options({**app.config, 'SQLALCHEMY_DATABASE_URI': url}))
+    app.extensions['db_replica'] = engine
+    read_your_writes.init_app(app)
+
+
+def replica_engine():
+    """Aktuell apps replikmotor, eller None"""
+    return current_app.extensions.get('db_replica')
+
+
+def read_from_primary():
+    """Låt resten av requesten läsa från primären, t.ex. när svaret ska cachas"""
+    g.read_from_primary = True
+
+
+def writer_key():
+    """
+    Nyckel för den som gör requesten: användar-id om det går, annars IP.
+    Anropas vid varje get_bind, så en token avkodas bara en gång per request.
+    """
+    user = g.get('current_user')
+    if user is not None:
+        return f'user:{_user_id(user)}'
+
+    key = g.get('writer_key')
+    if key is None:
+        key = g.writer_key = _anonymous_writer_key()
+    return key
+
+
+def _user_id(user):
+    # En User är utgången efter commit och kan inte laddas om från after_commit
+    state = inspect(user, raiseerr=False)
+    if state is not None and state.identity is not None:
+        return state.identity[0]
+    return user.id
+
+
+def _anonymous_writer_key():
+    # Publika routes autentiseras inte, men token identifierar ändå användaren
+    auth_header = request.headers.get('Authorization', '')
+    if auth_header.startswith('Bearer '):
+        import jwt
+        from utils.token_utils import decode_token
+        try:
+            return f"user:{decode_token(auth_header[7:])['user_id']}"
+        except (jwt.InvalidTokenError, KeyError):
+            pass
+
+    return f'ip:{request.remote_addr}'
+
+
+class RoutingSession(Session):
+    """
+    Session som skickar läsningar i GET-requests till replikan.
+
+    Skrivningar, och allt i en session som redan har skrivit, går till
+    primären. Utan konfigurerad replika fungerar den som en vanlig session.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._reads_from_replica():
+            return replica_engine()
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _reads_from_replica(self):
+        if self._flushing or self.info.get('wrote'):
+            return False
+        if not has_request_context() or request.method not in READ_METHODS:
+            return False
+        if g.get('read_from_primary') or replica_engine() is None:
+            return False
+        return not read_your_writes.is_recent(writer_key())
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_write(session, flush_context):
+    session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _mark_statement_write(orm_execute_state):
+    # INSERT/UPDATE/DELETE via session.execute, t.ex. bulk-insert av träningar
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _record_write(session):
+    if session.info.pop('wrote', False) and has_request_context():
+        read_your_writes.record(writer_key())
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _forget_write(session):
+    session.info.pop('wrote', None)
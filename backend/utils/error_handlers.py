@@ -1,4 +1,7 @@
 from flask import jsonify
+from utils.serialization import InvalidFields
+from utils.export import InvalidExportFormat
+from utils.passwords import PasswordHasherBusy
 
 
 def register_error_handlers(app):
@@ -11,6 +14,20 @@ def register_error_handlers(app):
             "message": "Begäran kunde inte förstås av servern på grund av felaktig syntax"
         }), 400
 
+    @app.errorhandler(InvalidFields)
+    def invalid_fields(error):
+        return jsonify({
+            "error": "Bad Request",
+            "message": f"Okända fält: {error}"
+        }), 400
+
+    @app.errorhandler(InvalidExportFormat)
+    def invalid_export_format(error):
+        return jsonify({
+            "error": "Bad Request",
+            "message": f"Okänt exportformat: {error}, använd ndjson eller csv"
+        }), 400
+
     @app.errorhandler(401)
     def unauthorized(error):
         return jsonify({
@@ -48,10 +65,14 @@ def register_error_handlers(app):
 
     @app.errorhandler(429)
     def too_many_requests(error):
-        return jsonify({
+        response = jsonify({
             "error": "Too Many Requests",
             "message": "Du har skickat för många förfrågningar. Försök igen senare"
-        }), 429
+        })
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after is not None:
+            response.headers["Retry-After"] = str(retry_after)
+        return response, 429
 
     @app.errorhandler(500)
     def internal_server_error(error):
@@ -60,6 +81,13 @@ def register_error_handlers(app):
             "message": "Ett internt serverfel har inträffat"
         }), 500
 
+    @app.errorhandler(PasswordHasherBusy)
+    def password_hasher_busy(error):
+        return jsonify({
+            "error": "Service Unavailable",
+            "message": "Servern är hårt belastad, försök igen om en stund"
+        }), 503, {"Retry-After": "1"}
+
     @app.errorhandler(503)
     def service_unavailable(error):
         return jsonify({
@@ -0,0 +1,232 @@
+from datetime import datetime, timedelta
+from sqlalchemy import or_
+from sqlalchemy.orm import aliased
+from models import db, Lag, Match, Träning, KalenderBorttagning
+from utils.conditional import collection_state
+from utils.pagination import encode_cursor, decode_cursor
+
+# Kalenderflöden (RFC 5545) per lag och per spelare. Flödet skrivs rad för rad
+# från frågor med yield_per, så minnet beror inte på hur många händelser det har.
+
+DOMÄN = 'solvaders-fc'
+TRÄNING_LÄNGD = timedelta(minutes=90)
+MATCH_LÄNGD = timedelta(hours=2)
+# Hur ofta kalenderappar som läser REFRESH-INTERVAL hämtar flödet
+UPPDATERINGSINTERVALL = 'PT15M'
+# Deltaläget börjar lite före förra hämtningen så att rader som committades
+# strax efter att sync-token skapades inte missas. Dubbletter ersätts via UID.
+SYNK_ÖVERLAPP = timedelta(minutes=1)
+# Antal händelser per block som skickas till klienten
+BATCH_SIZE = 200
+MAX_RAD = 75
+
+CONTENT_TYPE = 'text/calendar; charset=utf-8'
+
+
+def event_uid(kind, object_id):
+    """Stabilt UID för en träning eller match, t.ex. "match-12@solvaders-fc" """
+    return f'{kind}-{object_id}@{DOMÄN}'
+
+
+def escape(text):
+    """Escapa TEXT-värden enligt RFC 5545"""
+    return (text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def fold(line):
+    """Koda en rad som UTF-8 och vik den vid 75 byte, utan att dela ett tecken"""
+    data = line.encode('utf-8')
+    parts = []
+    limit = MAX_RAD
+    while len(data) > limit:
+        cut = limit
+        # Fortsättningsbytes i UTF-8 har formen 10xxxxxx
+        while data[cut] & 0xC0 == 0x80:
+            cut -= 1
+        parts.append(data[:cut])
+        data = data[cut:]
+        # Fortsättningsraden börjar med ett mellanslag som räknas in i längden
+        limit = MAX_RAD - 1
+    parts.append(data)
+    return b'\r\n '.join(parts) + b'\r\n'
+
+
+def _lokal(value):
+    # Datum lagras utan tidszon och visas i kalenderns egen tid
+    return value.strftime('%Y%m%dT%H%M%S')
+
+
+def _utc(value):
+    return value.strftime('%Y%m%dT%H%M%SZ')
+
+
+def _event(uid, start, end, summary, location, updated, sequence, description=None, status='CONFIRMED'):
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:{uid}',
+        f'DTSTAMP:{_utc(updated)}',
+        f'LAST-MODIFIED:{_utc(updated)}',
+        f'SEQUENCE:{sequence}',
+        f'DTSTART:{_lokal(start)}',
+        f'DTEND:{_lokal(end)}',
+        f'SUMMARY:{escape(summary)}',
+        f'STATUS:{status}'
+    ]
+    if location:
+        lines.append(f'LOCATION:{escape(location)}')
+    if description:
+        lines.append(f'DESCRIPTION:{escape(description)}')
+    lines.append('END:VEVENT')
+    return b''.join(fold(line) for line in lines)
+
+
+def window_start(days):
+    """Första dagen som tas med i flödet, avrundad så att den är stabil under dygnet"""
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    return today - timedelta(days=days)
+
+
+def _matcher_för(query, lag_ids):
+    return query.filter(or_(Match.hemmalag_id.in_(lag_ids), Match.bortalag_id.in_(lag_ids)))
+
+
+def feed_state(lag_ids, start):
+    """
+    Billig sammanfattning av allt som syns i flödet, två indexerade SELECT.
+    Ändras när någon träning, match eller något lagnamn ändras.
+    """
+    träningar, träning_ändrad = collection_state(
+        Träning.query.filter(Träning.lag_id.in_(lag_ids), Träning.datum >= start), Träning, Lag)
+    matcher, match_ändrad = collection_state(
+        _matcher_för(Match.query, lag_ids).filter(Match.datum >= start), Match)
+    last_modified = max(filter(None, [träning_ändrad, match_ändrad]), default=None)
+    return träningar + matcher, last_modified
+
+
+def sync_token(lag_ids):
+    """Token för nästa deltahämtning: tidpunkten och vilka lag flödet gällde"""
+    return encode_cursor([datetime.utcnow() - SYNK_ÖVERLAPP, ','.join(map(str, lag_ids))])
+
+
+def parse_sync_token(token, lag_ids, oldest):
+    """
+    Tidpunkten i en sync-token, eller None om klienten behöver hela flödet:
+    flödet gäller nu andra lag, eller token är äldre än `oldest` så att
+    borttagningarna sedan dess kan ha rensats (prune_removals). Kastar
+    InvalidCursor för trasiga tokens.
+    """
+    since, lag_key = decode_cursor(token, 2)
+    if not isinstance(since, datetime) or lag_key != ','.join(map(str, lag_ids)) or since < oldest:
+        return None
+    return since
+
+
+def _träningar(lag_ids, start, since):
+    query = (
+        db.select(Träning.id, Träning.datum, Träning.plats, Träning.typ, Träning.beskrivning,
+                  Träning.updated_at, Träning.version, Lag.namn)
+        .join(Lag, Lag.id == Träning.lag_id)
+        .where(Träning.lag_id.in_(lag_ids), Träning.datum >= start)
+        .order_by(Träning.datum, Träning.id)
+    )
+    if since is not None:
+        query = query.where(Träning.updated_at >= since)
+
+    for row in db.session.execute(query, execution_options={'yield_per': BATCH_SIZE}):
+        summary = f'Träning {row.namn}' + (f' – {row.typ}' if row.typ else '')
+        yield event_uid('traning', row.id), _event(
+            event_uid('traning', row.id), row.datum, row.datum + TRÄNING_LÄNGD, summary,
+            row.plats, row.updated_at, row.version - 1, row.beskrivning)
+
+
+def _matcher(lag_ids, start, since):
+    hemma, borta = aliased(Lag), aliased(Lag)
+    query = _matcher_för(
+        db.select(Match.id, Match.datum, Match.plats, Match.resultat_hemma, Match.resultat_borta,
+                  Match.updated_at, Match.version, hemma.namn.label('hemma'), borta.namn.label('borta'))
+        .join(hemma, hemma.id == Match.hemmalag_id)
+        .join(borta, borta.id == Match.bortalag_id),
+        lag_ids
+    ).where(Match.datum >= start).order_by(Match.datum, Match.id)
+    if since is not None:
+        query = query.where(Match.updated_at >= since)
+
+    for row in db.session.execute(query, execution_options={'yield_per': BATCH_SIZE}):
+        summary = f'{row.hemma} – {row.borta}'
+        if row.resultat_hemma is not None and row.resultat_borta is not None:
+            summary += f' {row.resultat_hemma}–{row.resultat_borta}'
+        yield event_uid('match', row.id), _event(
+            event_uid('match', row.id), row.datum, row.datum + MATCH_LÄNGD, summary,
+            row.plats, row.updated_at, row.version - 1)
+
+
+def _inställda(lag_ids, start, since, skip):
+    query = (
+        db.select(KalenderBorttagning)
+        .where(KalenderBorttagning.lag_id.in_(lag_ids), KalenderBorttagning.raderad >= since,
+               KalenderBorttagning.datum >= start)
+        .order_by(KalenderBorttagning.raderad)
+    )
+    for row in db.session.scalars(query):
+        # Samma händelse kan vara borttagen för flera av spelarens lag, eller
+        # ha flyttats till ett annat av dem och då finnas kvar
+        if row.uid in skip:
+            continue
+        skip.add(row.uid)
+        yield _event(row.uid, row.datum, row.datum, 'Inställd', None, row.raderad, row.sekvens,
+                     status='CANCELLED')
+
+
+def feed(lag_ids, name, start, since=None):
+    """
+    Strömma ett VCALENDAR med lagens träningar och matcher från `start`.
+
+    Med `since` (deltaläge) tas bara händelser ändrade sedan dess med, plus
+    inställda händelser för det som tagits bort ur lagens kalender.
+    """
+    yield b''.join(fold(line) for line in [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//Solvaders FC//Kalender//SV',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{escape(name)}',
+        f'REFRESH-INTERVAL;VALUE=DURATION:{UPPDATERINGSINTERVALL}',
+        f'X-PUBLISHED-TTL:{UPPDATERINGSINTERVALL}'
+    ])
+
+    if lag_ids:
+        uids = set()
+        buffer = []
+        for events in (_träningar(lag_ids, start, since), _matcher(lag_ids, start, since)):
+            for uid, event in events:
+                uids.add(uid)
+                buffer.append(event)
+                if len(buffer) >= BATCH_SIZE:
+                    yield b''.join(buffer)
+                    buffer.clear()
+        if since is not None:
+            buffer.extend(_inställda(lag_ids, start, since, uids))
+        if buffer:
+            yield b''.join(buffer)
+
+    yield fold('END:VCALENDAR')
+
+
+def prune_removals(days):
+    """
+    Ta bort borttagningar äldre än `days` dagar. Sync-tokens som är så gamla
+    får hela flödet i stället. Returnerar antalet rader; anroparen committar.
+    """
+    return KalenderBorttagning.query.filter(
+        KalenderBorttagning.raderad < window_start(days)
+    ).delete(synchronize_session=False)
+
+
+def record_removal(uid, lag_ids, datum, version):
+    """Spara att en händelse försvunnit ur lagens kalendrar. Anroparen committar."""
+    db.session.add_all([
+        KalenderBorttagning(uid=uid, lag_id=lag_id, datum=datum, sekvens=version)
+        for lag_id in set(lag_ids)
+    ])
@@ -0,0 +1,64 @@
+import decimal
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.utils import import_string
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson är valfritt
+    orjson = None
+
+
+def _default(value):
+    """Typer som orjson inte hanterar själv"""
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if hasattr(value, '__html__'):
+        return str(value.__html__())
+    raise TypeError(f'Objekt av typen {type(value).__name__} kan inte serialiseras till JSON')
+
+
+class Utf8JSONProvider(DefaultJSONProvider):
+    """Standardbiblioteket, men å/ä/ö skrivs som UTF-8 och nycklarna sorteras inte"""
+    ensure_ascii = False
+    sort_keys = False
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    JSON via orjson. Svaren byggs direkt som bytes, utan \\u-escapes för
+    svenska tecken och utan den extra str-kopian i standardprovidern.
+    """
+    options = 0
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=_default, option=self._options()).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=_default, option=self._options() | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+    def _options(self):
+        options = orjson.OPT_NON_STR_KEYS | self.options
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+
+def init_json(app):
+    """Välj JSON-provider enligt JSON_PROVIDER: "auto", "orjson", "std" eller sökväg till en klass"""
+    choice = app.config.get('JSON_PROVIDER', 'auto')
+    if choice == 'auto':
+        provider = OrjsonProvider if orjson is not None else Utf8JSONProvider
+    elif choice == 'orjson':
+        if orjson is None:
+            raise RuntimeError('JSON_PROVIDER=orjson kräver paketet orjson')
+        provider = OrjsonProvider
+    elif choice == 'std':
+        provider = Utf8JSONProvider
+    else:
+        provider = import_string(choice.replace(':', '.'))
+    app.json = provider(app)
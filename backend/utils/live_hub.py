@@ -0,0 +1,275 @@
+import queue
+import threading
+from abc import ABC, abstractmethod
+from flask import current_app
+from werkzeug.utils import import_string
+
+
+class Subscription(ABC):
+    """En prenumeration på en kanal. get() blockerar tills ett meddelande finns."""
+
+    @abstractmethod
+    def get(self, timeout=None):
+        """Nästa meddelande (bytes), eller None om inget kom inom timeout"""
+
+    @abstractmethod
+    def close(self):
+        pass
+
+
+class HubBackend(ABC):
+    """Gränssnitt för publicering till prenumeranter, t.ex. i processen eller via Redis"""
+
+    @abstractmethod
+    def publish(self, channel, message):
+        pass
+
+    @abstractmethod
+    def subscribe(self, channel):
+        """Returnera en Subscription för kanalen"""
+
+    @abstractmethod
+    def subscribe_async(self, channel):
+        """Prenumeration för en event-loop, där get() är en korutin (ASGI-läget)"""
+
+    def last(self, channel):
+        """
+        Senaste meddelandet på kanalen, eller None så att vyn läser aktuellt
+        läge ur databasen. Ett delat backend som inte sparar meddelandena
+        centralt ska låta bli att svara, eftersom en annan process kan ha
+        publicerat något nyare.
+        """
+        return None
+
+    def forget(self, channel):
+        pass
+
+    def stats(self):
+        return {}
+
+
+class _MemorySubscription(Subscription):
+
+    def __init__(self, backend, channel, maxsize):
+        self.backend = backend
+        self.channel = channel
+        self.queue = queue.Queue(maxsize)
+        self.dropped = 0
+
+    def put(self, message):
+        # En långsam klient får senaste ställningen, äldre meddelanden kastas
+        while True:
+            try:
+                self.queue.put_nowait(message)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.backend._unsubscribe(self)
+
+
+class _AsyncMemorySubscription(_MemorySubscription):
+    """Prenumeration vars kö hör till en event-loop, utan en tråd per klient"""
+
+    def __init__(self, backend, channel, maxsize):
+        import asyncio
+        self.backend = backend
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def put(self, message):
+        # publish() anropas från request-trådar, kön får bara röras från loopen
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            # Loopen är stängd, klienten finns inte längre
+            self.close()
+
+    def _put(self, message):
+        import asyncio
+        while True:
+            try:
+                self.queue.put_nowait(message)
+                return
+            except asyncio.QueueFull:
+                self.queue.get_nowait()
+                self.dropped += 1
+
+    async def get(self, timeout=None):
+        import asyncio
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class MemoryBackend(HubBackend):
+    """
+    Publicering inom processen. Varje prenumerant har en begränsad kö, och
+    ett publicerat meddelande läggs i alla köer utan att kopieras. Köerna
+    bygger på threading, så de fungerar både med trådar och med gevent/eventlet
+    som patchar threading. Senaste meddelandet per kanal sparas så att nya
+    klienter får aktuellt läge direkt.
+    """
+
+    def __init__(self, queue_size=16):
+        self.queue_size = queue_size
+        self._channels = {}
+        self._last = {}
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+            self._last[channel] = message
+            self.published += 1
+        for subscription in subscribers:
+            subscription.put(message)
+        return len(subscribers)
+
+    def last(self, channel):
+        with self._lock:
+            return self._last.get(channel)
+
+    def forget(self, channel):
+        with self._lock:
+            self._last.pop(channel, None)
+
+    def subscribe(self, channel):
+        subscription = _MemorySubscription(self, channel, self.queue_size)
+        with self._lock:
+            self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def subscribe_async(self, channel):
+        subscription = _AsyncMemorySubscription(self, channel, self.queue_size)
+        with self._lock:
+            self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._channels.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._channels[subscription.channel]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'kanaler': len(self._channels),
+                'prenumeranter': sum(len(s) for s in self._channels.values()),
+                'publicerade': self.published
+            }
+
+
+def format_event(event, data, event_id=None):
+    """Ett server-sent event, data är redan JSON-kodad"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.extend(f'data: {line}' for line in data.splitlines() or [''])
+    return ('\n'.join(lines) + '\n\n').encode('utf-8')
+
+
+class LiveHub:
+    """
+    Server-sent events för livesidor, t.ex. ställningen i en match.
+
+    Skrivande handlers anropar publish() efter commit. Meddelandet kodas en
+    gång och delas av alla anslutna klienter, som alltså inte läser något ur
+    databasen. Event-id är radens version, så att Last-Event-ID betyder samma
+    sak i alla processer och efter omstart.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.heartbeat = 15
+        self.retry_ms = 3000
+
+    def init_app(self, app):
+        self.heartbeat = app.config.get('LIVE_HEARTBEAT_SECONDS', self.heartbeat)
+        self.retry_ms = app.config.get('LIVE_RETRY_MS', self.retry_ms)
+
+        backend = app.config.get('LIVE_HUB_BACKEND', 'memory')
+        if backend == 'memory':
+            self.backend = MemoryBackend(app.config.get('LIVE_HUB_QUEUE_SIZE', 16))
+        else:
+            # Sökväg till en HubBackend-klass, t.ex. "utils.redis_hub:RedisHub"
+            self.backend = import_string(backend.replace(':', '.'))(app)
+
+        app.extensions['live_hub'] = self
+
+    def publish(self, channel, event, payload, event_id=None):
+        """Skicka payload som event till alla prenumeranter på kanalen"""
+        message = format_event(event, current_app.json.dumps(payload), event_id)
+        return self.backend.publish(channel, message)
+
+    def last(self, channel):
+        """Senast publicerade meddelandet på kanalen, eller None om det ska läsas ur databasen"""
+        return self.backend.last(channel)
+
+    def unseen(self, message, last_event_id):
+        """Meddelandet, eller None om klienten redan fått det (Last-Event-ID vid återanslutning)"""
+        if message is not None and last_event_id and message.startswith(f'id: {last_event_id}\n'.encode('utf-8')):
+            return None
+        return message
+
+    def forget(self, channel):
+        self.backend.forget(channel)
+
+    def subscribe(self, channel):
+        return self.backend.subscribe(channel)
+
+    def stream(self, subscription, initial=None):
+        """
+        Generator för ett text/event-stream-svar. Skickar en kommentar som
+        heartbeat när det är tyst, så att proxyer inte stänger anslutningen.
+        Prenumerationen avslutas när klienten kopplar ner.
+        """
+        try:
+            yield f'retry: {self.retry_ms}\n\n'.encode('ascii')
+            if initial is not None:
+                yield initial
+            while True:
+                message = subscription.get(timeout=self.heartbeat)
+                yield message if message is not None else b': ping\n\n'
+        finally:
+            subscription.close()
+
+    def subscribe_async(self, channel):
+        return self.backend.subscribe_async(channel)
+
+    async def astream(self, subscription, initial=None):
+        """Som stream(), men som asynkron generator för ASGI-läget"""
+        try:
+            yield f'retry: {self.retry_ms}\n\n'.encode('ascii')
+            if initial is not None:
+                yield initial
+            while True:
+                message = await subscription.get(timeout=self.heartbeat)
+                yield message if message is not None else b': ping\n\n'
+        finally:
+            subscription.close()
+
+    def stats(self):
+        return self.backend.stats()
+
+
+live_hub = LiveHub()
@@ -0,0 +1,108 @@
+import base64
+import json
+from collections import namedtuple
+from datetime import datetime
+from flask import request
+from sqlalchemy import tuple_
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+# Resultatet av en sidhämtning: raderna, cursor till nästa sida och ev. totalantal
+KeysetPage = namedtuple('KeysetPage', ['items', 'next_cursor', 'total'])
+
+
+class InvalidCursor(ValueError):
+    """Kastas när en cursor inte kan avkodas"""
+
+
+def _dump_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    return value
+
+
+def _load_value(value):
+    if isinstance(value, dict):
+        return datetime.fromisoformat(value['dt'])
+    return value
+
+
+def encode_cursor(values):
+    """Koda sorteringsnyckeln (t.ex. datum, id) till en opak, URL-säker sträng"""
+    payload = json.dumps([_dump_value(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, expected_length):
+    """Avkoda en cursor skapad av encode_cursor"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        values = [_load_value(v) for v in values]
+    except (ValueError, TypeError, KeyError):
+        raise InvalidCursor(cursor)
+
+    if not isinstance(values, list) or len(values) != expected_length:
+        raise InvalidCursor(cursor)
+    return values
+
+
+def page_args():
+    """Läs cursor, limit och include_total från query-parametrarna"""
+    limit = request.args.get('limit', DEFAULT_LIMIT, type=int)
+    return {
+        'cursor': request.args.get('cursor') or None,
+        'limit': max(1, min(limit, MAX_LIMIT)),
+        'with_total': request.args.get('include_total', '').lower() in ('1', 'true')
+    }
+
+
+def keyset_query(query, columns, cursor=None, limit=DEFAULT_LIMIT, descending=False):
+    """
+    Lägg till villkoret efter cursorn, sorteringen och LIMIT limit + 1.
+
+    Fungerar både för Query och select(), så att de asynkrona vyerna delar
+    pagineringen med de vanliga.
+    """
+    columns = list(columns)
+    if cursor:
+        values = decode_cursor(cursor, len(columns))
+        if len(columns) == 1:
+            key, after = columns[0], values[0]
+        else:
+            key, after = tuple_(*columns), tuple_(*values)
+        query = query.filter(key < after if descending else key > after)
+
+    ordering = [c.desc() if descending else c.asc() for c in columns]
+    return query.order_by(*ordering).limit(limit + 1)
+
+
+def keyset_page(rows, columns, limit, total=None):
+    """Sidan av raderna från keyset_query, med cursor om det finns fler"""
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([getattr(rows[-1], c.key) for c in columns])
+    return KeysetPage(rows, next_cursor, total)
+
+
+def keyset_paginate(query, columns, cursor=None, limit=DEFAULT_LIMIT, descending=False, with_total=False):
+    """
+    Hämta en sida med keyset-paginering.
+
+    Frågan sorteras på `columns` (sista kolumnen måste vara unik, t.ex. id) och
+    fortsätter efter cursorns värden med ett WHERE-villkor i stället för OFFSET,
+    så att djupa sidor kostar lika lite som första sidan.
+    """
+    total = query.order_by(None).count() if with_total else None
+    rows = keyset_query(query, columns, cursor, limit, descending).all()
+    return keyset_page(rows, columns, limit, total)
+
+
+def page_payload(key, items, page):
+    """Bygg svarsobjektet för en paginerad lista"""
+    payload = {key: items, 'next_cursor': page.next_cursor}
+    if page.total is not None:
+        payload['total'] = page.total
+    return payload
@@ -0,0 +1,123 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ALL_COMPLETED, FIRST_COMPLETED, wait
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class PasswordHasherBusy(Exception):
+    """Kastas när kön till hashningspoolen är full"""
+
+
+def _hash_chunk(passwords, method):
+    return [generate_password_hash(p, method) for p in passwords]
+
+
+class PasswordHasher:
+    """
+    Hashning och verifiering av lösenord i en begränsad processpool.
+
+    Med workers=0 körs allt direkt i anropande tråd (används i tester och
+    skript utan app). Antalet samtidiga jobb begränsas av queue_depth; när
+    kön är full kastas PasswordHasherBusy i stället för att blockera
+    request-trådarna.
+    """
+
+    def __init__(self, method='scrypt', workers=0, queue_depth=32):
+        self.method = method
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self._slots = threading.BoundedSemaphore(queue_depth)
+        self._pool = None
+        self._pool_pid = None
+        self._prefixes = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.shutdown()
+        self.method = app.config.get('PASSWORD_HASH_METHOD', self.method)
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', self.workers)
+        self.queue_depth = app.config.get('PASSWORD_HASH_QUEUE_DEPTH', self.queue_depth)
+        self._slots = threading.BoundedSemaphore(self.queue_depth)
+        app.extensions['password_hasher'] = self
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def hash_many(self, passwords):
+        """
+        Hasha flera lösenord parallellt, t.ex. vid massimport. Varje chunk tar
+        en plats i kön precis som en inloggning, och högst `workers` chunkar är
+        ute samtidigt, så att inloggningar alltid får plats emellan. Till
+        skillnad från hash() väntar massimporten på en ledig plats.
+        """
+        passwords = list(passwords)
+        if not self.workers:
+            return _hash_chunk(passwords, self.method)
+        chunksize = max(1, len(passwords) // (self.workers * 4))
+        chunks = [passwords[i:i + chunksize] for i in range(0, len(passwords), chunksize)]
+
+        results = [None] * len(chunks)
+        pending = {}
+        for index, chunk in enumerate(chunks):
+            if len(pending) >= self.workers:
+                self._collect(pending, results, FIRST_COMPLETED)
+            slots = self._slots
+            slots.acquire()
+            try:
+                future = self._executor().submit(_hash_chunk, chunk, self.method)
+            except BaseException:
+                slots.release()
+                raise
+            future.add_done_callback(lambda _, slots=slots: slots.release())
+            pending[future] = index
+        self._collect(pending, results)
+        return [pwhash for chunk in results for pwhash in chunk]
+
+    @staticmethod
+    def _collect(pending, results, return_when=ALL_COMPLETED):
+        done, _ = wait(pending, return_when=return_when)
+        for future in done:
+            results[pending.pop(future)] = future.result()
+
+    def needs_rehash(self, pwhash):
+        """Sant om hashen skapades med andra parametrar än de konfigurerade"""
+        return pwhash.split('$', 1)[0] != self._method_prefix()
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None and self._pool_pid == os.getpid():
+                self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            self._pool_pid = None
+
+    def _method_prefix(self):
+        # Werkzeug fyller i standardparametrar, t.ex. "scrypt" → "scrypt:32768:8:1"
+        prefix = self._prefixes.get(self.method)
+        if prefix is None:
+            prefix = generate_password_hash('', self.method).split('$', 1)[0]
+            self._prefixes[self.method] = prefix
+        return prefix
+
+    def _executor(self):
+        with self._lock:
+            # Poolen skapas först vid behov och på nytt efter fork
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy()
+        try:
+            return self._executor().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+
+password_hasher = PasswordHasher()
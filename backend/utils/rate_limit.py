@@ -0,0 +1,106 @@
+import math
+from abc import ABC, abstractmethod
+import threading
+import time
+from collections import OrderedDict
+from flask import request
+from werkzeug.exceptions import TooManyRequests
+from werkzeug.utils import import_string
+
+_PERIODS = {'second': 1, 'minute': 60, 'hour': 3600}
+
+
+def parse_limit(limit):
+    """Tolka t.ex. "10/minute" till (tokens per sekund, kapacitet)"""
+    count, period = limit.split('/')
+    count = int(count)
+    return count / _PERIODS[period.strip()], count
+
+
+class RateLimitStore(ABC):
+    """Gränssnitt för lagring av token buckets, t.ex. i minnet eller Redis"""
+
+    @abstractmethod
+    def consume(self, key, rate, capacity, cost=1):
+        """Ta `cost` tokens från bucketen. Returnerar (tillåten, sekunder_till_nästa)"""
+
+
+class MemoryStore(RateLimitStore):
+    """Token buckets i processens minne, begränsat till max_keys nycklar (LRU)"""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, rate, capacity, cost=1):
+        now = time.monotonic()
+        with self._lock:
+            tokens, stamp = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - stamp) * rate)
+            if tokens >= cost:
+                tokens -= cost
+                retry_after = 0
+            else:
+                retry_after = (cost - tokens) / rate
+
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+
+        return retry_after == 0, retry_after
+
+
+class RateLimiter:
+    """
+    Token bucket-begränsning per IP för alla requests och per IP och e-post
+    för inloggning. Körs som before_request-hook och kastar 429 med
+    Retry-After när en bucket är tom. Bakom en lastbalanserare måste
+    TRUSTED_PROXIES vara satt, annars delar alla klienter proxyns IP.
+    """
+
+    def __init__(self, store=None):
+        self.store = store
+        self.enabled = True
+        self.default_limit = parse_limit('300/minute')
+        self.login_limit = parse_limit('10/minute')
+
+    def init_app(self, app):
+        self.enabled = app.config.get('RATELIMIT_ENABLED', True)
+        self.default_limit = parse_limit(app.config.get('RATELIMIT_DEFAULT', '300/minute'))
+        self.login_limit = parse_limit(app.config.get('RATELIMIT_LOGIN', '10/minute'))
+
+        store = app.config.get('RATELIMIT_STORE', 'memory')
+        if store == 'memory':
+            self.store = MemoryStore()
+        else:
+            # Sökväg till en RateLimitStore-klass, t.ex. "utils.redis_store:RedisStore"
+            self.store = import_string(store.replace(':', '.'))(app)
+
+        app.extensions['rate_limiter'] = self
+        app.before_request(self.check_request)
+
+    def check_request(self):
+        if not self.enabled:
+            return None
+
+        ip = request.remote_addr or 'okänd'
+        self._hit(f'ip:{ip}', self.default_limit)
+
+        if request.endpoint == 'auth_routes.login':
+            self._hit(f'login-ip:{ip}', self.login_limit)
+            data = request.get_json(silent=True)
+            email = data.get('email') if isinstance(data, dict) else None
+            if isinstance(email, str) and email:
+                self._hit(f'login-email:{email.strip().lower()}', self.login_limit)
+
+        return None
+
+    def _hit(self, key, limit):
+        allowed, retry_after = self.store.consume(key, *limit)
+        if not allowed:
+            raise TooManyRequests(retry_after=math.ceil(retry_after))
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+MAX_OCCURRENCES = 500
+WEEKDAYS = {'MO': 0, 'TU': 1, 'WE': 2, 'TH': 3, 'FR': 4, 'SA': 5, 'SU': 6}
+
+
+class InvalidRule(ValueError):
+    """Kastas när en upprepningsregel inte kan tolkas"""
+
+
+def parse_rrule(text):
+    """
+    Tolka en förenklad RRULE enligt RFC 5545, t.ex.
+    "FREQ=WEEKLY;INTERVAL=1;BYDAY=MO,TH;UNTIL=20251130".
+
+    Stöder FREQ (DAILY, WEEKLY), INTERVAL, BYDAY, COUNT och UNTIL. COUNT
+    eller UNTIL måste anges så att serien är ändlig.
+    """
+    try:
+        parts = dict(part.split('=', 1) for part in text.upper().strip().split(';') if part)
+    except ValueError:
+        raise InvalidRule('Regeln måste bestå av NYCKEL=VÄRDE separerade med semikolon')
+
+    freq = parts.get('FREQ')
+    if freq not in ('DAILY', 'WEEKLY'):
+        raise InvalidRule('FREQ måste vara DAILY eller WEEKLY')
+
+    try:
+        rule = {
+            'freq': freq,
+            'interval': int(parts.get('INTERVAL', 1)),
+            'count': int(parts['COUNT']) if 'COUNT' in parts else None,
+            'until': _parse_until(parts['UNTIL']) if 'UNTIL' in parts else None,
+            'byday': [WEEKDAYS[day] for day in parts['BYDAY'].split(',')] if 'BYDAY' in parts else None
+        }
+    except (KeyError, ValueError):
+        raise InvalidRule('Ogiltigt värde för INTERVAL, COUNT, UNTIL eller BYDAY')
+
+    if rule['interval'] < 1:
+        raise InvalidRule('INTERVAL måste vara minst 1')
+    if rule['count'] is None and rule['until'] is None:
+        raise InvalidRule('COUNT eller UNTIL måste anges')
+    return rule
+
+
+def _parse_until(value):
+    if 'T' in value:
+        return datetime.strptime(value.rstrip('Z'), '%Y%m%dT%H%M%S')
+    # Endast datum: hela dagen räknas med
+    return datetime.strptime(value, '%Y%m%d') + timedelta(days=1) - timedelta(seconds=1)
+
+
+def expand(start, rule, limit=MAX_OCCURRENCES):
+    """Generera alla tillfällen i serien, sorterade, med start som första möjliga"""
+    count, until = rule['count'], rule['until']
+    occurrences = []
+
+    if rule['freq'] == 'DAILY':
+        candidates = (start + timedelta(days=i * rule['interval']) for i in range(limit + 1))
+    else:
+        candidates = _weekly(start, rule['interval'], sorted(set(rule['byday'] or [start.weekday()])))
+
+    for datum in candidates:
+        if until is not None and datum > until:
+            break
+        if count is not None and len(occurrences) >= count:
+            break
+        if len(occurrences) >= limit:
+            raise InvalidRule(f'Serien får innehålla högst {limit} tillfällen')
+        occurrences.append(datum)
+
+    return occurrences
+
+
+def _weekly(start, interval, weekdays):
+    week_start = start - timedelta(days=start.weekday())
+    while True:
+        for weekday in weekdays:
+            datum = week_start + timedelta(days=weekday)
+            if datum >= start:
+                yield datum
+        week_start += timedelta(weeks=interval)
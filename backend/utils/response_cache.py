@@ -0,0 +1,200 @@
+import threading
+from abc import ABC, abstractmethod
+import time
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlencode
+from flask import request, current_app
+from werkzeug.utils import import_string
+from utils.db_routing import read_from_primary
+
+# Headers som sparas tillsammans med kroppen
+_STORED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Cache-Control')
+
+
+class CacheBackend(ABC):
+    """Gränssnitt för lagring av cachade svar, t.ex. i minnet eller Redis"""
+
+    @abstractmethod
+    def get(self, key):
+        """Sparat värde, eller None vid miss eller utgången TTL"""
+
+    @abstractmethod
+    def set(self, key, value, ttl):
+        """Spara ett värde i `ttl` sekunder"""
+
+    @abstractmethod
+    def generation(self, namespace):
+        """Aktuell generation för ett namespace (0 om det aldrig ogiltigförklarats)"""
+
+    @abstractmethod
+    def bump(self, namespace):
+        """Räkna upp generationen så att alla gamla poster i namespacet blir oåtkomliga"""
+
+
+class MemoryBackend(CacheBackend):
+    """LRU-cache med TTL i processens minne. Generationerna tas aldrig bort vid LRU."""
+
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def generation(self, namespace):
+        return self._generations.get(namespace, 0)
+
+    def bump(self, namespace):
+        # Poster från äldre generationer träffas aldrig igen och försvinner via LRU/TTL
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+
+class ResponseCache:
+    """
+    Delad cache för publika GET-svar som är lika för alla anropare.
+
+    Nyckeln är route, query-parametrar och generationerna för de namespaces
+    svaret beror på. Skrivande handlers anropar invalidate() efter commit,
+    vilket räknar upp generationen så att inga gamla svar kan returneras.
+    Vid miss läser vyn från primären även med läsreplika, så att ett svar från
+    en replika som ligger efter aldrig sparas under en ny generation. Med
+    minnesbackend gäller ogiltigförklaringen per process (se serve.py).
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.enabled = True
+        self.ttl = 30
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        self.enabled = app.config.get('RESPONSE_CACHE_ENABLED', True)
+        self.ttl = app.config.get('RESPONSE_CACHE_TTL', self.ttl)
+        self.hits = 0
+        self.misses = 0
+
+        backend = app.config.get('RESPONSE_CACHE_BACKEND', 'memory')
+        if backend == 'memory':
+            self.backend = MemoryBackend(app.config.get('RESPONSE_CACHE_SIZE', 512))
+        else:
+            # Sökväg till en CacheBackend-klass, t.ex. "utils.redis_cache:RedisBackend"
+            self.backend = import_string(backend.replace(':', '.'))(app)
+
+        app.extensions['response_cache'] = self
+
+    def cached(self, *namespaces):
+        """Decorator som cachar lyckade GET-svar för vyn"""
+        def decorator(f):
+            @wraps(f)
+            def decorated_function(*args, **kwargs):
+                if not self.enabled or request.method not in ('GET', 'HEAD'):
+                    return f(*args, **kwargs)
+
+                key = self._key(namespaces)
+                entry = self.backend.get(key)
+                if entry is not None:
+                    self.hits += 1
+                    return self._respond(entry)
+
+                self.misses += 1
+                read_from_primary()
+                return self._store(key, f(*args, **kwargs))
+
+            return decorated_function
+
+        return decorator
+
+    def cached_async(self, *namespaces):
+        """Som cached(), för de asynkrona vyerna i ASGI-läget"""
+        def decorator(f):
+            @wraps(f)
+            async def decorated_function(*args, **kwargs):
+                if not self.enabled or request.method not in ('GET', 'HEAD'):
+                    return await f(*args, **kwargs)
+
+                key = self._key(namespaces)
+                entry = self.backend.get(key)
+                if entry is not None:
+                    self.hits += 1
+                    return self._respond(entry)
+
+                self.misses += 1
+                read_from_primary()
+                return self._store(key, await f(*args, **kwargs))
+
+            return decorated_function
+
+        return decorator
+
+    def get(self, key):
+        """Hämta en post som sparats med set() eller store_stream(), None vid miss"""
+        if not self.enabled:
+            return None
+        entry = self.backend.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def set(self, key, value, ttl=None):
+        if self.enabled:
+            self.backend.set(key, value, ttl or self.ttl)
+
+    def store_stream(self, key, chunks, ttl=None):
+        """Skicka vidare en strömmad kropp och spara den hela när den strömmats klart"""
+        parts = []
+        for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+        self.set(key, b''.join(parts), ttl)
+
+    def invalidate(self, *namespaces):
+        """Ogiltigförklara alla cachade svar i de angivna namespacen"""
+        for namespace in namespaces:
+            self.backend.bump(namespace)
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'ttl': self.ttl, 'enabled': self.enabled}
+
+    def _key(self, namespaces):
+        generations = ','.join(f'{ns}.{self.backend.generation(ns)}' for ns in namespaces)
+        args = urlencode(sorted(request.args.items(multi=True)))
+        return f'{generations}|{request.path}?{args}'
+
+    def _store(self, key, rv):
+        response = current_app.make_response(rv)
+        if response.status_code == 200 and not response.is_streamed:
+            headers = {h: response.headers[h] for h in _STORED_HEADERS if h in response.headers}
+            self.backend.set(key, (response.get_data(), headers), self.ttl)
+        return response
+
+    def _respond(self, entry):
+        body, headers = entry
+        response = current_app.response_class(body, status=200, headers=headers)
+        # Besvara If-None-Match/If-Modified-Since med 304 direkt från cachen
+        return response.make_conditional(request)
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,69 @@
+from functools import lru_cache
+from operator import attrgetter
+from flask import request
+
+
+class InvalidFields(ValueError):
+    """Kastas när ?fields= innehåller fält som modellen inte har"""
+
+    def __init__(self, unknown):
+        super().__init__(', '.join(unknown))
+        self.unknown = unknown
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+class ModelSerializer:
+    """
+    Serialiserar modellinstanser till dicts för API-svar.
+
+    `fields` mappar nyckel i svaret till attribut, t.ex. 'hemmalag_namn':
+    'hemmalag.namn'. För varje urval av fält kompileras en gång en attrgetter
+    som hämtar alla värden som en tuple, så att en lista med tusentals rader
+    bara kostar ett anrop per rad.
+    """
+
+    def __init__(self, fields, dates=()):
+        self.fields = dict(fields)
+        self.dates = frozenset(dates)
+        self._compile = lru_cache(maxsize=64)(self._compile)
+
+    def __call__(self, obj, fields=None):
+        keys, getter, converters = self._compile(tuple(fields) if fields else None)
+        values = getter(obj)
+        if len(keys) == 1:
+            values = (values,)
+        if converters:
+            values = list(values)
+            for index in converters:
+                values[index] = _isoformat(values[index])
+        return dict(zip(keys, values))
+
+    def many(self, objs, fields=None):
+        return [self(obj, fields) for obj in objs]
+
+    def validate(self, fields):
+        """Kontrollera ett urval av fält. Returnerar det som tuple eller None för alla."""
+        if not fields:
+            return None
+        unknown = [f for f in fields if f not in self.fields]
+        if unknown:
+            raise InvalidFields(unknown)
+        return tuple(fields)
+
+    def _compile(self, fields):
+        keys = tuple(fields) if fields else tuple(self.fields)
+        getter = attrgetter(*(self.fields[key] for key in keys))
+        converters = tuple(i for i, key in enumerate(keys) if key in self.dates)
+        return keys, getter, converters
+
+
+def requested_fields(model):
+    """Läs ?fields=id,datum och validera mot modellens serializer"""
+    raw = request.args.get('fields', '')
+    fields = [f.strip() for f in raw.split(',') if f.strip()]
+    # Bevara ordningen men ta bort dubbletter
+    return model.serializer.validate(list(dict.fromkeys(fields)))
+
@@ -0,0 +1,186 @@
+from collections import Counter, defaultdict, namedtuple
+from sqlalchemy import or_
+from models import db, Lag, Match, Tabellrad, Inbördes
+
+POÄNG = {'V': 3, 'O': 1, 'F': 0}
+FORM_LÄNGD = 5
+
+# Räknarkolumner i tabell och inbördes
+STAT_COLUMNS = frozenset([
+    'spelade', 'vunna', 'oavgjorda', 'förlorade', 'gjorda', 'insläppta', 'poäng',
+    'vinster_a', 'vinster_b', 'gjorda_a', 'gjorda_b'
+])
+
+# Det som påverkar tabellen i en match, sparas före och efter en ändring
+Resultat = namedtuple('Resultat', ['hemmalag_id', 'bortalag_id', 'hemma', 'borta'])
+
+
+def snapshot(match):
+    """Matchens lag och resultat, eller None för en match som inte finns"""
+    if match is None:
+        return None
+    return Resultat(match.hemmalag_id, match.bortalag_id, match.resultat_hemma, match.resultat_borta)
+
+
+def _utfall(gjorda, insläppta):
+    if gjorda > insläppta:
+        return 'V'
+    return 'O' if gjorda == insläppta else 'F'
+
+
+def _spelad(resultat):
+    return resultat is not None and resultat.hemma is not None and resultat.borta is not None
+
+
+def _lagrad(gjorda, insläppta):
+    utfall = _utfall(gjorda, insläppta)
+    return Counter({
+        'spelade': 1,
+        'vunna': utfall == 'V',
+        'oavgjorda': utfall == 'O',
+        'förlorade': utfall == 'F',
+        'gjorda': gjorda,
+        'insläppta': insläppta,
+        'poäng': POÄNG[utfall]
+    })
+
+
+def _parrad(resultat):
+    """Nyckel (lag_a, lag_b) med lag_a < lag_b och bidraget till inbördes-raden"""
+    a, b, mål_a, mål_b = resultat
+    if a > b:
+        a, b, mål_a, mål_b = b, a, mål_b, mål_a
+    utfall = _utfall(mål_a, mål_b)
+    return (a, b), Counter({
+        'spelade': 1,
+        'vinster_a': utfall == 'V',
+        'vinster_b': utfall == 'F',
+        'oavgjorda': utfall == 'O',
+        'gjorda_a': mål_a,
+        'gjorda_b': mål_b
+    })
+
+
+def _scaled(counter, sign):
+    return Counter({key: value * sign for key, value in counter.items()})
+
+
+def _insert_missing(model, keys, rows):
+    """Lägg in rader som saknas, utan att krocka med samtidiga transaktioner"""
+    if not rows:
+        return
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        insert = None
+
+    if insert is not None:
+        stmt = insert(model.__table__).on_conflict_do_nothing(index_elements=keys)
+    else:
+        columns = [getattr(model, key) for key in keys]
+        existing = set(db.session.execute(db.select(*columns)).all())
+        rows = [row for row in rows if tuple(row[key] for key in keys) not in existing]
+        stmt = db.insert(model.__table__)
+    if rows:
+        db.session.execute(stmt, rows)
+
+
+def _increment(model, where, delta):
+    values = {key: getattr(model, key) + value for key, value in delta.items() if value}
+    if values:
+        db.session.execute(db.update(model).where(*where).values(values))
+
+
+def _fyll(delta, model):
+    """Värden för alla räknarkolumner i modellen, även de som är noll"""
+    return {c.key: int(delta.get(c.key, 0)) for c in model.__table__.columns if c.key in STAT_COLUMNS}
+
+
+def apply_change(before, after):
+    """
+    Uppdatera tabell, form och inbördes när en match skapas (before=None),
+    ändras eller tas bort (after=None). Resultatet före räknas bort och
+    resultatet efter läggs till med UPDATE ... SET x = x + n, så samtidiga
+    ändringar inte skriver över varandra. Anroparen committar.
+    """
+    lagrader = defaultdict(Counter)
+    parrader = defaultdict(Counter)
+    for resultat, sign in ((before, -1), (after, 1)):
+        if not _spelad(resultat):
+            continue
+        # update() och inte +=, som tar bort negativa värden ur en Counter
+        lagrader[resultat.hemmalag_id].update(_scaled(_lagrad(resultat.hemma, resultat.borta), sign))
+        lagrader[resultat.bortalag_id].update(_scaled(_lagrad(resultat.borta, resultat.hemma), sign))
+        par, delta = _parrad(resultat)
+        parrader[par].update(_scaled(delta, sign))
+
+    db.session.flush()
+    berörda = {lag_id for r in (before, after) if r is not None for lag_id in (r.hemmalag_id, r.bortalag_id)}
+    _insert_missing(Tabellrad, ['lag_id'], [{'lag_id': lag_id} for lag_id in berörda])
+    _insert_missing(Inbördes, ['lag_a_id', 'lag_b_id'],
+                    [{'lag_a_id': a, 'lag_b_id': b} for a, b in parrader])
+
+    for lag_id, delta in lagrader.items():
+        _increment(Tabellrad, [Tabellrad.lag_id == lag_id], delta)
+    for (a, b), delta in parrader.items():
+        _increment(Inbördes, [Inbördes.lag_a_id == a, Inbördes.lag_b_id == b], delta)
+
+    for lag_id in berörda:
+        refresh_form(lag_id)
+
+
+def refresh_form(lag_id):
+    """Räkna om formen från lagets senaste spelade matcher (indexerat uppslag)"""
+    senaste = db.session.execute(
+        db.select(Match.hemmalag_id, Match.resultat_hemma, Match.resultat_borta)
+        .where(or_(Match.hemmalag_id == lag_id, Match.bortalag_id == lag_id),
+               Match.resultat_hemma.isnot(None), Match.resultat_borta.isnot(None))
+        .order_by(Match.datum.desc(), Match.id.desc())
+        .limit(FORM_LÄNGD)
+    ).all()
+    form = ''.join(
+        _utfall(hemma, borta) if hemmalag_id == lag_id else _utfall(borta, hemma)
+        for hemmalag_id, hemma, borta in senaste
+    )
+    db.session.execute(db.update(Tabellrad).where(Tabellrad.lag_id == lag_id).values(form=form))
+
+
+def rebuild():
+    """Bygg om tabell och inbördes från alla matcher, t.ex. efter import. Anroparen committar."""
+    lagrader = {lag_id: Counter() for lag_id in db.session.scalars(db.select(Lag.id))}
+    former = defaultdict(str)
+    parrader = defaultdict(Counter)
+
+    matcher = db.session.execute(
+        db.select(Match.hemmalag_id, Match.bortalag_id, Match.resultat_hemma, Match.resultat_borta)
+        .where(Match.resultat_hemma.isnot(None), Match.resultat_borta.isnot(None))
+        .order_by(Match.datum.desc(), Match.id.desc())
+        .execution_options(yield_per=1000)
+    )
+    for row in matcher:
+        resultat = Resultat(*row)
+        for lag_id, gjorda, insläppta in ((resultat.hemmalag_id, resultat.hemma, resultat.borta),
+                                          (resultat.bortalag_id, resultat.borta, resultat.hemma)):
+            lagrader.setdefault(lag_id, Counter()).update(_lagrad(gjorda, insläppta))
+            if len(former[lag_id]) < FORM_LÄNGD:
+                former[lag_id] += _utfall(gjorda, insläppta)
+        par, delta = _parrad(resultat)
+        parrader[par].update(delta)
+
+    db.session.execute(db.delete(Inbördes))
+    db.session.execute(db.delete(Tabellrad))
+    if lagrader:
+        db.session.execute(db.insert(Tabellrad), [
+            {'lag_id': lag_id, 'form': former[lag_id], **_fyll(delta, Tabellrad)}
+            for lag_id, delta in lagrader.items()
+        ])
+    if parrader:
+        db.session.execute(db.insert(Inbördes), [
+            {'lag_a_id': a, 'lag_b_id': b, **_fyll(delta, Inbördes)}
+            for (a, b), delta in parrader.items()
+        ])
+    return len(lagrader)
+
@@ -1,61 +1,98 @@
-from functools import wraps
-from flask import request, jsonify
-import jwt
-from config import Config
-from models import User
-
-
-def token_required(f):
-    """Decorator för att skydda routes med JWT-tokens"""
-
-    @wraps(f)
-    def decorated(*args, **kwargs):
-        token = None
-
-        # Hämta token från Authorization header
-        if 'Authorization' in request.headers:
-            auth_header = request.headers['Authorization']
-            if auth_header.startswith('Bearer '):
-                token = auth_header.split(' ')[1]
-
-        if not token:
-            return jsonify({'error': 'Token saknas, autentisering krävs'}), 401
-
-        try:
-            # Avkoda token för att få användar-ID
-            data = jwt.decode(token, Config.SECRET_KEY, algorithms=["HS256"])
-            current_user = User.query.get(data['user_id'])
-
-            if not current_user:
-                return jsonify({'error': 'Ogiltig token, användaren finns inte'}), 401
-
-        except jwt.ExpiredSignatureError:
-            return jsonify({'error': 'Token har gått ut, logga in igen'}), 401
-        except jwt.InvalidTokenError:
-            return jsonify({'error': 'Ogiltig token'}), 401
-
-        # Skicka med användarobjektet till funktionen
-        return f(current_user=current_user, *args, **kwargs)
-
-    return decorated
-
-
-def roles_required(allowed_roles):
-    """Decorator för att kontrollera användarroller"""
-
-    def decorator(f):
-        @wraps(f)
-        def decorated_function(*args, **kwargs):
-            current_user = kwargs.get('current_user')
-
-            if not current_user:
-                return jsonify({'error': 'Användare saknas'}), 401
-
-            if current_user.roll not in allowed_roles:
-                return jsonify({'error': 'Otillräcklig behörighet för denna åtgärd'}), 403
-
-            return f(*args, **kwargs)
-
-        return decorated_function
-
-    return decorator
\ No newline at end of file
+import datetime
+import secrets
+import uuid
+from flask import current_app
+from models import db, user_lag, RefreshToken
+
+
+def _encode(payload):
+    import jwt
+    token = jwt.encode(payload, current_app.config['SECRET_KEY'], algorithm="HS256")
+    # Äldre versioner av PyJWT returnerar bytes
+    if isinstance(token, bytes):
+        token = token.decode('utf-8')
+    return token
+
+
+def create_access_token(user):
+    """Skapa en kortlivad access-token för användaren
+
+    Tokenversionen (ver) jämförs mot användarens token_version så att gamla
+    tokens återkallas. Med JWT_CLAIMS_IN_TOKEN läggs även roll och
+    lagmedlemskap in så att roles_required kan avgöra behörighet utan
+    databasuppslag.
+    """
+    payload = {
+        'user_id': user.id,
+        'typ': 'access',
+        'ver': user.token_version or 0,
+        'exp': datetime.datetime.utcnow() + current_app.config['JWT_ACCESS_TOKEN_EXPIRES']
+    }
+    if current_app.config.get('JWT_CLAIMS_IN_TOKEN'):
+        payload['roll'] = user.roll
+        payload['lag'] = db.session.execute(
+            db.select(user_lag.c.lag_id).where(user_lag.c.user_id == user.id)
+        ).scalars().all()
+
+    return _encode(payload)
+
+
+def create_refresh_token(user):
+    """Skapa en långlivad refresh-token och registrera den i refresh_tokens
+
+    Anroparen ansvarar för commit.
+    """
+    jti = str(uuid.uuid4())
+    expires_at = datetime.datetime.utcnow() + current_app.config['JWT_REFRESH_TOKEN_EXPIRES']
+    db.session.add(RefreshToken(jti=jti, user_id=user.id, expires_at=expires_at))
+
+    return _encode({
+        'user_id': user.id,
+        'typ': 'refresh',
+        'jti': jti,
+        'ver': user.token_version or 0,
+        'exp': expires_at
+    })
+
+
+def create_feed_token(user, rotate=False):
+    """
+    Token för kalenderflöden, som skickas i URL:en eftersom kalenderappar inte
+    kan sätta Authorization-headern. Den löper inte ut men innehåller
+    användarens feed_secret, som byts med rotate=True för att återkalla alla
+    utfärdade feed-tokens utan att logga ut användaren. Den återkallas också
+    som övriga tokens när token_version räknas upp. Anroparen committar.
+    """
+    if rotate or not user.feed_secret:
+        user.feed_secret = secrets.token_hex(16)
+    return _encode({
+        'user_id': user.id,
+        'typ': 'feed',
+        'ver': user.token_version or 0,
+        'fs': user.feed_secret
+    })
+
+
+def decode_token(token, expected_type='access'):
+    """Verifiera och avkoda en JWT-token, kastar jwt.InvalidTokenError vid fel"""
+    import jwt
+    data = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=["HS256"])
+    # Tokens utan typ utfärdades före uppdelningen och räknas som access-tokens
+    if data.get('typ', 'access') != expected_type:
+        raise jwt.InvalidTokenError(f"Förväntade {expected_type}-token")
+    return data
+
+
+def prune_refresh_tokens(revoked_days=7, now=None):
+    """
+    Ta bort utgångna refresh-tokens, och återkallade som är äldre än
+    `revoked_days` dagar. Återkallade tokens sparas en tid eftersom en
+    återanvänd token känns igen på sin rad och då återkallar hela kedjan.
+    Returnerar antalet borttagna rader; anroparen ansvarar för commit.
+    """
+    now = now or datetime.datetime.utcnow()
+    return RefreshToken.query.filter(db.or_(
+        RefreshToken.expires_at < now,
+        db.and_(RefreshToken.revoked.is_(True),
+                RefreshToken.created_at < now - datetime.timedelta(days=revoked_days))
+    )).delete(synchronize_session=False)
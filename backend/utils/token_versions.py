@@ -0,0 +1,76 @@
+import threading
+import time
+from models import db, User
+
+
+class TokenVersionMap:
+    """
+    Kompakt karta user_id → tokenversion i minnet.
+
+    Används för att återkalla tokens med claims utan att läsa users-tabellen
+    per request. Kartan läses om från databasen med en enda fråga när den är
+    äldre än refresh_interval sekunder. Användare med id <= högsta id vid
+    senaste inläsningen som saknas i kartan har tagits bort och nekas, så det
+    högsta id:t minskar aldrig. Bara en request i taget läser om kartan; övriga
+    fortsätter med den nuvarande under tiden.
+    """
+
+    def __init__(self, refresh_interval=30):
+        self.refresh_interval = refresh_interval
+        self._versions = {}
+        self._max_id = 0
+        self._loaded_at = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def init_app(self, app):
+        self.refresh_interval = app.config.get('TOKEN_VERSION_REFRESH_SECONDS', self.refresh_interval)
+        with self._lock:
+            self._versions = {}
+            self._max_id = 0
+            self._loaded_at = None
+        app.extensions['token_versions'] = self
+
+    def refresh(self):
+        rows = db.session.execute(db.select(User.id, User.token_version)).all()
+        with self._lock:
+            self._versions = {user_id: version or 0 for user_id, version in rows}
+            self._max_id = max(self._max_id, max(self._versions, default=0))
+            self._loaded_at = time.monotonic()
+
+    def is_valid(self, user_id, version):
+        """Kontrollera att tokenversionen fortfarande gäller för användaren"""
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at > self.refresh_interval:
+            self._refresh_once(loaded_at)
+
+        current = self._versions.get(user_id)
+        if current is None:
+            # Okänt id: ny användare sedan senaste inläsningen, eller borttagen
+            return user_id > self._max_id
+        return version >= current
+
+    def _refresh_once(self, loaded_at):
+        # Utan karta måste alla vänta på inläsningen, annars räcker den gamla
+        if not self._refresh_lock.acquire(blocking=loaded_at is None):
+            return
+        try:
+            if self._loaded_at == loaded_at:
+                self.refresh()
+        finally:
+            self._refresh_lock.release()
+
+    def revoke(self, user_id, version):
+        """Uppdatera lokalt direkt efter att användarens tokenversion räknats upp"""
+        with self._lock:
+            self._versions[user_id] = version
+            self._max_id = max(self._max_id, user_id)
+
+    def forget(self, user_id):
+        """Neka alla tokens för en borttagen användare"""
+        with self._lock:
+            self._versions.pop(user_id, None)
+            self._max_id = max(self._max_id, user_id)
+
+
+token_versions = TokenVersionMap()
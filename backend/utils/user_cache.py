@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+from models import db, User
+
+
+class UserCache:
+    """
+    Begränsad LRU-cache med TTL för användare som slås upp vid autentisering.
+
+    invalidate() tar bort användarens post och noterar när det skedde, så att
+    en läsning som påbörjades före ändringen inte sparas efteråt. Noteringarna
+    är lika begränsade som posterna; de äldsta slås ihop till ett golv som alla
+    äldre läsningar jämförs mot. Cachen sparar kolumnvärdena och kopplar på en
+    ny instans till aktuell session vid träff, utan att någon SQL skickas.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        # user_id -> _clock när användaren senast ogiltigförklarades
+        self._invalidated = OrderedDict()
+        self._clock = 0
+        self._floor = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.maxsize = app.config.get('USER_CACHE_SIZE', self.maxsize)
+        self.ttl = app.config.get('USER_CACHE_TTL', self.ttl)
+        self.clear()
+        app.extensions['user_cache'] = self
+
+    def get_user(self, user_id):
+        """Hämta användaren från cachen eller databasen"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                snapshot = entry[1]
+            else:
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                snapshot = None
+            started = self._clock
+
+        if snapshot is not None:
+            return self._attach(snapshot)
+
+        user = db.session.get(User, user_id)
+        if user is not None:
+            self._store(user_id, user, now, started)
+        return user
+
+    def invalidate(self, user_id):
+        """Ogiltigförklara cachade poster för en användare"""
+        with self._lock:
+            self._clock += 1
+            self._entries.pop(user_id, None)
+            self._invalidated[user_id] = self._clock
+            self._invalidated.move_to_end(user_id)
+            while len(self._invalidated) > self.maxsize:
+                _, self._floor = self._invalidated.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._invalidated.clear()
+            self._floor = self._clock
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Träff- och missräknare för övervakning"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl
+            }
+
+    def _store(self, user_id, user, now, started):
+        snapshot = {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+        with self._lock:
+            # Spara inte om användaren hann ändras medan den lästes från databasen
+            if self._invalidated.get(user_id, self._floor) > started:
+                return
+            self._entries[user_id] = (now + self.ttl, snapshot)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _attach(self, snapshot):
+        user = User.__mapper__.class_manager.new_instance()
+        for key, value in snapshot.items():
+            setattr(user, key, value)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+
+
+user_cache = UserCache()
@@ -0,0 +1,200 @@
+import csv
+import json
+from itertools import islice
+from sqlalchemy.exc import SQLAlchemyError
+from models import db, User, Lag, user_lag
+from utils.passwords import password_hasher
+from utils.validators import validate_password
+
+BATCH_SIZE = 500
+REQUIRED_FIELDS = ('förnamn', 'efternamn', 'email', 'lösenord')
+TEXT_FIELDS = ('förnamn', 'efternamn', 'email', 'telefon')
+ROLLER = {'spelare', 'tränare', 'admin', 'superadmin', 'gäst'}
+
+
+def read_rows(stream, fmt):
+    """Läs användarrader ur en textström i CSV-, JSON- eller NDJSON-format
+
+    I CSV anges lagmedlemskap som lag-id:n separerade med semikolon, t.ex. "1;4".
+    """
+    if fmt == 'csv':
+        for row in csv.DictReader(stream):
+            lag = row.get('lag') or ''
+            row['lag'] = [part.strip() for part in lag.split(';') if part.strip()]
+            yield row
+        return
+
+    first = stream.read(1)
+    while first and first.isspace():
+        first = stream.read(1)
+    if first == '[':
+        # Vanlig JSON-array måste läsas in i sin helhet
+        yield from json.loads(first + stream.read())
+        return
+
+    # NDJSON: en användare per rad. En trasig rad rapporteras som fel för
+    # just den raden, tidigare batchar är redan sparade.
+    for line in _prepend(first, stream):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                yield e
+
+
+def _prepend(first, stream):
+    line = first + stream.readline()
+    while line:
+        yield line
+        line = stream.readline()
+
+
+def _lag_ids(lag):
+    """Lag-id:n som en lista av heltal: ett heltal eller en lista av heltal/siffersträngar"""
+    if lag is None:
+        return []
+    if isinstance(lag, int) and not isinstance(lag, bool):
+        return [lag]
+    if not isinstance(lag, list):
+        raise ValueError(lag)
+    ids = []
+    for lag_id in lag:
+        if isinstance(lag_id, bool) or not isinstance(lag_id, (int, str)):
+            raise ValueError(lag_id)
+        ids.append(int(lag_id))
+    return ids
+
+
+def _validate(row):
+    if isinstance(row, json.JSONDecodeError):
+        return f'Ogiltig JSON: {row.msg}'
+    if not isinstance(row, dict):
+        return 'Raden är inte ett objekt'
+    missing = [field for field in REQUIRED_FIELDS if not row.get(field)]
+    if missing:
+        return f'Följande fält saknas: {", ".join(missing)}'
+    invalid = [field for field in TEXT_FIELDS if row.get(field) is not None and not isinstance(row[field], str)]
+    if invalid:
+        return f'Följande fält måste vara text: {", ".join(invalid)}'
+    if not isinstance(row['lösenord'], str):
+        return 'Ogiltigt lösenord'
+    # Samma lösenordskrav som när en användare skapas via API:et
+    password_errors = validate_password(row['lösenord'])
+    if password_errors:
+        return '; '.join(password_errors)
+    if (row.get('roll') or 'spelare') not in ROLLER:
+        return f'Okänd roll: {row["roll"]}'
+    try:
+        row['lag'] = _lag_ids(row.get('lag'))
+    except ValueError:
+        return 'Ogiltigt lag-id'
+    return None
+
+
+def import_users(rows, batch_size=BATCH_SIZE):
+    """
+    Importera användare i batchar och returnera en rapport per rad.
+
+    Varje batch valideras med en fråga för befintliga e-postadresser och en
+    för lag-id:n, lösenorden hashas parallellt och användare och
+    lagmedlemskap skrivs med flerradiga INSERT i samma transaktion. Felaktiga
+    rader hoppas över och rapporteras i stället för att avbryta importen. Om
+    databasen ändå avvisar batchen görs ett nytt försök rad för rad, så att
+    rapporten pekar ut den rad som felade.
+    """
+    report = {'skapade': 0, 'fel': []}
+    seen_emails = set()
+    numbered = enumerate(rows, start=1)
+
+    while True:
+        batch = list(islice(numbered, batch_size))
+        if not batch:
+            break
+        _import_batch(batch, seen_emails, report)
+
+    return report
+
+
+def _import_batch(batch, seen_emails, report):
+    valid = []
+    for rad, row in batch:
+        error = _validate(row)
+        if error is None and row['email'] in seen_emails:
+            error = 'E-postadressen förekommer flera gånger i filen'
+        if error:
+            report['fel'].append({'rad': rad, 'email': _email(row), 'fel': error})
+            continue
+        seen_emails.add(row['email'])
+        valid.append((rad, row))
+
+    if not valid:
+        return
+
+    emails = [row['email'] for _, row in valid]
+    existing = set(db.session.execute(
+        db.select(User.email).where(User.email.in_(emails))
+    ).scalars())
+    lag_ids = {lag_id for _, row in valid for lag_id in row['lag']}
+    known_lag = set(db.session.execute(
+        db.select(Lag.id).where(Lag.id.in_(lag_ids))
+    ).scalars()) if lag_ids else set()
+
+    accepted = []
+    for rad, row in valid:
+        if row['email'] in existing:
+            report['fel'].append({'rad': rad, 'email': row['email'], 'fel': 'E-postadressen är redan registrerad'})
+        elif set(row['lag']) - known_lag:
+            missing = ', '.join(str(i) for i in sorted(set(row['lag']) - known_lag))
+            report['fel'].append({'rad': rad, 'email': row['email'], 'fel': f'Lag finns inte: {missing}'})
+        else:
+            accepted.append((rad, row))
+
+    if not accepted:
+        return
+
+    hashes = password_hasher.hash_many(row['lösenord'] for _, row in accepted)
+    params = [{
+        'förnamn': row['förnamn'],
+        'efternamn': row['efternamn'],
+        'email': row['email'],
+        'lösenord_hash': pwhash,
+        'telefon': row.get('telefon') or None,
+        'roll': row.get('roll') or 'spelare'
+    } for (_, row), pwhash in zip(accepted, hashes)]
+
+    try:
+        created = _insert(accepted, params)
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        created = 0
+        for (rad, row), values in zip(accepted, params):
+            try:
+                with db.session.begin_nested():
+                    created += _insert([(rad, row)], [values])
+            except SQLAlchemyError as e:
+                report['fel'].append({'rad': rad, 'email': row['email'], 'fel': f'Databasfel: {e.__class__.__name__}'})
+        db.session.commit()
+
+    report['skapade'] += created
+
+
+def _insert(accepted, params):
+    """Skriv användare och lagmedlemskap med flerradiga INSERT, returnerar antalet användare"""
+    created = db.session.execute(
+        db.insert(User).returning(User.id, User.email, sort_by_parameter_order=True),
+        params
+    ).all()
+    memberships = [
+        {'user_id': user_id, 'lag_id': lag_id}
+        for (user_id, _), (_, row) in zip(created, accepted)
+        for lag_id in row['lag']
+    ]
+    if memberships:
+        db.session.execute(user_lag.insert(), memberships)
+    return len(created)
+
+
+def _email(row):
+    email = row.get('email') if isinstance(row, dict) else None
+    return email if isinstance(email, str) else None